@@ -0,0 +1,246 @@
+# Core/audit_log.py
+"""
+Log de auditoria das sessões em SQLite.
+
+Cada análise gera um registro com os fatos, as recomendações, as regras
+disparadas, a versão da base de conhecimento e a latência. Quando nenhuma
+regra dispara e a tela mostra as recomendações do perfil coberto mais próximo,
+o registro guarda o resultado real (vazio) e, à parte, esse perfil vizinho. No
+caminho da requisição o registro só é colocado numa fila limitada (put_nowait,
+sem serialização nem E/S); uma thread de escrita acorda periodicamente,
+esvazia a fila em lotes e grava cada lote numa única transação, com o banco em
+modo WAL. Se a fila estiver cheia o registro é descartado e contado, em vez de
+atrasar a requisição. Os registros pendentes são gravados no close() (chamado
+também na saída do interpretador); registros recebidos depois do close() são
+descartados e contados. O log é opcional: o Controller só grava quando recebe
+um AuditLog (ou auditoria=True, que usa default_audit_log()); a GUI liga o log
+padrão.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple, Any, Iterator, Optional
+
+_ESQUEMA_SQL = """
+CREATE TABLE IF NOT EXISTS sessoes (
+    id             INTEGER PRIMARY KEY,
+    instante       REAL NOT NULL,
+    modo           TEXT NOT NULL,
+    versao         TEXT NOT NULL,
+    fatos          TEXT NOT NULL,
+    recomendacoes  TEXT NOT NULL,
+    regras         TEXT NOT NULL,
+    latencia_ms    REAL NOT NULL,
+    vizinho        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessoes_instante ON sessoes (instante);
+CREATE INDEX IF NOT EXISTS idx_sessoes_versao ON sessoes (versao, instante);
+"""
+
+# Modo das análises do questionário adaptativo: os fatos gravados são parciais
+# (só as perguntas feitas), então reexecuções e relatórios por perfil os ignoram
+MODO_PARCIAL = "adaptativo"
+
+# Colunas acrescentadas depois da primeira versão (bancos antigos ganham a coluna ao abrir)
+_COLUNAS_NOVAS = (("vizinho", "TEXT"),)
+
+# Marca de fim colocada na fila pelo close()
+_FIM = object()
+
+
+def default_log_path() -> str:
+    base_dir = os.path.dirname(os.path.dirname(__file__))
+    return os.path.join(base_dir, "DataBase", "sessoes.sqlite")
+
+
+class AuditLog:
+    """
+    Gravador assíncrono de registros de sessão.
+    """
+
+    def __init__(self, caminho: str = None, tamanho_fila: int = 10000,
+                 tamanho_lote: int = 256, intervalo: float = 0.5):
+        """
+        Args:
+            caminho: Arquivo do banco (padrão: DataBase/sessoes.sqlite)
+            tamanho_fila: Máximo de registros aguardando gravação
+            tamanho_lote: Máximo de registros gravados por transação
+            intervalo: Período (s) entre as gravações da thread de escrita
+        """
+        self.caminho = caminho or default_log_path()
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self._fila: "queue.Queue" = queue.Queue(maxsize=tamanho_fila)
+        self.gravados = 0
+        self.descartados = 0
+        self.erros = 0
+        self._fechado = False
+        # Protege _fechado e descartados: nenhum registro entra na fila depois da marca de fim
+        self._trava = threading.Lock()
+        self._acordar = threading.Event()
+
+        # Cria o esquema antes de aceitar registros: erros de caminho aparecem aqui
+        conexao = self._conectar()
+        conexao.close()
+
+        self._thread = threading.Thread(target=self._escrever, name="audit-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _conectar(self) -> sqlite3.Connection:
+        conexao = sqlite3.connect(self.caminho)
+        conexao.execute("PRAGMA journal_mode = WAL")
+        conexao.execute("PRAGMA synchronous = NORMAL")
+        conexao.executescript(_ESQUEMA_SQL)
+        colunas = {linha[1] for linha in conexao.execute("PRAGMA table_info(sessoes)")}
+        for coluna, tipo in _COLUNAS_NOVAS:
+            if coluna not in colunas:
+                conexao.execute(f"ALTER TABLE sessoes ADD COLUMN {coluna} {tipo}")
+        return conexao
+
+    def record(self, modo: str, versao: str, fatos: Dict[str, str], recomendacoes: List[str],
+               regras: List[str], latencia_ms: float, vizinho: Dict[str, str] = None):
+        """
+        Enfileira um registro de sessão.
+
+        Nunca bloqueia: com a fila cheia (ou o log já fechado) o registro é
+        descartado e contado.
+
+        Args:
+            recomendacoes: Resultado da inferência (vazio se nenhuma regra disparou)
+            vizinho: Perfil coberto mais próximo, quando as recomendações
+                     mostradas vieram dele em vez das regras.
+        """
+        registro = (time.time(), modo, versao, fatos, tuple(recomendacoes),
+                    tuple(regras), latencia_ms, vizinho)
+        with self._trava:
+            if self._fechado:
+                self.descartados += 1
+                return
+            try:
+                self._fila.put_nowait(registro)
+            except queue.Full:
+                self.descartados += 1
+
+    def _escrever(self):
+        # A thread acorda a cada intervalo (ou no close) e grava tudo o que
+        # acumulou; acordar a cada registro disputaria o GIL com a requisição
+        conexao = self._conectar()
+        fim = False
+        while not fim:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            while True:
+                lote = []
+                while len(lote) < self.tamanho_lote:
+                    try:
+                        lote.append(self._fila.get_nowait())
+                    except queue.Empty:
+                        break
+                if not lote:
+                    break
+                registros = [r for r in lote if r is not _FIM]
+                fim = fim or len(registros) < len(lote)
+                if registros:
+                    self._gravar(conexao, registros)
+                for _ in lote:
+                    self._fila.task_done()
+        conexao.close()
+
+    def _gravar(self, conexao: sqlite3.Connection, lote: List[tuple]):
+        linhas = [(instante, modo, versao, json.dumps(dict(fatos), ensure_ascii=False),
+                   json.dumps(recs, ensure_ascii=False), json.dumps(regras, ensure_ascii=False),
+                   latencia, None if vizinho is None else json.dumps(dict(vizinho), ensure_ascii=False))
+                  for instante, modo, versao, fatos, recs, regras, latencia, vizinho in lote]
+        try:
+            with conexao:
+                conexao.executemany(
+                    "INSERT INTO sessoes (instante, modo, versao, fatos, recomendacoes, regras, latencia_ms,"
+                    " vizinho) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", linhas)
+            self.gravados += len(linhas)
+        except sqlite3.Error as e:
+            self.erros += len(linhas)
+            print(f"[AVISO] Erro ao gravar {len(linhas)} registros de auditoria: {e}", file=sys.stderr)
+
+    def flush(self):
+        """Espera até que todos os registros enfileirados estejam gravados."""
+        self._acordar.set()
+        self._fila.join()
+
+    def close(self):
+        """Grava os registros pendentes e encerra a thread de escrita."""
+        with self._trava:
+            if self._fechado:
+                return
+            self._fechado = True
+            self._fila.put(_FIM)
+        self._acordar.set()
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def stats(self) -> Dict[str, int]:
+        return {"gravados": self.gravados, "pendentes": self._fila.qsize(),
+                "descartados": self.descartados, "erros": self.erros}
+
+
+def iter_records(caminho: str = None, versao: str = None, desde: float = None,
+                 ate: float = None, id_inicio: int = None,
+                 id_fim: int = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lê os registros gravados, em ordem de gravação, direto do cursor.
+
+    Args:
+        caminho: Arquivo do banco (padrão: DataBase/sessoes.sqlite)
+        versao: Só registros desta versão da base
+        desde, ate: Intervalo de instantes (segundos desde a época)
+        id_inicio, id_fim: Intervalo de ids [id_inicio, id_fim) (partições)
+    """
+    filtros, parametros = [], []
+    for condicao, valor in (("versao = ?", versao), ("instante >= ?", desde), ("instante < ?", ate),
+                            ("id >= ?", id_inicio), ("id < ?", id_fim)):
+        if valor is not None:
+            filtros.append(condicao)
+            parametros.append(valor)
+    onde = f" WHERE {' AND '.join(filtros)}" if filtros else ""
+
+    conexao = sqlite3.connect(caminho or default_log_path())
+    try:
+        colunas = {linha[1] for linha in conexao.execute("PRAGMA table_info(sessoes)")}
+        vizinho = "vizinho" if "vizinho" in colunas else "NULL"
+        for id_, instante, modo, versao_, fatos, recs, regras, latencia, perfil_vizinho in conexao.execute(
+                f"SELECT id, instante, modo, versao, fatos, recomendacoes, regras, latencia_ms, {vizinho}"
+                f" FROM sessoes{onde} ORDER BY id", parametros):
+            yield {"id": id_, "instante": instante, "modo": modo, "versao": versao_,
+                   "fatos": json.loads(fatos), "recomendacoes": json.loads(recs),
+                   "regras": json.loads(regras), "latencia_ms": latencia,
+                   "vizinho": None if perfil_vizinho is None else json.loads(perfil_vizinho)}
+    finally:
+        conexao.close()
+
+
+def id_range(caminho: str = None) -> Tuple[int, int]:
+    """Menor id e (maior id + 1) gravados; (0, 0) se o log estiver vazio."""
+    conexao = sqlite3.connect(caminho or default_log_path())
+    try:
+        menor, maior = conexao.execute("SELECT MIN(id), MAX(id) FROM sessoes").fetchone()
+    finally:
+        conexao.close()
+    return (0, 0) if menor is None else (menor, maior + 1)
+
+
+# Log compartilhado do processo, criado no primeiro uso
+_LOG_PADRAO: Optional[AuditLog] = None
+
+
+def default_audit_log() -> AuditLog:
+    """Log de auditoria padrão do processo (DataBase/sessoes.sqlite)."""
+    global _LOG_PADRAO
+    if _LOG_PADRAO is None:
+        _LOG_PADRAO = AuditLog()
+    return _LOG_PADRAO
@@ -0,0 +1,474 @@
+# Core/bdd.py
+"""
+Diagramas de decisão binária (ROBDD) da base de regras.
+
+Cada valor de cada atributo é uma variável booleana (a mesma codificação
+one-hot de FactSchema.bits, na mesma ordem), e a restrição "exatamente um
+valor por atributo" (o domínio) entra em todos os diagramas. Assim cada
+caminho até VERDADE é um perfil, e as perguntas sobre a base são respondidas
+com operações sobre os diagramas, em tempo proporcional ao tamanho deles e
+não ao número de perfis:
+- cobertura: perfis sem nenhuma recomendação (quantos e quais);
+- sobreposição: duas regras disparam juntas para algum perfil?
+- subsunção/implicação: toda vez que A dispara, B dispara?
+- contagem de modelos: para quantos perfis uma regra dispara ou um pet é recomendado.
+
+Há um diagrama por regra e um por pet. Os diagramas também servem de
+avaliador: inferir() percorre no máximo uma variável por bit do perfil.
+
+O tamanho dos diagramas depende da estrutura das regras, não do número de
+perfis: bases em que cada regra restringe poucos atributos relacionados
+ficam pequenas mesmo com dezenas de atributos; uniões de muitas regras
+aleatórias sobre atributos independentes são o pior caso.
+
+Uso: python -m Core.bdd [rules.json] | --escala atributos regras
+"""
+
+import sys
+import time
+from typing import Dict, List, Tuple, Any, Iterable, Iterator, Optional
+
+from .inference_engine import InferenceEngine
+from .knowledge_base import REGRAS, PRIORIDADE_ANIMAIS
+from .knowledge_loader import Termo, load_rules_json, normalize_conditions, compile_condition
+from .fact_schema import FactSchema, ESQUEMA
+
+# Operações binárias de BDD.apply
+_COMUTATIVAS = {"e", "ou", "xou"}
+
+
+class BDD:
+    """
+    Gerenciador de ROBDDs sobre as variáveis 0..n-1 (nessa ordem). Nós são
+    inteiros: 0 é FALSO, 1 é VERDADE; nós iguais são sempre o mesmo inteiro,
+    então equivalência de funções é comparação de ids.
+    """
+
+    FALSO = 0
+    VERDADE = 1
+
+    def __init__(self, n_variaveis: int):
+        self.n = n_variaveis
+        # Terminais ficam "depois" da última variável
+        self._var = [n_variaveis, n_variaveis]
+        self._baixo = [0, 1]
+        self._alto = [0, 1]
+        self._unicos: Dict[Tuple[int, int, int], int] = {}
+        self._cache: Dict[Tuple[str, int, int], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._var)
+
+    def node(self, var: int, baixo: int, alto: int) -> int:
+        """Nó reduzido (var ? alto : baixo)."""
+        if baixo == alto:
+            return baixo
+        chave = (var, baixo, alto)
+        u = self._unicos.get(chave)
+        if u is None:
+            u = self._unicos[chave] = len(self._var)
+            self._var.append(var)
+            self._baixo.append(baixo)
+            self._alto.append(alto)
+        return u
+
+    def variable(self, i: int) -> int:
+        return self.node(i, self.FALSO, self.VERDADE)
+
+    @staticmethod
+    def _terminal(op: str, u: int, v: int) -> Optional[int]:
+        if op == "e":
+            if u == 0 or v == 0:
+                return 0
+            if u == 1 or u == v:
+                return v
+            if v == 1:
+                return u
+        elif op == "ou":
+            if u == 1 or v == 1:
+                return 1
+            if u == 0 or u == v:
+                return v
+            if v == 0:
+                return u
+        elif op == "e_nao":
+            if u == 0 or v == 1 or u == v:
+                return 0
+            if v == 0:
+                return u
+        elif op == "xou":
+            if u == v:
+                return 0
+            if u == 0:
+                return v
+            if v == 0:
+                return u
+        return None
+
+    def apply(self, op: str, u: int, v: int) -> int:
+        """
+        Combina dois diagramas: "e", "ou", "xou" ou "e_nao" (u e não v).
+        Iterativo (pilha explícita): a profundidade não depende do número de variáveis.
+        """
+        terminal, cache, node = self._terminal, self._cache, self.node
+        var, baixo, alto = self._var, self._baixo, self._alto
+        comutativa = op in _COMUTATIVAS
+        resultados: List[int] = []
+        # (u, v, variável do topo) ainda por resolver; variável -1: expandir os filhos
+        pilha = [(u, v, -1)]
+        while pilha:
+            u, v, m = pilha.pop()
+            if m >= 0:
+                # Filhos já resolvidos: alto no topo, baixo logo abaixo
+                w1 = resultados.pop()
+                w0 = resultados.pop()
+                w = cache[(op, u, v)] = node(m, w0, w1)
+                resultados.append(w)
+                continue
+            r = terminal(op, u, v)
+            if r is None:
+                if comutativa and u > v:
+                    u, v = v, u
+                r = cache.get((op, u, v))
+            if r is not None:
+                resultados.append(r)
+                continue
+            vu, vv = var[u], var[v]
+            m = vu if vu < vv else vv
+            u0, u1 = (baixo[u], alto[u]) if vu == m else (u, u)
+            v0, v1 = (baixo[v], alto[v]) if vv == m else (v, v)
+            pilha.append((u, v, m))
+            pilha.append((u1, v1, -1))
+            pilha.append((u0, v0, -1))
+        return resultados[0]
+
+    def conj(self, nos: Iterable[int]) -> int:
+        r = self.VERDADE
+        for u in nos:
+            r = self.apply("e", r, u)
+        return r
+
+    def disj(self, nos: Iterable[int]) -> int:
+        r = self.FALSO
+        for u in nos:
+            r = self.apply("ou", r, u)
+        return r
+
+    def negate(self, u: int) -> int:
+        return self.apply("e_nao", self.VERDADE, u)
+
+    def implies(self, u: int, v: int) -> bool:
+        """Todo modelo de u é modelo de v."""
+        return self.apply("e_nao", u, v) == self.FALSO
+
+    def count(self, u: int) -> int:
+        """Número de atribuições das n variáveis que satisfazem u."""
+        if u <= 1:
+            return u << self.n
+        memo = {0: 0, 1: 1}
+        var, baixo, alto = self._var, self._baixo, self._alto
+        # Pós-ordem com pilha explícita: um nó é contado depois dos dois filhos
+        pilha = [u]
+        while pilha:
+            w = pilha[-1]
+            if w in memo:
+                pilha.pop()
+                continue
+            lo, hi = baixo[w], alto[w]
+            if lo not in memo:
+                pilha.append(lo)
+            elif hi not in memo:
+                pilha.append(hi)
+            else:
+                pilha.pop()
+                memo[w] = ((memo[lo] << (var[lo] - var[w] - 1))
+                           + (memo[hi] << (var[hi] - var[w] - 1)))
+        return memo[u] << var[u]
+
+    def evaluate(self, u: int, bits: int) -> bool:
+        """Valor de u para a atribuição em que a variável i vale bits >> i & 1."""
+        var, baixo, alto = self._var, self._baixo, self._alto
+        while u > 1:
+            u = alto[u] if bits >> var[u] & 1 else baixo[u]
+        return u == 1
+
+    def paths(self, u: int) -> Iterator[Dict[int, int]]:
+        """Caminhos até VERDADE, como {variável: 0/1} (variáveis omitidas são livres)."""
+        if u == 0:
+            return
+        pilha = [(u, {})]
+        while pilha:
+            w, caminho = pilha.pop()
+            if w == 1:
+                yield caminho
+                continue
+            v = self._var[w]
+            for valor, filho in ((1, self._alto[w]), (0, self._baixo[w])):
+                if filho:
+                    pilha.append((filho, {**caminho, v: valor}))
+
+    def size(self, u: int) -> int:
+        """Nós alcançáveis a partir de u (terminais incluídos)."""
+        vistos, pilha = set(), [u]
+        while pilha:
+            w = pilha.pop()
+            if w in vistos:
+                continue
+            vistos.add(w)
+            if w > 1:
+                pilha.append(self._baixo[w])
+                pilha.append(self._alto[w])
+        return len(vistos)
+
+
+class RuleBDDs:
+    """
+    Uma base de regras compilada em diagramas: um por regra (regras[nome])
+    e um por pet (pets[pet]), todos já restritos ao domínio.
+    """
+
+    def __init__(self, regras_cubos: Iterable[Tuple[str, List[Tuple[int, ...]], List[str]]],
+                 esquema: FactSchema = ESQUEMA, prioridade=PRIORIDADE_ANIMAIS,
+                 referencia: InferenceEngine = None):
+        """
+        Args:
+            regras_cubos: (nome, cubos, consequências), com cubos no formato de
+                          RuleBaseOptimizer.rule_cubes (máscara de valores por atributo)
+            referencia: Motor usado para fatos fora do domínio em inferir()
+        """
+        self.esquema = esquema
+        self.prioridade = list(prioridade)
+        self._posicao = {pet: i for i, pet in enumerate(prioridade)}
+        self.referencia = referencia
+        self.bdd = bdd = BDD(esquema.total_bits)
+
+        # Domínio: exatamente um valor por atributo
+        segmentos = []
+        for desloc, tam in zip(esquema.deslocamentos, esquema.tamanhos):
+            variaveis = [bdd.variable(desloc + i) for i in range(tam)]
+            exatamente_um = bdd.FALSO
+            for i, x in enumerate(variaveis):
+                outros = bdd.disj(variaveis[:i] + variaveis[i + 1:])
+                exatamente_um = bdd.apply("ou", exatamente_um, bdd.apply("e_nao", x, outros))
+            segmentos.append(exatamente_um)
+        self.dominio = bdd.conj(reversed(segmentos))
+
+        self.nomes: List[str] = []
+        self.consequencias: Dict[str, List[str]] = {}
+        self.regras: Dict[str, int] = {}
+        for nome, cubos, consequencias in regras_cubos:
+            condicao = bdd.disj(self._cubo(c) for c in cubos)
+            self.nomes.append(nome)
+            self.consequencias[nome] = list(consequencias)
+            self.regras[nome] = bdd.apply("e", condicao, self.dominio)
+
+        self.pets: Dict[str, int] = {}
+        for nome in self.nomes:
+            for pet in self.consequencias[nome]:
+                self.pets[pet] = bdd.apply("ou", self.pets.get(pet, bdd.FALSO), self.regras[nome])
+        self.cobertos = bdd.disj(self.regras.values())
+
+    def _cubo(self, cubo: Tuple[int, ...]) -> int:
+        bdd = self.bdd
+        r = bdd.VERDADE
+        # De baixo para cima: cada conjunção só acrescenta nós acima dos existentes
+        for mascara, desloc, tam in reversed(list(zip(cubo, self.esquema.deslocamentos, self.esquema.tamanhos))):
+            if mascara == (1 << tam) - 1:
+                continue
+            valores = bdd.disj(bdd.variable(desloc + i) for i in range(tam) if mascara >> i & 1)
+            r = bdd.apply("e", valores, r)
+        return r
+
+    # --- Construção ----------------------------------------------------
+
+    @classmethod
+    def from_terms(cls, regras: Iterable[Tuple[str, Tuple[Termo, ...], List[str]]],
+                   esquema: FactSchema = ESQUEMA, prioridade=PRIORIDADE_ANIMAIS) -> "RuleBDDs":
+        """A partir de termos canônicos (ver knowledge_loader), sem enumerar o domínio."""
+        regras = list(regras)
+        cubos = []
+        for nome, termos, consequencias in regras:
+            cubo = [(1 << tam) - 1 for tam in esquema.tamanhos]
+            possivel = True
+            for atributo, valores in termos:
+                if atributo not in esquema.codigos_estritos:
+                    possivel = False  # o perfil nunca tem esse atributo
+                    break
+                codigos = esquema.codigos_estritos[atributo]
+                i = esquema.atributos.index(atributo)
+                cubo[i] &= sum(1 << codigos[v] for v in valores if v in codigos)
+                possivel = possivel and cubo[i] != 0
+            cubos.append((nome, [tuple(cubo)] if possivel else [], consequencias))
+        referencia = InferenceEngine([(nome, compile_condition(termos), list(cons))
+                                      for nome, termos, cons in regras], prioridade)
+        return cls(cubos, esquema, prioridade, referencia)
+
+    @classmethod
+    def from_json(cls, dados: Dict[str, Any], esquema: FactSchema = ESQUEMA) -> "RuleBDDs":
+        """A partir do conteúdo de um rules.json (só termos categóricos)."""
+        return cls.from_terms(
+            ((r["name"], normalize_conditions(r.get("conditions", {})), r.get("consequences", []))
+             for r in dados.get("rules", [])),
+            esquema, dados.get("priority", PRIORIDADE_ANIMAIS))
+
+    @classmethod
+    def from_rules(cls, regras=REGRAS, esquema: FactSchema = ESQUEMA,
+                   prioridade=PRIORIDADE_ANIMAIS) -> "RuleBDDs":
+        """
+        A partir de regras em lambda. As lambdas são opacas, então os cubos
+        vêm de RuleBaseOptimizer (que enumera o domínio uma vez).
+        """
+        from .rule_optimizer import RuleBaseOptimizer
+        return cls(RuleBaseOptimizer(regras, esquema).rule_cubes(), esquema, prioridade,
+                   InferenceEngine(regras, prioridade))
+
+    # --- Consultas -----------------------------------------------------
+
+    def count(self, u: int) -> int:
+        """Perfis do domínio que satisfazem o diagrama."""
+        # Com o domínio embutido, cada perfil é uma única atribuição válida
+        return self.bdd.count(u)
+
+    def profiles(self, u: int, limite: int = None) -> Iterator[Dict[str, str]]:
+        """Perfis (fatos) que satisfazem um diagrama já restrito ao domínio."""
+        esquema = self.esquema
+        for n, caminho in enumerate(self.bdd.paths(u)):
+            if limite is not None and n >= limite:
+                return
+            perfil = {}
+            for atributo, desloc, tam in zip(esquema.atributos, esquema.deslocamentos, esquema.tamanhos):
+                codigo = next(i for i in range(tam) if caminho.get(desloc + i))
+                perfil[atributo] = esquema.valores[atributo][codigo]
+            yield perfil
+
+    def uncovered(self) -> int:
+        """Diagrama dos perfis sem nenhuma recomendação."""
+        return self.bdd.apply("e_nao", self.dominio, self.cobertos)
+
+    def uncovered_count(self) -> int:
+        return self.count(self.uncovered())
+
+    def uncovered_profiles(self, limite: int = None) -> Iterator[Dict[str, str]]:
+        return self.profiles(self.uncovered(), limite)
+
+    def rule_count(self, nome: str) -> int:
+        """Para quantos perfis a regra dispara."""
+        return self.count(self.regras[nome])
+
+    def pet_count(self, pet: str) -> int:
+        """Para quantos perfis o pet é recomendado."""
+        return self.count(self.pets.get(pet, BDD.FALSO))
+
+    def overlaps(self, a: str, b: str) -> bool:
+        """As regras a e b disparam juntas para algum perfil?"""
+        return self.bdd.apply("e", self.regras[a], self.regras[b]) != BDD.FALSO
+
+    def overlap_count(self, a: str, b: str) -> int:
+        return self.count(self.bdd.apply("e", self.regras[a], self.regras[b]))
+
+    def implies(self, a: str, b: str) -> bool:
+        """Toda vez que a dispara, b também dispara?"""
+        return self.bdd.implies(self.regras[a], self.regras[b])
+
+    def equivalent(self, a: str, b: str) -> bool:
+        return self.regras[a] == self.regras[b]
+
+    def dead_rules(self) -> List[str]:
+        """Regras que não disparam para nenhum perfil (como RuleBaseOptimizer.dead_rules)."""
+        return [nome for nome in self.nomes if self.regras[nome] == BDD.FALSO]
+
+    def implications(self) -> List[Tuple[str, str]]:
+        """Pares (A, B) em que o disparo de A implica o de B (A viva)."""
+        return [(a, b) for a in self.nomes if self.regras[a] != BDD.FALSO
+                for b in self.nomes if a != b and self.implies(a, b)]
+
+    def subsumed_rules(self) -> List[Tuple[str, str]]:
+        """Pares (A, B) com A implicando B e as consequências de A contidas nas de B."""
+        return [(a, b) for a, b in self.implications()
+                if set(self.consequencias[a]) <= set(self.consequencias[b])]
+
+    def report(self) -> Dict[str, Any]:
+        total = self.count(self.dominio)
+        return {
+            "total_regras": len(self.nomes),
+            "total_perfis": total,
+            "perfis_sem_recomendacao": self.uncovered_count(),
+            "regras_mortas": self.dead_rules(),
+            "regras_subsumidas": self.subsumed_rules(),
+            "perfis_por_pet": {pet: self.pet_count(pet) for pet in self.prioridade if pet in self.pets},
+            "nos": len(self.bdd),
+        }
+
+    # --- Avaliação -----------------------------------------------------
+
+    def inferir(self, fatos: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """
+        Mesma interface de InferenceEngine.inferir, percorrendo os diagramas
+        das regras. Fatos fora do domínio vão para o motor de referência.
+        """
+        perfil, _ = self.esquema.try_encode(fatos, estrito=True)
+        if perfil is None:
+            if self.referencia is None:
+                raise ValueError("Fatos fora do domínio e nenhum motor de referência")
+            return self.referencia.inferir(fatos)
+
+        bits, avaliar = perfil.bits, self.bdd.evaluate
+        disparadas = [nome for nome in self.nomes if avaliar(self.regras[nome], bits)]
+        recomendacoes = {pet for nome in disparadas for pet in self.consequencias[nome]}
+        posicao = self._posicao
+        return sorted(recomendacoes, key=lambda x: posicao.get(x, 999)), disparadas
+
+    def stats(self) -> Dict[str, int]:
+        return {"nos": len(self.bdd),
+                "nos_regras": sum(self.bdd.size(u) for u in self.regras.values()),
+                "nos_pets": sum(self.bdd.size(u) for u in self.pets.values()),
+                "nos_cobertura": self.bdd.size(self.cobertos)}
+
+
+def synthetic_schema(atributos: int, valores: int = 3) -> FactSchema:
+    """Domínio gerado com muitos atributos (para medir a escala)."""
+    return FactSchema({f"a{i}": [f"v{j}" for j in range(valores)] for i in range(atributos)}, {})
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--escala":
+        from .rule_store import synthetic_rules
+        atributos = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+        n = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+        esquema = synthetic_schema(atributos)
+        inicio = time.perf_counter()
+        diagramas = RuleBDDs.from_terms(synthetic_rules(n, esquema), esquema)
+        compilar = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        sem_recomendacao = diagramas.uncovered_count()
+        consultar = time.perf_counter() - inicio
+        print(f"{atributos} atributos ({esquema.total_perfis:.3e} perfis), {n} regras")
+        print(f"  compilação: {compilar:.2f} s  |  {diagramas.stats()}")
+        print(f"  perfis sem recomendação: {sem_recomendacao} ({consultar * 1000:.1f} ms)")
+        sys.exit(0)
+
+    fora_do_dominio = []
+    if len(sys.argv) > 1:
+        dados = load_rules_json(sys.argv[1])
+        diagramas = RuleBDDs.from_json(dados)
+        for regra in dados.get("rules", []):
+            for atributo, valores in ESQUEMA.unmatched_terms(normalize_conditions(regra.get("conditions", {}))):
+                fora_do_dominio.append(f"{regra['name']}: {atributo} = {', '.join(map(str, valores))}")
+    else:
+        diagramas = RuleBDDs.from_rules()
+    relatorio = diagramas.report()
+    print(f"Regras: {relatorio['total_regras']}  |  perfis: {relatorio['total_perfis']}"
+          f"  |  sem recomendação: {relatorio['perfis_sem_recomendacao']}  |  nós: {relatorio['nos']}")
+    print(f"Regras mortas: {relatorio['regras_mortas'] or '-'}")
+    if fora_do_dominio:
+        print("Valores fora do domínio (nunca casam):")
+        for linha in fora_do_dominio:
+            print(f"  {linha}")
+    for a, b in relatorio["regras_subsumidas"]:
+        print(f"  {a} é subsumida por {b}")
+    print("\nPerfis por pet:")
+    for pet, n in relatorio["perfis_por_pet"].items():
+        print(f"  {pet:<30} {n:>8}")
+    print("\nExemplos de perfis sem recomendação:")
+    for perfil in diagramas.uncovered_profiles(5):
+        print(f"  {perfil}")
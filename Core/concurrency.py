@@ -0,0 +1,207 @@
+# Core/concurrency.py
+"""
+Apoio a sessões concorrentes num único processo (inclusive no CPython sem
+GIL, 3.13t/3.14t).
+
+- ShardedCounter: contador em que cada thread incrementa a sua própria
+  célula; a soma só é feita na leitura, então threads não disputam a mesma
+  posição de memória a cada incremento. A célula de uma thread que terminou
+  é somada a um total base e descartada, então a memória não cresce com a
+  rotatividade de threads (pools, sessões de teste de carga).
+- scaling_benchmark: vazão de um motor compartilhado com 1, 2, 4, ... threads.
+- compare_builds: roda o benchmark em outros interpretadores (ex.: python3.14
+  e python3.14t) ou no mesmo interpretador sem GIL com -X gil=1 e -X gil=0,
+  e mostra os resultados lado a lado.
+
+Uso: python -m Core.concurrency [--threads 1,2,4,8] [--consultas N] [interpretador ...]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import sysconfig
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Dict, List, Any, Callable, Iterable
+
+
+class _Sentinela:
+    """Objeto guardado no threading.local: é coletado quando a thread termina."""
+
+    __slots__ = ("__weakref__",)
+
+
+class ShardedCounter:
+    """
+    Contador sem disputa entre threads: uma célula por thread, somadas em value().
+    """
+
+    __slots__ = ("_local", "_celulas", "_mortas", "_base", "_trava")
+
+    def __init__(self):
+        self._local = threading.local()
+        self._celulas: Dict[int, List[int]] = {}
+        # Células de threads encerradas, a somar em _base (deque.append é atômico
+        # e pode rodar num finalizador, até com a trava já tomada)
+        self._mortas: deque = deque()
+        self._base = 0
+        self._trava = threading.Lock()
+
+    def add(self, n: int = 1):
+        try:
+            self._local.celula[0] += n
+        except AttributeError:
+            # Primeiro incremento desta thread: cria e registra a célula
+            celula = self._local.celula = [n]
+            sentinela = self._local.sentinela = _Sentinela()
+            weakref.finalize(sentinela, self._mortas.append, celula)
+            with self._trava:
+                self._recolher()
+                self._celulas[id(celula)] = celula
+
+    def _recolher(self):
+        # Chamado com a trava: soma as células das threads encerradas ao total base
+        while self._mortas:
+            celula = self._mortas.popleft()
+            self._base += celula[0]
+            self._celulas.pop(id(celula), None)
+
+    def value(self) -> int:
+        with self._trava:
+            self._recolher()
+            celulas = list(self._celulas.values())
+            base = self._base
+        return base + sum(c[0] for c in celulas)
+
+    def __len__(self) -> int:
+        """Células ainda registradas (threads vivas, ou encerradas e não recolhidas)."""
+        with self._trava:
+            self._recolher()
+            return len(self._celulas)
+
+    def __int__(self) -> int:
+        return self.value()
+
+    def __repr__(self) -> str:
+        return f"ShardedCounter({self.value()})"
+
+
+def build_info() -> Dict[str, Any]:
+    """Versão do interpretador, se é a build sem GIL e se o GIL está ativo."""
+    gil_ativo = getattr(sys, "_is_gil_enabled", lambda: True)()
+    return {"versao": sys.version.split()[0], "sem_gil_build": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+            "gil_ativo": gil_ativo, "cpus": os.cpu_count()}
+
+
+def scaling_benchmark(inferir: Callable = None, perfis: List[Dict[str, str]] = None,
+                      threads: Iterable[int] = (1, 2, 4, 8), consultas_por_thread: int = 5000,
+                      ) -> List[Dict[str, Any]]:
+    """
+    Mede a vazão de um motor compartilhado por várias threads.
+
+    Args:
+        inferir: Função inferir de um motor (padrão: InferenceEngine sobre REGRAS)
+        perfis: Fatos consultados, em ciclo (padrão: o domínio inteiro)
+        threads: Quantidades de threads a medir
+        consultas_por_thread: Consultas feitas por cada thread
+
+    Returns:
+        Por quantidade de threads: segundos, consultas/s e aceleração em
+        relação à primeira medição
+    """
+    if inferir is None:
+        from .inference_engine import InferenceEngine
+        inferir = InferenceEngine().inferir
+    if perfis is None:
+        from .fact_schema import ESQUEMA
+        perfis = [dict(p) for p in ESQUEMA.all_profiles()]
+
+    def trabalhar(largada: threading.Barrier, deslocamento: int):
+        n = len(perfis)
+        largada.wait()
+        for i in range(consultas_por_thread):
+            inferir(perfis[(deslocamento + i) % n])
+
+    # Aquece caches e a especialização do interpretador antes de medir
+    for perfil in perfis:
+        inferir(perfil)
+
+    resultados = []
+    for n in threads:
+        largada = threading.Barrier(n + 1)
+        trabalhadores = [threading.Thread(target=trabalhar, args=(largada, i * 7)) for i in range(n)]
+        for t in trabalhadores:
+            t.start()
+        largada.wait()
+        inicio = time.perf_counter()
+        for t in trabalhadores:
+            t.join()
+        segundos = time.perf_counter() - inicio
+        vazao = n * consultas_por_thread / segundos
+        resultados.append({"threads": n, "segundos": segundos, "consultas_s": vazao,
+                           "aceleracao": vazao / resultados[0]["consultas_s"] if resultados else 1.0})
+    return resultados
+
+
+def compare_builds(interpretadores: List[List[str]], threads: Iterable[int] = (1, 2, 4, 8),
+                   consultas_por_thread: int = 5000) -> List[Dict[str, Any]]:
+    """
+    Roda scaling_benchmark em cada interpretador (lista de argumentos, ex.:
+    ["python3.14t", "-X", "gil=0"]) num processo separado.
+
+    Returns:
+        Por interpretador: "comando", "build" (build_info) e "resultados"
+    """
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    saidas = []
+    for comando in interpretadores:
+        processo = subprocess.run(
+            comando + ["-m", "Core.concurrency", "--json", "--threads", ",".join(map(str, threads)),
+                       "--consultas", str(consultas_por_thread)],
+            cwd=raiz, capture_output=True, text=True, check=True)
+        dados = json.loads(processo.stdout)
+        saidas.append({"comando": " ".join(comando), **dados})
+    return saidas
+
+
+def default_builds() -> List[List[str]]:
+    """
+    Interpretadores comparados por padrão: na build sem GIL, o próprio
+    interpretador com e sem GIL; na build com GIL, só ele.
+    """
+    if build_info()["sem_gil_build"]:
+        return [[sys.executable, "-X", "gil=1"], [sys.executable, "-X", "gil=0"]]
+    return [[sys.executable]]
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    threads, consultas, como_json = [1, 2, 4, 8], 5000, False
+    interpretadores = []
+    while argumentos:
+        arg = argumentos.pop(0)
+        if arg == "--threads":
+            threads = [int(t) for t in argumentos.pop(0).split(",")]
+        elif arg == "--consultas":
+            consultas = int(argumentos.pop(0))
+        elif arg == "--json":
+            como_json = True
+        else:
+            interpretadores.append(arg.split())
+
+    if como_json:
+        print(json.dumps({"build": build_info(), "resultados": scaling_benchmark(
+            threads=threads, consultas_por_thread=consultas)}))
+        sys.exit(0)
+
+    for saida in compare_builds(interpretadores or default_builds(), threads, consultas):
+        build = saida["build"]
+        print(f"\n{saida['comando']}  |  Python {build['versao']}  |  build sem GIL: "
+              f"{'sim' if build['sem_gil_build'] else 'não'}  |  GIL ativo: "
+              f"{'sim' if build['gil_ativo'] else 'não'}  |  CPUs: {build['cpus']}")
+        for r in saida["resultados"]:
+            print(f"  {r['threads']:>3} threads  {r['consultas_s']:>12,.0f} consultas/s  "
+                  f"aceleração {r['aceleracao']:.2f}x")
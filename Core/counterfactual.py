@@ -0,0 +1,301 @@
+# Core/counterfactual.py
+"""
+Contrafactuais: o que mudar nas respostas para receber um pet.
+
+Dado o perfil atual e um pet-alvo, devolve os menores conjuntos de mudanças
+de atributos que fazem o motor recomendar o pet, do mais barato para o mais
+caro (custo por atributo, padrão 1).
+
+A busca é best-first sobre o perfil codificado (bits one-hot de
+FactSchema). Pelo índice de consequências só entram na fronteira os cubos
+das regras que produzem o pet. Para cada cubo, o custo exato de levar o
+perfil para dentro dele sai de duas operações sobre inteiros: as respostas
+fora do cubo são os bits do perfil fora da máscara do cubo, e as respostas
+que faltam são os atributos restringidos pelo cubo sem resposta. A fronteira
+é um heap por custo; cada cubo retirado vira uma alternativa (as mudanças
+são os atributos que o impedem, com os valores que ele aceita), a não ser
+que uma alternativa já aceita use um subconjunto das mesmas mudanças.
+Como o custo de cada cubo é exato, nenhum perfil intermediário precisa ser
+visitado e a consulta custa uma passada pelos cubos do pet.
+
+Uso: python -m Core.counterfactual "<pet>" atributo=valor ...
+     python -m Core.counterfactual --escala [atributos] [regras] [consultas]
+"""
+
+import heapq
+import random
+import sys
+import time
+from typing import Dict, List, Tuple, Any, Iterable, Optional
+
+from .knowledge_base import REGRAS, PRIORIDADE_ANIMAIS
+from .knowledge_loader import compile_condition, Termo
+from .fact_schema import FactSchema, ESQUEMA
+from .inference_engine import InferenceEngine
+
+
+class CounterfactualSearch:
+    """
+    Busca das mudanças mínimas de respostas que levam a um pet.
+    """
+
+    def __init__(self, regras_cubos: Iterable[Tuple[str, List[Tuple[int, ...]], List[str]]],
+                 esquema: FactSchema = ESQUEMA, referencia: InferenceEngine = None):
+        """
+        Args:
+            regras_cubos: (nome, cubos, consequências), com cubos no formato de
+                          RuleBaseOptimizer.rule_cubes (máscara de valores por atributo)
+            referencia: Motor que confirma cada resposta (ex.: regras em
+                        quarentena não disparam); None dispensa a confirmação
+        """
+        self.esquema = esquema
+        self.referencia = referencia
+        self._atributo_do_bit = [i for i, tam in enumerate(esquema.tamanhos) for _ in range(tam)]
+
+        # Índice de consequências: pet -> cubos distintos das regras que o
+        # produzem, cada um como (máscaras por atributo, bits one-hot aceitos,
+        # atributos restringidos)
+        self._cubos: Dict[str, List[Tuple[Tuple[int, ...], int, int]]] = {}
+        vistos: Dict[str, set] = {}
+        for _, cubos, consequencias in regras_cubos:
+            for cubo in cubos:
+                cubo = tuple(cubo)
+                uns, restritos = 0, 0
+                for i, (mascara, desloc, tam) in enumerate(zip(cubo, esquema.deslocamentos, esquema.tamanhos)):
+                    uns |= mascara << desloc
+                    if mascara != (1 << tam) - 1:
+                        restritos |= 1 << i
+                for pet in consequencias:
+                    if cubo not in vistos.setdefault(pet, set()):
+                        vistos[pet].add(cubo)
+                        self._cubos.setdefault(pet, []).append((cubo, uns, restritos))
+
+    # --- Construção ----------------------------------------------------
+
+    @classmethod
+    def from_terms(cls, regras: Iterable[Tuple[str, Tuple[Termo, ...], List[str]]],
+                   esquema: FactSchema = ESQUEMA) -> "CounterfactualSearch":
+        """
+        A partir de termos canônicos (ver knowledge_loader), sem enumerar o
+        domínio. Os cubos são exatos, então as respostas não são confirmadas.
+        """
+        cubos = []
+        for nome, termos, consequencias in regras:
+            cubo = [(1 << tam) - 1 for tam in esquema.tamanhos]
+            possivel = True
+            for atributo, valores in termos:
+                if atributo not in esquema.codigos_estritos:
+                    possivel = False
+                    break
+                codigos = esquema.codigos_estritos[atributo]
+                i = esquema.atributos.index(atributo)
+                cubo[i] &= sum(1 << codigos[v] for v in valores if v in codigos)
+                possivel = possivel and cubo[i] != 0
+            cubos.append((nome, [tuple(cubo)] if possivel else [], consequencias))
+        return cls(cubos, esquema)
+
+    @classmethod
+    def from_rules(cls, regras=REGRAS, esquema: FactSchema = ESQUEMA,
+                   referencia: InferenceEngine = None) -> "CounterfactualSearch":
+        """A partir de regras em lambda (cubos de RuleBaseOptimizer)."""
+        from .rule_optimizer import RuleBaseOptimizer
+        return cls(RuleBaseOptimizer(regras, esquema).rule_cubes(), esquema, referencia)
+
+    # --- Busca ---------------------------------------------------------
+
+    def _codificar(self, fatos: Dict[str, Any]) -> Tuple[int, int]:
+        """
+        (bits one-hot das respostas válidas, máscara dos atributos sem
+        resposta válida, um bit por atributo).
+        """
+        esquema = self.esquema
+        bits, faltando = 0, 0
+        for i, atributo in enumerate(esquema.atributos):
+            valor = fatos.get(atributo)
+            codigo = esquema.codigos[atributo].get(valor) if isinstance(valor, str) else None
+            if codigo is None:
+                faltando |= 1 << i
+            else:
+                bits |= 1 << (esquema.deslocamentos[i] + codigo)
+        return bits, faltando
+
+    def search(self, pet: str, fatos: Dict[str, Any], limite: int = 3,
+               custos: Dict[str, float] = None) -> List[Dict[str, Any]]:
+        """
+        Menores conjuntos de mudanças que levam o motor a recomendar o pet.
+
+        Args:
+            pet: Pet desejado
+            fatos: Respostas atuais (podem ser parciais; responder um atributo
+                   que falta conta como mudança)
+            limite: Quantidade máxima de alternativas
+            custos: Custo de mudar cada atributo (padrão 1 para todos)
+
+        Returns:
+            Lista ordenada por custo (e depois por número de mudanças) de
+            {"custo", "mudancas", "fatos"}: mudancas é atributo ->
+            (valor_atual ou None, valores aceitos); fatos é um perfil completo
+            com a mudança aplicada. Nenhum conjunto contém outro já listado.
+            Lista vazia se o pet já é recomendado ou é inalcançável.
+        """
+        cubos = self._cubos.get(pet)
+        if not cubos:
+            return []
+        bits, faltando = self._codificar(fatos)
+
+        # Custo exato de levar o perfil para dentro de cada cubo do pet
+        fronteira = []
+        if custos is None:
+            for ordem, (_, uns, restritos) in enumerate(cubos):
+                falhas = bits & ~uns          # um bit por resposta fora do cubo
+                pendentes = restritos & faltando
+                if not falhas and not pendentes:
+                    if self._recomendado(pet, fatos):
+                        return []             # o pet já é recomendado
+                    continue                  # regra fora da avaliação (quarentena)
+                k = falhas.bit_count() + pendentes.bit_count()
+                fronteira.append((float(k), k, ordem, falhas, pendentes))
+        else:
+            por_atributo = [float(custos.get(a, 1.0)) for a in self.esquema.atributos]
+            for ordem, (_, uns, restritos) in enumerate(cubos):
+                falhas = bits & ~uns
+                pendentes = restritos & faltando
+                if not falhas and not pendentes:
+                    if self._recomendado(pet, fatos):
+                        return []
+                    continue
+                custo = 0.0
+                alterados = self._atributos_dos_bits(falhas) | pendentes
+                while alterados:
+                    menor = alterados & -alterados
+                    custo += por_atributo[menor.bit_length() - 1]
+                    alterados ^= menor
+                fronteira.append((custo, falhas.bit_count() + pendentes.bit_count(), ordem, falhas, pendentes))
+        heapq.heapify(fronteira)
+
+        # Retira da fronteira em ordem de custo, descartando conjuntos não mínimos
+        resultados: List[Dict[str, Any]] = []
+        aceitos: List[Tuple[int, Tuple[int, ...]]] = []
+        while fronteira and len(resultados) < limite:
+            custo, _, ordem, falhas, pendentes = heapq.heappop(fronteira)
+            cubo = cubos[ordem][0]
+            alterados = self._atributos_dos_bits(falhas) | pendentes
+            if not self._minimo(alterados, cubo, aceitos):
+                continue
+            resultado = self._resultado(cubo, alterados, fatos, custo, pet)
+            if resultado is not None:
+                aceitos.append((alterados, cubo))
+                resultados.append(resultado)
+        return resultados
+
+    def _recomendado(self, pet: str, fatos: Dict[str, Any]) -> bool:
+        """O perfil já está num cubo do pet; com referência, confirma que o motor o recomenda."""
+        return self.referencia is None or pet in self.referencia.inferir(fatos)[0]
+
+    def _atributos_dos_bits(self, bits: int) -> int:
+        """Máscara de atributos (um bit por atributo) dos bits one-hot dados."""
+        atributos = 0
+        while bits:
+            menor = bits & -bits
+            atributos |= 1 << self._atributo_do_bit[menor.bit_length() - 1]
+            bits ^= menor
+        return atributos
+
+    @staticmethod
+    def _minimo(alterados: int, cubo: Tuple[int, ...], aceitos: List[Tuple[int, Tuple[int, ...]]]) -> bool:
+        """False se uma alternativa já aceita usa um subconjunto das mesmas mudanças."""
+        for outros, outro_cubo in aceitos:
+            if outros & ~alterados:
+                continue
+            if outros != alterados:
+                return False
+            # Mesmos atributos: só vale se aceitar algum valor ainda não listado
+            if all(cubo[i] & ~outro_cubo[i] == 0 for i in range(len(cubo)) if alterados >> i & 1):
+                return False
+        return True
+
+    def _resultado(self, cubo: Tuple[int, ...], alterados: int, fatos: Dict[str, Any],
+                   custo: float, pet: str) -> Optional[Dict[str, Any]]:
+        esquema = self.esquema
+        mudancas = {}
+        perfil = {}
+        for i, atributo in enumerate(esquema.atributos):
+            valores = esquema.valores[atributo]
+            if alterados >> i & 1:
+                aceitos = [v for j, v in enumerate(valores) if cubo[i] >> j & 1]
+                atual = fatos.get(atributo)
+                valido = isinstance(atual, str) and atual in esquema.codigos[atributo]
+                mudancas[atributo] = (atual if valido else None, aceitos)
+                perfil[atributo] = aceitos[0]
+            else:
+                atual = fatos.get(atributo)
+                codigo = esquema.codigos[atributo].get(atual) if isinstance(atual, str) else None
+                # Sem resposta e sem restrição do cubo: qualquer valor serve
+                perfil[atributo] = valores[codigo if codigo is not None else 0]
+        if self.referencia is not None and pet not in self.referencia.inferir(perfil)[0]:
+            return None
+        return {"custo": custo, "mudancas": mudancas, "fatos": perfil}
+
+    def describe(self, resultado: Dict[str, Any]) -> str:
+        """Texto curto de uma alternativa: "moradia: Apartamento → Casa; ..."."""
+        partes = []
+        for atributo, (atual, valores) in resultado["mudancas"].items():
+            antes = atual if atual is not None else "(sem resposta)"
+            partes.append(f"{atributo}: {antes} → {' ou '.join(valores)}")
+        return "; ".join(partes)
+
+
+def sparse_rules(n: int, esquema: FactSchema, pets=PRIORIDADE_ANIMAIS,
+                 seed: int = 0) -> Iterable[Tuple[str, Tuple[Termo, ...], List[str]]]:
+    """
+    n regras aleatórias que exigem um valor exato de 6 a 12 atributos: cada
+    perfil recebe poucos pets, então quase toda consulta precisa buscar.
+    """
+    rnd = random.Random(seed)
+    for i in range(n):
+        termos = [(a, (rnd.choice(esquema.valores[a]),))
+                  for a in rnd.sample(esquema.atributos, rnd.randint(min(6, len(esquema.atributos)), min(12, len(esquema.atributos))))]
+        yield f"E{i}", tuple(sorted(termos)), rnd.sample(list(pets), rnd.randint(1, 2))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--escala":
+        from .bdd import synthetic_schema
+        atributos = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+        n = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+        consultas = int(sys.argv[4]) if len(sys.argv) > 4 else 200
+        esquema = synthetic_schema(atributos)
+        regras = list(sparse_rules(n, esquema))
+        busca = CounterfactualSearch.from_terms(regras, esquema)
+        referencia = InferenceEngine([(nome, compile_condition(termos), cons) for nome, termos, cons in regras])
+        rnd = random.Random(1)
+        tempos, encontrados, divergencias = [], 0, 0
+        for _ in range(consultas):
+            fatos = {a: rnd.choice(esquema.valores[a]) for a in esquema.atributos}
+            # Só pets que ainda não são recomendados (os outros saem na hora)
+            recomendados = referencia.inferir(fatos)[0]
+            pet = rnd.choice([p for p in PRIORIDADE_ANIMAIS if p not in recomendados] or PRIORIDADE_ANIMAIS)
+            inicio = time.perf_counter()
+            resultados = busca.search(pet, fatos)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            encontrados += bool(resultados)
+            divergencias += sum(pet not in referencia.inferir(r["fatos"])[0] for r in resultados)
+        tempos.sort()
+        print(f"{atributos} atributos, {n} regras, {consultas} consultas ({encontrados} com alternativas)")
+        print(f"  mediana {tempos[len(tempos) // 2]:.2f} ms  |  p99 {tempos[int(len(tempos) * 0.99)]:.2f} ms"
+              f"  |  máximo {tempos[-1]:.2f} ms")
+        print(f"  alternativas que o motor não confirma: {divergencias}")
+        sys.exit(1 if divergencias else 0)
+
+    if len(sys.argv) < 2:
+        print('Uso: python -m Core.counterfactual "<pet>" [atributo=valor ...]')
+        sys.exit(1)
+
+    pet = sys.argv[1]
+    fatos = dict(arg.split("=", 1) for arg in sys.argv[2:])
+    busca = CounterfactualSearch.from_rules(referencia=InferenceEngine())
+    resultados = busca.search(pet, fatos, limite=5)
+    if not resultados:
+        print(f"{pet}: já recomendado ou inalcançável para esses fatos.")
+    for r in resultados:
+        print(f"  custo {r['custo']:g}: {busca.describe(r)}")
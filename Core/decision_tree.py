@@ -0,0 +1,173 @@
+# Core/decision_tree.py
+"""
+Árvore de decisão compilada a partir da base de regras.
+
+Cada perfil do domínio é rotulado com a saída completa do motor
+(recomendações e regras disparadas). A árvore é construída escolhendo, em
+cada nó, a pergunta de maior ganho de informação; um ramo vira folha assim
+que todos os perfis restantes têm a mesma saída, ou seja, quando as
+respostas que faltam não podem mais mudar o resultado.
+
+Avaliar a árvore custa O(profundidade) e permite um questionário adaptativo:
+a próxima pergunta é sempre a mais discriminante dado o que já foi respondido.
+A árvore compilada fica em cache (em memória e, opcionalmente, em disco) e é
+reconstruída quando a impressão digital das regras muda.
+"""
+
+import json
+import math
+import os
+from collections import Counter
+from typing import Dict, List, Tuple, Optional
+
+from .inference_engine import InferenceEngine
+from .knowledge_base import REGRAS
+from .fact_schema import FactSchema, ESQUEMA
+from .rule_optimizer import rules_fingerprint
+
+# Árvores já compiladas, por impressão digital das regras
+_CACHE: Dict[str, "DecisionTree"] = {}
+
+
+def _entropia(rotulos: List) -> float:
+    n = len(rotulos)
+    return -sum(c / n * math.log2(c / n) for c in Counter(rotulos).values())
+
+
+class DecisionTree:
+    """
+    Nós são listas: folha = [None, recomendacoes, regras_disparadas];
+    pergunta = [indice_atributo, [filho_por_codigo, ...]].
+    """
+
+    def __init__(self, regras=REGRAS, esquema: FactSchema = ESQUEMA, arvore=None):
+        self.esquema = esquema
+        self.referencia = InferenceEngine(regras)
+        self.raiz = arvore if arvore is not None else self._construir(regras)
+
+    @classmethod
+    def compile(cls, regras=REGRAS, esquema: FactSchema = ESQUEMA,
+                cache_path: str = None) -> "DecisionTree":
+        """
+        Devolve a árvore das regras, reaproveitando a compilação anterior
+        enquanto as regras e o domínio não mudarem.
+
+        Args:
+            regras: Regras no formato de REGRAS
+            esquema: Esquema compilado dos fatos
+            cache_path: Arquivo JSON opcional para persistir a árvore entre execuções
+        """
+        digital = rules_fingerprint(regras, esquema)
+        if digital in _CACHE:
+            return _CACHE[digital]
+
+        arvore = None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    dados = json.load(f)
+                if dados.get("fingerprint") == digital:
+                    arvore = dados["arvore"]
+            except (OSError, ValueError, KeyError):
+                arvore = None
+
+        instancia = cls(regras, esquema, arvore)
+        if cache_path and arvore is None:
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": digital, "arvore": instancia.raiz}, f, ensure_ascii=False)
+
+        _CACHE[digital] = instancia
+        return instancia
+
+    def _construir(self, regras):
+        perfis = self.esquema.all_profiles()
+        saidas = {p.indice: self.referencia.inferir(p) for p in perfis}
+        rotulos = {i: (tuple(r), tuple(d)) for i, (r, d) in saidas.items()}
+
+        def construir(grupo, livres):
+            distintos = {rotulos[p.indice] for p in grupo}
+            if len(distintos) == 1 or not livres:
+                recs, disparadas = saidas[grupo[0].indice]
+                return [None, recs, disparadas]
+
+            entropia = _entropia([rotulos[p.indice] for p in grupo])
+            melhor = None
+            for i in livres:
+                partes = [[] for _ in range(self.esquema.tamanhos[i])]
+                for p in grupo:
+                    partes[p.codigos[i]].append(p)
+                restante = sum(len(parte) / len(grupo) * _entropia([rotulos[p.indice] for p in parte])
+                               for parte in partes if parte)
+                ganho = entropia - restante
+                # Empates ficam com a ordem do questionário
+                if melhor is None or ganho > melhor[0] + 1e-12:
+                    melhor = (ganho, i, partes)
+
+            _, i, partes = melhor
+            outros = [j for j in livres if j != i]
+            return [i, [construir(parte, outros) for parte in partes]]
+
+        return construir(perfis, list(range(len(self.esquema.atributos))))
+
+    # --- Navegação -----------------------------------------------------
+
+    def _descer(self, respostas: Dict[str, str]):
+        """Desce pela árvore com as respostas dadas; devolve (nó, caminho)."""
+        no = self.raiz
+        caminho = []
+        while no[0] is not None:
+            atributo = self.esquema.atributos[no[0]]
+            codigo = self.esquema.codigos[atributo].get(respostas.get(atributo))
+            caminho.append(atributo)
+            if codigo is None:
+                break
+            no = no[1][codigo]
+        return no, caminho
+
+    def next_question(self, respostas: Dict[str, str]) -> Optional[str]:
+        """Próxima pergunta a fazer, ou None se o resultado já está decidido."""
+        no, caminho = self._descer(respostas)
+        return None if no[0] is None else caminho[-1]
+
+    def questions_path(self, respostas: Dict[str, str]) -> List[str]:
+        """
+        Perguntas relevantes para as respostas atuais, na ordem em que são
+        feitas (inclui a próxima pergunta ainda sem resposta, se houver).
+        """
+        return self._descer(respostas)[1]
+
+    def result(self, respostas: Dict[str, str]) -> Optional[Tuple[List[str], List[str]]]:
+        """(recomendações, regras_disparadas) se as respostas já decidem o resultado."""
+        no, _ = self._descer(respostas)
+        if no[0] is not None:
+            return None
+        return list(no[1]), list(no[2])
+
+    def inferir(self, fatos: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """Mesma interface de InferenceEngine.inferir, em O(profundidade)."""
+        perfil, _ = self.esquema.try_encode(fatos, estrito=True)
+        if perfil is None:
+            return self.referencia.inferir(fatos)
+        no = self.raiz
+        codigos = perfil.codigos
+        while no[0] is not None:
+            no = no[1][codigos[no[0]]]
+        return list(no[1]), list(no[2])
+
+    def depth_stats(self) -> Dict[str, float]:
+        """Profundidade média (por perfil) e máxima da árvore."""
+        total = 0
+        maxima = 0
+        perfis = 0
+        pilha = [(self.raiz, 0, self.esquema.total_perfis)]
+        while pilha:
+            no, profundidade, peso = pilha.pop()
+            if no[0] is None:
+                total += profundidade * peso
+                perfis += peso
+                maxima = max(maxima, profundidade)
+                continue
+            filhos = no[1]
+            for filho in filhos:
+                pilha.append((filho, profundidade + 1, peso // len(filhos)))
+        return {"media": total / perfis if perfis else 0.0, "maxima": maxima}
@@ -0,0 +1,329 @@
+# Core/fact_providers.py
+"""
+Fatos derivados de fontes locais, resolvidos sob demanda.
+
+Além das respostas do questionário, uma regra pode ler fatos obtidos de
+arquivos ou bancos locais — clima ou regras do condomínio a partir do CEP,
+por exemplo. Cada um vem de um provedor: uma função que recebe a sessão e
+devolve o valor (ou None). Essas consultas são caras, então:
+- FactSession é o dicionário de fatos passado às regras: um provedor só
+  roda quando uma condição lê o atributo (f.get), e uma regra que já falhou
+  num termo anterior nunca dispara a consulta;
+- cada valor é buscado uma única vez por sessão, mesmo com várias threads
+  pedindo ao mesmo tempo (as demais esperam o resultado);
+- infer_lazy antecipa, num pool de threads, as consultas que a inferência
+  certamente fará: cada condição é avaliada com um dicionário de sondagem
+  que interrompe a regra na primeira leitura de um fato ainda não buscado.
+  Esse fato é lido de qualquer forma pela avaliação normal, então buscá-lo
+  antes não desperdiça nada; as leituras de regras diferentes são
+  independentes e rodam em paralelo. Com os valores em mãos, a sondagem se
+  repete para a próxima leitura de cada regra, até nenhuma regra pedir mais.
+Uma consulta que falha deixa o fato sem valor (como uma pergunta não
+respondida) e o erro fica registrado na sessão.
+
+Uso: python -m Core.fact_providers <rules.json> <provedores.json> atributo=valor ...
+"""
+
+import contextvars
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import Future, Executor, ThreadPoolExecutor
+from typing import Dict, List, Tuple, Any, Callable, Iterable
+
+from .tracing import span
+
+# Provedor: recebe a sessão (para ler as entradas, ex.: o CEP) e devolve o valor
+Provedor = Callable[["FactSession"], Any]
+
+
+class FactSession(Mapping):
+    """
+    Fatos de uma sessão: as respostas informadas mais os fatos dos
+    provedores, buscados na primeira leitura e guardados até o fim da sessão.
+    """
+
+    def __init__(self, fatos: Dict[str, Any], provedores: Dict[str, Provedor] = None,
+                 executor: Executor = None):
+        """
+        Args:
+            fatos: Respostas e entradas dos provedores (ex.: "cep")
+            provedores: atributo -> provedor
+            executor: Pool usado por prefetch (sem ele, prefetch não faz nada)
+        """
+        self._fatos = dict(fatos)
+        self._provedores = {a: p for a, p in (provedores or {}).items() if a not in self._fatos}
+        self._executor = executor
+        self._resolvidos: Dict[str, Any] = {}
+        self._pendentes: Dict[str, Future] = {}
+        self._trava = threading.Lock()
+        # Estatísticas: consultas feitas, tempo de cada uma (ms) e erros
+        self.consultas: Dict[str, float] = {}
+        self.erros: Dict[str, str] = {}
+
+    # --- Leitura (mesmo contrato de um dicionário de fatos) -----------
+
+    def get(self, atributo: str, padrao=None):
+        if atributo in self._fatos:
+            return self._fatos[atributo]
+        if atributo in self._resolvidos:
+            valor = self._resolvidos[atributo]
+        elif atributo in self._provedores:
+            valor = self._resolver(atributo)
+        else:
+            return padrao
+        return padrao if valor is None else valor
+
+    def __getitem__(self, atributo: str):
+        valor = self.get(atributo)
+        if valor is None:
+            raise KeyError(atributo)
+        return valor
+
+    def __contains__(self, atributo) -> bool:
+        return self.get(atributo) is not None
+
+    def __iter__(self):
+        # Só o que já é conhecido: iterar (ou copiar com dict()) não dispara consultas
+        yield from self._fatos
+        for atributo, valor in list(self._resolvidos.items()):
+            if valor is not None:
+                yield atributo
+
+    def __len__(self) -> int:
+        return len(self._fatos) + sum(v is not None for v in list(self._resolvidos.values()))
+
+    def is_pending(self, atributo: str) -> bool:
+        """True se o atributo vem de um provedor e ainda não foi resolvido."""
+        return atributo in self._provedores and atributo not in self._resolvidos
+
+    # --- Resolução -----------------------------------------------------
+
+    def _resolver(self, atributo: str):
+        with self._trava:
+            if atributo in self._resolvidos:
+                return self._resolvidos[atributo]
+            futuro = self._pendentes.get(atributo)
+            dono = futuro is None
+            if dono:
+                futuro = self._pendentes[atributo] = Future()
+        if not dono:
+            # Outra thread já está buscando: espera o mesmo resultado
+            return futuro.result()
+
+        inicio = time.perf_counter()
+        with span("FactProvider.lookup", atributo=atributo) as s:
+            try:
+                valor = self._provedores[atributo](self)
+            except Exception as e:
+                valor = None
+                self.erros[atributo] = repr(e)
+                s.set(erro=repr(e))
+        with self._trava:
+            self.consultas[atributo] = (time.perf_counter() - inicio) * 1000.0
+            self._resolvidos[atributo] = valor
+            del self._pendentes[atributo]
+        futuro.set_result(valor)
+        return valor
+
+    def prefetch(self, atributos: Iterable[str]) -> List[Future]:
+        """Começa a buscar os atributos no pool; devolve os futuros (já resolvidos ficam de fora)."""
+        if self._executor is None:
+            return []
+        # Cada consulta roda numa cópia do contexto de quem pediu: o span da
+        # consulta fica sob o span corrente (ex.: Controller.run_analysis)
+        return [self._executor.submit(contextvars.copy_context().run, self._resolver, a)
+                for a in atributos if self.is_pending(a)]
+
+
+class _LeituraPendente(Exception):
+    """Interrompe a sondagem de uma condição na leitura de um fato não buscado."""
+
+    def __init__(self, atributo: str):
+        self.atributo = atributo
+
+
+class _Sondagem:
+    """Fatos da sessão sem consultar provedores: ler um fato pendente interrompe a condição."""
+
+    __slots__ = ("_sessao",)
+
+    def __init__(self, sessao: FactSession):
+        self._sessao = sessao
+
+    def get(self, atributo, padrao=None):
+        if self._sessao.is_pending(atributo):
+            raise _LeituraPendente(atributo)
+        return self._sessao.get(atributo, padrao)
+
+    def __getitem__(self, atributo):
+        valor = self.get(atributo)
+        if valor is None:
+            raise KeyError(atributo)
+        return valor
+
+    def __contains__(self, atributo):
+        return self.get(atributo) is not None
+
+
+def next_reads(regras, sessao: FactSession) -> List[str]:
+    """
+    Fatos pendentes que a avaliação das regras certamente vai ler a seguir:
+    para cada regra, a primeira leitura de um fato ainda não buscado (regras
+    que já decidem com os fatos conhecidos não contribuem).
+    """
+    sondagem = _Sondagem(sessao)
+    leituras = []
+    for _, condicao, _ in regras:
+        try:
+            condicao(sondagem)
+        except _LeituraPendente as leitura:
+            if leitura.atributo not in leituras:
+                leituras.append(leitura.atributo)
+        except Exception:
+            pass  # o erro reaparece (e é registrado) na avaliação normal
+    return leituras
+
+
+def infer_lazy(motor, fatos, provedores: Dict[str, Provedor] = None,
+               executor: Executor = None) -> Tuple[List[str], List[str], FactSession]:
+    """
+    Roda motor.inferir com fatos de provedores buscados sob demanda.
+
+    Args:
+        motor: InferenceEngine (ou outro motor com active_rules() e inferir()
+               cujas condições leiam os fatos com f.get)
+        fatos: Respostas (dict) ou uma FactSession já criada
+        provedores: atributo -> provedor (ignorado se fatos já é uma sessão)
+        executor: Pool para antecipar as consultas (None: só sob demanda)
+
+    Returns:
+        (recomendações, regras disparadas, sessão) — a sessão traz as
+        consultas feitas, seus tempos e os erros
+    """
+    sessao = fatos if isinstance(fatos, FactSession) else FactSession(fatos, provedores, executor)
+    if executor is not None:
+        # Ondas de leituras certas: cada onda em paralelo, a seguinte depois dela
+        leituras = next_reads(motor.active_rules(), sessao)
+        while leituras:
+            for futuro in sessao.prefetch(leituras):
+                futuro.result()
+            leituras = next_reads(motor.active_rules(), sessao)
+    recomendacoes, regras = motor.inferir(sessao)
+    return recomendacoes, regras, sessao
+
+
+# --- Provedores de fontes locais ---------------------------------------
+
+def json_lookup(caminho: str, chave: str, campo: str = None,
+                normalizar: Callable[[Any], Any] = None) -> Provedor:
+    """
+    Provedor que procura o valor de `chave` numa tabela JSON local
+    ({"chave": valor} ou {"chave": {"campo": valor}}). O arquivo é lido na
+    primeira consulta e compartilhado entre as sessões.
+
+    Args:
+        chave: Fato de entrada (ex.: "cep")
+        campo: Campo do registro encontrado (None: o próprio registro)
+        normalizar: Transforma a entrada antes da busca (ex.: 5 primeiros dígitos do CEP)
+    """
+    tabela: Dict[str, Any] = {}
+    carregada = threading.Event()
+    trava = threading.Lock()
+
+    def buscar(sessao: FactSession):
+        if not carregada.is_set():
+            with trava:
+                if not carregada.is_set():
+                    with open(caminho, "r", encoding="utf-8") as f:
+                        tabela.update(json.load(f))
+                    carregada.set()
+        entrada = sessao.get(chave)
+        if entrada is None:
+            return None
+        registro = tabela.get(normalizar(entrada) if normalizar else entrada)
+        if campo is None or registro is None:
+            return registro
+        return registro.get(campo)
+    return buscar
+
+
+def sqlite_lookup(caminho: str, consulta: str, chaves: Tuple[str, ...]) -> Provedor:
+    """
+    Provedor que roda uma consulta SQL parametrizada num banco SQLite local e
+    devolve a primeira coluna da primeira linha (uma conexão por thread).
+
+    Args:
+        consulta: SQL com um "?" por chave, ex.:
+                  "SELECT clima FROM regioes WHERE prefixo = substr(?, 1, 5)"
+        chaves: Fatos de entrada, na ordem dos "?"
+    """
+    local = threading.local()
+
+    def buscar(sessao: FactSession):
+        argumentos = [sessao.get(c) for c in chaves]
+        if any(a is None for a in argumentos):
+            return None
+        conexao = getattr(local, "conexao", None)
+        if conexao is None:
+            conexao = local.conexao = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+        linha = conexao.execute(consulta, argumentos).fetchone()
+        return linha[0] if linha else None
+    return buscar
+
+
+def load_providers(caminho: str) -> Dict[str, Provedor]:
+    """
+    Provedores declarados num JSON:
+
+        {"clima": {"json": "DataBase/regioes_cep.json", "chave": "cep", "campo": "clima", "prefixo": 5},
+         "pets_grandes": {"sqlite": "condominios.sqlite", "consulta": "SELECT ...", "chaves": ["cep"]}}
+
+    Caminhos relativos partem da pasta do arquivo de provedores.
+    """
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    with open(caminho, "r", encoding="utf-8") as f:
+        declaracoes = json.load(f)
+
+    provedores = {}
+    for atributo, d in declaracoes.items():
+        if "json" in d:
+            prefixo = d.get("prefixo")
+            normalizar = (lambda v, n=prefixo: str(v).replace("-", "")[:n]) if prefixo else None
+            provedores[atributo] = json_lookup(os.path.join(pasta, d["json"]), d["chave"], d.get("campo"),
+                                               normalizar)
+        elif "sqlite" in d:
+            provedores[atributo] = sqlite_lookup(os.path.join(pasta, d["sqlite"]), d["consulta"],
+                                                 tuple(d["chaves"]))
+        else:
+            raise ValueError(f"Provedor sem fonte (json ou sqlite): {atributo}")
+    return provedores
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Uso: python -m Core.fact_providers <rules.json> <provedores.json> atributo=valor ...")
+        sys.exit(1)
+
+    from .inference_engine import InferenceEngine
+    from .knowledge_loader import load_rules_json, rules_from_json
+    from .knowledge_base import PRIORIDADE_ANIMAIS
+
+    dados = load_rules_json(sys.argv[1])
+    motor = InferenceEngine(rules_from_json(dados), dados.get("priority", PRIORIDADE_ANIMAIS))
+    provedores = load_providers(sys.argv[2])
+    fatos = dict(arg.split("=", 1) for arg in sys.argv[3:])
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        recomendacoes, regras, sessao = infer_lazy(motor, fatos, provedores, executor)
+    print(f"Recomendações: {', '.join(recomendacoes) or '-'}")
+    print(f"Regras disparadas: {', '.join(regras) or '-'}")
+    print(f"Consultas feitas: {len(sessao.consultas)} de {len(provedores)} provedores")
+    for atributo, ms in sessao.consultas.items():
+        print(f"  {atributo:<24} {ms:>8.2f} ms  -> {sessao.get(atributo)!r}")
+    for atributo, erro in sessao.erros.items():
+        print(f"  {atributo}: erro {erro}")
@@ -0,0 +1,251 @@
+# Core/fact_schema.py
+"""
+Esquema compilado dos fatos.
+
+O domínio declarado em knowledge_base.DOMINIO_FATOS é compilado uma única vez
+em codificadores valor -> inteiro. A validação e a codificação de um perfil
+acontecem na mesma passada e produzem um EncodedFacts, que continua sendo um
+dicionário (as regras em lambda o leem normalmente) mas já carrega os códigos,
+o índice do perfil no domínio e a máscara one-hot usada pelos motores
+compilados.
+"""
+
+import itertools
+from typing import Dict, List, Tuple, Iterable, Optional
+
+from .knowledge_base import DOMINIO_FATOS, ALIASES_VALORES
+
+
+class EncodedFacts(dict):
+    """
+    Perfil validado e codificado.
+
+    Funciona como o dicionário de fatos original (valores já canônicos) e
+    expõe:
+        codigos: tupla com o código de cada atributo, na ordem do esquema
+        indice: posição do perfil na enumeração do domínio
+        bits: máscara one-hot (um bit ligado por atributo)
+
+    Deve ser tratado como somente leitura.
+    """
+
+    __slots__ = ("codigos", "indice", "bits")
+
+
+def _codigo(tabela: Dict[str, int], valor) -> Optional[int]:
+    """Código do valor, ou None se ele não estiver no domínio (inclusive se não for hashável)."""
+    try:
+        return tabela.get(valor)
+    except TypeError:
+        return None
+
+
+class FactSchema:
+    """
+    Codificadores compilados a partir do domínio dos fatos.
+    """
+
+    def __init__(self, dominio: Dict[str, List[str]] = DOMINIO_FATOS,
+                 aliases: Dict[str, str] = ALIASES_VALORES):
+        self.dominio = dominio
+        self.atributos = tuple(dominio)
+        self.valores = {a: tuple(dominio[a]) for a in self.atributos}
+        self.tamanhos = tuple(len(self.valores[a]) for a in self.atributos)
+
+        # valor -> código, por atributo (com e sem os sinônimos)
+        self.codigos_estritos = {}
+        self.codigos = {}
+        for atributo in self.atributos:
+            tabela = {valor: i for i, valor in enumerate(self.valores[atributo])}
+            self.codigos_estritos[atributo] = tabela
+            tabela = dict(tabela)
+            for alias, canonico in aliases.items():
+                if canonico in tabela and alias not in tabela:
+                    tabela[alias] = tabela[canonico]
+            self.codigos[atributo] = tabela
+
+        # Deslocamento de cada atributo na máscara one-hot
+        deslocamentos = []
+        total = 0
+        for tam in self.tamanhos:
+            deslocamentos.append(total)
+            total += tam
+        self.deslocamentos = tuple(deslocamentos)
+        self.total_bits = total
+
+        # Passo de cada atributo no índice misto (último atributo varia mais rápido)
+        passos = [1] * len(self.tamanhos)
+        for i in range(len(self.tamanhos) - 2, -1, -1):
+            passos[i] = passos[i + 1] * self.tamanhos[i + 1]
+        self.passos = tuple(passos)
+        self.total_perfis = passos[0] * self.tamanhos[0] if self.tamanhos else 1
+
+        # Planos de codificação: uma tupla por atributo, percorrida em try_encode()
+        self._plano = tuple(
+            (atributo, self.codigos[atributo], self.valores[atributo], passo, desloc)
+            for atributo, passo, desloc in zip(self.atributos, self.passos, self.deslocamentos)
+        )
+        self._plano_estrito = tuple(
+            (atributo, self.codigos_estritos[atributo], valores, passo, desloc)
+            for atributo, _, valores, passo, desloc in self._plano
+        )
+
+    def _erro(self, atributo: str, valor) -> str:
+        if not valor:
+            return f"Campos obrigatórios não preenchidos: {atributo}"
+        return f"Valor inválido para {atributo}: {valor}"
+
+    def try_encode(self, fatos: Dict[str, str],
+                   estrito: bool = False) -> Tuple[Optional[EncodedFacts], str]:
+        """
+        Valida e codifica um perfil em uma única passada.
+
+        Args:
+            fatos: Dicionário de fatos (ou um EncodedFacts, devolvido como está)
+            estrito: Se True, sinônimos (ex.: "Não") são rejeitados; usado pelos
+                     motores compilados para reproduzir exatamente as regras em lambda
+
+        Returns:
+            Tupla (perfil_codificado, mensagem_erro). Em caso de erro o perfil
+            é None e a mensagem explica o problema; caso contrário a mensagem
+            é vazia.
+        """
+        if isinstance(fatos, EncodedFacts):
+            return fatos, ""
+
+        vazios = [a for a in self.atributos if not fatos.get(a)]
+        if vazios:
+            return None, f"Campos obrigatórios não preenchidos: {', '.join(vazios)}"
+
+        perfil = EncodedFacts()
+        codigos = []
+        indice = 0
+        bits = 0
+        for atributo, tabela, valores, passo, desloc in (self._plano_estrito if estrito else self._plano):
+            valor = fatos[atributo]
+            try:
+                codigo = tabela.get(valor)
+            except TypeError:  # valor não hashável (ex.: lista) nunca está no domínio
+                codigo = None
+            if codigo is None:
+                return None, self._erro(atributo, valor)
+            perfil[atributo] = valores[codigo]
+            codigos.append(codigo)
+            indice += codigo * passo
+            bits |= 1 << (desloc + codigo)
+
+        perfil.codigos = tuple(codigos)
+        perfil.indice = indice
+        perfil.bits = bits
+        return perfil, ""
+
+    def unmatched_terms(self, termos: Iterable[Tuple[str, Tuple[str, ...]]]) -> List[Tuple[str, Tuple[str, ...]]]:
+        """
+        Valores de termos de condição que nenhum perfil validado produz.
+
+        Args:
+            termos: (atributo, valores aceitos), como em normalize_conditions
+
+        Returns:
+            (atributo, valores fora do domínio) por termo afetado; atributos
+            fora do esquema (ex.: fatos de provedores) não são verificados
+        """
+        fora = []
+        for atributo, valores in termos:
+            tabela = self.codigos.get(atributo)
+            if tabela is None:
+                continue
+            invalidos = tuple(v for v in valores if _codigo(tabela, v) is None)
+            if invalidos:
+                fora.append((atributo, invalidos))
+        return fora
+
+    def encode(self, fatos: Dict[str, str]) -> EncodedFacts:
+        """
+        Valida e codifica um perfil.
+
+        Raises:
+            ValueError: se faltar algum atributo ou houver valor fora do domínio
+        """
+        perfil, erro = self.try_encode(fatos)
+        if perfil is None:
+            raise ValueError(erro)
+        return perfil
+
+    def validate(self, fatos: Dict[str, str]) -> Tuple[bool, str]:
+        """Mesmo contrato de Controller.validate_facts: (válido, mensagem_erro)."""
+        perfil, erro = self.try_encode(fatos)
+        return perfil is not None, erro
+
+    def from_codes(self, codigos: Tuple[int, ...]) -> EncodedFacts:
+        """Reconstrói o perfil a partir dos códigos de cada atributo."""
+        perfil = EncodedFacts()
+        indice = 0
+        bits = 0
+        for codigo, (atributo, _, valores, passo, desloc) in zip(codigos, self._plano):
+            perfil[atributo] = valores[codigo]
+            indice += codigo * passo
+            bits |= 1 << (desloc + codigo)
+        perfil.codigos = tuple(codigos)
+        perfil.indice = indice
+        perfil.bits = bits
+        return perfil
+
+    def from_index(self, indice: int) -> EncodedFacts:
+        """Reconstrói o perfil a partir do seu índice no domínio."""
+        return self.from_codes(tuple((indice // p) % t for p, t in zip(self.passos, self.tamanhos)))
+
+    def all_profiles(self) -> List[EncodedFacts]:
+        """Enumera todos os perfis do domínio, na ordem dos índices."""
+        return [self.from_codes(c) for c in itertools.product(*(range(t) for t in self.tamanhos))]
+
+    def encode_columns(self, colunas: Dict[str, List[str]]) -> Tuple[List[int], List[Tuple[int, str]]]:
+        """
+        Validação em lote, coluna a coluna.
+
+        Args:
+            colunas: atributo -> lista de valores (todas as listas com o mesmo tamanho)
+
+        Returns:
+            Tupla (indices, erros):
+            - indices: índice do perfil de cada linha (-1 para linhas inválidas)
+            - erros: lista de (linha, mensagem_erro), com o primeiro erro de cada linha
+        """
+        n = max((len(c) for c in colunas.values()), default=0)
+        indices = [0] * n
+        erros: Dict[int, str] = {}
+
+        for atributo, tabela, _, passo, _ in self._plano:
+            coluna = colunas.get(atributo)
+            if coluna is None:
+                for linha in range(n):
+                    erros.setdefault(linha, f"Campos obrigatórios não preenchidos: {atributo}")
+                continue
+            codigos = [_codigo(tabela, valor) for valor in coluna]
+            for linha, codigo in enumerate(codigos):
+                if codigo is None:
+                    erros.setdefault(linha, self._erro(atributo, coluna[linha]))
+                else:
+                    indices[linha] += codigo * passo
+            for linha in range(len(coluna), n):
+                erros.setdefault(linha, f"Campos obrigatórios não preenchidos: {atributo}")
+
+        for linha in erros:
+            indices[linha] = -1
+        return indices, sorted(erros.items())
+
+    def encode_batch(self, perfis: Iterable[Dict[str, str]]) -> Tuple[List[Optional[EncodedFacts]], List[Tuple[int, str]]]:
+        """
+        Validação em lote de uma sequência de perfis (dicionários).
+
+        Returns:
+            Tupla (codificados, erros): codificados[i] é None para linhas inválidas.
+        """
+        perfis = list(perfis)
+        colunas = {a: [p.get(a) for p in perfis] for a in self.atributos}
+        indices, erros = self.encode_columns(colunas)
+        return [self.from_index(i) if i >= 0 else None for i in indices], erros
+
+
+# Esquema compilado uma única vez e compartilhado por todos os caminhos
+ESQUEMA = FactSchema()
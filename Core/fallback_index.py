@@ -0,0 +1,178 @@
+# Core/fallback_index.py
+"""
+Índice de perfis cobertos para o caso "nenhuma recomendação".
+
+Guarda, para cada perfil que recebe recomendações, a saída do motor, e
+responde consultas de "perfil coberto mais próximo" por distância de Hamming
+ponderada entre as respostas.
+
+A busca primeiro percorre a "bola" de perfis vizinhos (1, 2, ... respostas
+alteradas), calculando o índice de cada vizinho aritmeticamente e
+consultando um dicionário; enquanto a bola for menor que o índice isso é
+mais barato que qualquer varredura. Quando a bola passaria do tamanho do
+índice, a busca continua numa BK-tree (a distância ponderada é uma métrica),
+já limitada pelo melhor candidato encontrado. Com pesos iguais a distância
+sai de um XOR das máscaras one-hot seguido de contagem de bits.
+"""
+
+import itertools
+import math
+from typing import Dict, List, Tuple, Optional, Any, Iterable
+
+from .inference_engine import InferenceEngine
+from .knowledge_base import PESOS_TERMOS
+from .fact_schema import FactSchema, EncodedFacts, ESQUEMA
+
+
+class NearestProfileIndex:
+    """
+    BK-tree de perfis cobertos, indexada pelo perfil codificado.
+    """
+
+    def __init__(self, motor=None, esquema: FactSchema = ESQUEMA,
+                 pesos: Dict[str, float] = PESOS_TERMOS,
+                 perfis: Iterable[Dict[str, str]] = None):
+        """
+        Args:
+            motor: Motor usado para pré-calcular as recomendações (padrão: InferenceEngine)
+            esquema: Esquema compilado dos fatos
+            pesos: Peso de cada atributo na distância
+            perfis: Perfis candidatos; por padrão todo o domínio do esquema
+                    (para domínios grandes, passe os perfis conhecidos, ex. do log)
+        """
+        self.esquema = esquema
+        self.motor = motor or InferenceEngine()
+        self.pesos = tuple(float(pesos.get(a, 1.0)) for a in esquema.atributos)
+
+        # Pesos iguais: distância = peso * popcount(a ^ b) / 2
+        self._peso_unico = self.pesos[0] if self.pesos and len(set(self.pesos)) == 1 else None
+        self._pesos_ordenados = sorted(self.pesos)
+
+        self._exatos: Dict[int, Tuple[EncodedFacts, List[str], List[str]]] = {}
+        self._raiz = None
+
+        for fatos in (esquema.all_profiles() if perfis is None else perfis):
+            perfil = esquema.encode(fatos)
+            recs, regras = self.motor.inferir(perfil)
+            if recs:
+                self.add(perfil, recs, regras)
+
+    def __len__(self) -> int:
+        return len(self._exatos)
+
+    def _distancia(self, a: EncodedFacts, b: EncodedFacts) -> float:
+        if self._peso_unico is not None:
+            return self._peso_unico * ((a.bits ^ b.bits).bit_count() >> 1)
+        return sum(p for p, x, y in zip(self.pesos, a.codigos, b.codigos) if x != y)
+
+    def add(self, perfil: EncodedFacts, recomendacoes: List[str], regras: List[str]):
+        """Acrescenta um perfil coberto ao índice."""
+        if perfil.indice in self._exatos:
+            return
+        self._exatos[perfil.indice] = (perfil, recomendacoes, regras)
+
+        no = [perfil, {}]
+        if self._raiz is None:
+            self._raiz = no
+            return
+        atual = self._raiz
+        while True:
+            d = self._distancia(perfil, atual[0])
+            filho = atual[1].get(d)
+            if filho is None:
+                atual[1][d] = no
+                return
+            atual = filho
+
+    def _minimo_com(self, r: int) -> float:
+        """Menor distância possível com r + 1 respostas alteradas."""
+        return sum(self._pesos_ordenados[:r + 1]) if r < len(self.pesos) else float("inf")
+
+    def _buscar_na_bola(self, perfil: EncodedFacts):
+        """
+        Enumera vizinhos com 1, 2, ... respostas alteradas enquanto a bola
+        couber no orçamento (tamanho do índice).
+
+        Returns:
+            Tupla (melhor_perfil, distancia, raio): raio é o maior número de
+            respostas alteradas examinado por completo.
+        """
+        # Para cada atributo: variações do índice ao trocar a resposta
+        alternativas = [[(v - codigo) * passo for v in range(tam) if v != codigo]
+                        for codigo, tam, passo in zip(perfil.codigos, self.esquema.tamanhos,
+                                                      self.esquema.passos)]
+
+        n = len(alternativas)
+        maior_alt = max((len(a) for a in alternativas), default=0)
+        orcamento = len(self._exatos)
+        gasto = 0
+        melhor, melhor_d = None, float("inf")
+        raio = 0
+
+        for r in range(1, n + 1):
+            # Nenhum vizinho com r alterações pode superar o melhor já achado
+            if melhor is not None and sum(self._pesos_ordenados[:r]) > melhor_d:
+                return melhor, melhor_d, n
+            gasto += math.comb(n, r) * maior_alt ** r
+            if gasto > orcamento:
+                break
+            for atributos in itertools.combinations(range(n), r):
+                d = sum(self.pesos[i] for i in atributos)
+                if d > melhor_d:
+                    continue
+                for deltas in itertools.product(*(alternativas[i] for i in atributos)):
+                    encontrado = self._exatos.get(perfil.indice + sum(deltas))
+                    if encontrado is not None and (
+                            d < melhor_d or encontrado[0].indice < melhor.indice):
+                        melhor, melhor_d = encontrado[0], d
+            raio = r
+        return melhor, melhor_d, raio
+
+    def _buscar_na_arvore(self, perfil: EncodedFacts, melhor, melhor_d: float):
+        """Busca na BK-tree, podando com o melhor candidato já conhecido."""
+        pilha = [self._raiz]
+        while pilha:
+            no_perfil, filhos = pilha.pop()
+            d = self._distancia(perfil, no_perfil)
+            if d < melhor_d or (d == melhor_d and no_perfil.indice < melhor.indice):
+                melhor, melhor_d = no_perfil, d
+            for chave, filho in filhos.items():
+                if d - melhor_d <= chave <= d + melhor_d:
+                    pilha.append(filho)
+        return melhor, melhor_d
+
+    def nearest(self, fatos: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Perfil coberto mais próximo dos fatos.
+
+        Returns:
+            None se o índice estiver vazio; caso contrário um dicionário com
+            "perfil", "distancia", "diferencas" (lista de (atributo,
+            valor_informado, valor_do_vizinho)), "recomendacoes" e "regras".
+
+        Raises:
+            ValueError: se os fatos não forem válidos para o esquema
+        """
+        perfil = self.esquema.encode(fatos)
+
+        exato = self._exatos.get(perfil.indice)
+        if exato is not None:
+            melhor, melhor_d = exato[0], 0.0
+        elif self._raiz is None:
+            return None
+        else:
+            melhor, melhor_d, raio = self._buscar_na_bola(perfil)
+            if melhor is None or melhor_d > self._minimo_com(raio):
+                melhor, melhor_d = self._buscar_na_arvore(perfil, melhor, melhor_d)
+
+        _, recs, regras = self._exatos[melhor.indice]
+        diferencas = [(atributo, perfil[atributo], melhor[atributo])
+                      for atributo in self.esquema.atributos
+                      if perfil[atributo] != melhor[atributo]]
+        return {
+            "perfil": melhor,
+            "distancia": melhor_d,
+            "diferencas": diferencas,
+            "recomendacoes": list(recs),
+            "regras": list(regras),
+        }
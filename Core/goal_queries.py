@@ -0,0 +1,200 @@
+# Core/goal_queries.py
+"""
+Consultas orientadas a objetivo (encadeamento para trás).
+
+Um índice invertido liga cada pet às regras que o recomendam e cada regra
+aos seus termos de condição (cubos compilados por RuleBaseOptimizer). Com
+ele é possível responder, sem rodar a inferência sobre todo o espaço de
+perfis:
+- alcançabilidade: quais perfis levam a um pet?
+- por que não: por que um pet não foi recomendado para estes fatos?
+- condições faltantes: o que falta (ou precisa mudar) para chegar ao pet?
+
+Os fatos podem ser parciais: atributos não respondidos aparecem como
+condições pendentes, não como falhas.
+"""
+
+import sys
+from typing import Dict, List, Any
+
+from .knowledge_base import REGRAS
+from .fact_schema import FactSchema, ESQUEMA
+from .rule_optimizer import RuleBaseOptimizer
+
+
+class GoalQueryEngine:
+    """
+    Índice invertido pet -> regras -> termos de condição.
+    """
+
+    def __init__(self, regras=REGRAS, esquema: FactSchema = ESQUEMA):
+        self.esquema = esquema
+        otimizador = RuleBaseOptimizer(regras, esquema)
+        self.regras = otimizador.rule_cubes()
+
+        # Termos de cada cubo: (índice do atributo, máscara dos valores aceitos)
+        self._termos = []
+        for _, cubos, _ in self.regras:
+            self._termos.append([
+                [(i, m) for i, (m, tam) in enumerate(zip(cubo, esquema.tamanhos))
+                 if m != (1 << tam) - 1]
+                for cubo in cubos
+            ])
+
+        # Índice invertido: pet -> índices das regras que o recomendam
+        self.indice_pet: Dict[str, List[int]] = {}
+        for r, (_, _, consequencias) in enumerate(self.regras):
+            for pet in consequencias:
+                self.indice_pet.setdefault(pet, []).append(r)
+
+        # Quantidade de perfis que levam a cada pet (união dos cubos)
+        self._alcance: Dict[str, int] = {}
+        for pet, indices in self.indice_pet.items():
+            bits = 0
+            for r in indices:
+                for cubo in self.regras[r][1]:
+                    bits |= otimizador._perfis_do_cubo(cubo)
+            self._alcance[pet] = bin(bits).count("1")
+
+    def _descrever(self, termos) -> Dict[str, List[str]]:
+        return {self.esquema.atributos[i]: [v for j, v in enumerate(self.esquema.valores[self.esquema.atributos[i]])
+                                            if m >> j & 1]
+                for i, m in termos}
+
+    def _avaliar_termos(self, termos, fatos: Dict[str, str]):
+        """Separa os termos de um cubo em (falhas, pendentes) para os fatos dados."""
+        falhas, pendentes = [], []
+        for i, mascara in termos:
+            atributo = self.esquema.atributos[i]
+            exigidos = [v for j, v in enumerate(self.esquema.valores[atributo]) if mascara >> j & 1]
+            valor = fatos.get(atributo)
+            if not valor:
+                pendentes.append((atributo, None, exigidos))
+                continue
+            codigo = self.esquema.codigos[atributo].get(valor)
+            if codigo is None or not mascara >> codigo & 1:
+                falhas.append((atributo, valor, exigidos))
+        return falhas, pendentes
+
+    def _satisfaz(self, r: int, fatos: Dict[str, str]) -> bool:
+        """True se algum cubo da regra r é totalmente satisfeito pelos fatos."""
+        for termos in self._termos[r]:
+            falhas, pendentes = self._avaliar_termos(termos, fatos)
+            if not falhas and not pendentes:
+                return True
+        return False
+
+    def rules_for(self, pet: str) -> List[str]:
+        """Regras que recomendam o pet."""
+        return [self.regras[r][0] for r in self.indice_pet.get(pet, [])]
+
+    def reachability(self, pet: str) -> Dict[str, Any]:
+        """
+        Perfis que levam ao pet.
+
+        Returns:
+            Dicionário com "alcancavel" (bool), "total_perfis" (quantos perfis
+            do domínio recebem o pet) e "caminhos": lista de (regra, condições),
+            em que condições é um dicionário atributo -> valores aceitos.
+        """
+        caminhos = []
+        for r in self.indice_pet.get(pet, []):
+            for termos in self._termos[r]:
+                caminhos.append((self.regras[r][0], self._descrever(termos)))
+        return {
+            "alcancavel": bool(caminhos),
+            "total_perfis": self._alcance.get(pet, 0),
+            "caminhos": caminhos,
+        }
+
+    def why_not(self, pet: str, fatos: Dict[str, str]) -> List[Dict[str, Any]]:
+        """
+        Por que o pet não foi recomendado para os fatos.
+
+        Returns:
+            Uma entrada por regra que recomenda o pet (no melhor cubo da
+            regra), com "regra", "falhas" e "pendentes" — listas de
+            (atributo, valor_informado, valores_exigidos). Lista vazia se
+            alguma regra já recomenda o pet para esses fatos.
+        """
+        motivos = []
+        for r in self.indice_pet.get(pet, []):
+            melhor = None
+            for termos in self._termos[r]:
+                falhas, pendentes = self._avaliar_termos(termos, fatos)
+                if not falhas and not pendentes:
+                    return []
+                chave = (len(falhas), len(pendentes))
+                if melhor is None or chave < melhor[0]:
+                    melhor = (chave, falhas, pendentes)
+            if melhor is not None:
+                motivos.append({"regra": self.regras[r][0],
+                                "falhas": melhor[1], "pendentes": melhor[2]})
+        return motivos
+
+    def missing_conditions(self, pet: str, fatos: Dict[str, str]) -> List[Dict[str, Any]]:
+        """
+        Conjuntos de condições que, satisfeitos, levariam ao pet.
+
+        Returns:
+            Lista de {"regra", "condicoes"} ordenada pelo número de condições
+            (as mais simples primeiro); condicoes é um dicionário
+            atributo -> valores aceitos, só com o que falta ou precisa mudar.
+        """
+        opcoes = []
+        vistos = set()
+        for r in self.indice_pet.get(pet, []):
+            for termos in self._termos[r]:
+                falhas, pendentes = self._avaliar_termos(termos, fatos)
+                condicoes = {a: exigidos for a, _, exigidos in falhas + pendentes}
+                chave = tuple(sorted((a, tuple(v)) for a, v in condicoes.items()))
+                if chave in vistos:
+                    continue
+                vistos.add(chave)
+                opcoes.append({"regra": self.regras[r][0], "condicoes": condicoes})
+        opcoes.sort(key=lambda o: len(o["condicoes"]))
+        return opcoes
+
+    def explain(self, pet: str, fatos: Dict[str, str]) -> str:
+        """Texto explicando por que o pet foi (ou não) recomendado."""
+        if pet not in self.indice_pet:
+            return f"Nenhuma regra da base de conhecimento recomenda {pet}."
+
+        motivos = self.why_not(pet, fatos)
+        if not motivos:
+            regras = [self.regras[r][0] for r in self.indice_pet[pet] if self._satisfaz(r, fatos)]
+            if not regras:
+                return f"{pet} é inalcançável: as regras que o recomendam nunca disparam no domínio."
+            return f"{pet} é recomendado pelas regras: {', '.join(regras)}."
+
+        linhas = [f"{pet} não foi recomendado. Regras que levariam a ele:"]
+        for motivo in motivos:
+            linhas.append(f"• {motivo['regra']}")
+            for atributo, valor, exigidos in motivo["falhas"]:
+                linhas.append(f"    ✗ {atributo} = {valor} (exige {' ou '.join(exigidos)})")
+            for atributo, _, exigidos in motivo["pendentes"]:
+                linhas.append(f"    ? {atributo} não informado (exige {' ou '.join(exigidos)})")
+        return "\n".join(linhas)
+
+
+if __name__ == "__main__":
+    # Uso: python -m Core.goal_queries "Gato" [atributo=valor ...]
+    if len(sys.argv) < 2:
+        print('Uso: python -m Core.goal_queries "<pet>" [atributo=valor ...]')
+        sys.exit(1)
+
+    pet = sys.argv[1]
+    fatos = dict(arg.split("=", 1) for arg in sys.argv[2:])
+    consultas = GoalQueryEngine()
+
+    alcance = consultas.reachability(pet)
+    print(f"{pet}: {alcance['total_perfis']} perfis do domínio levam a este pet")
+    for regra, condicoes in alcance["caminhos"]:
+        print(f"  {regra}: {condicoes}")
+
+    if fatos:
+        print()
+        print(consultas.explain(pet, fatos))
+        print("\nCondições faltantes (mais simples primeiro):")
+        for opcao in consultas.missing_conditions(pet, fatos):
+            print(f"  {opcao['regra']}: {opcao['condicoes']}")
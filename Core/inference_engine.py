@@ -1,32 +1,238 @@
 # Core/inference_engine.py
 import sys
-from typing import Dict, Tuple, List
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Tuple, List, Any
 from .knowledge_base import REGRAS, PRIORIDADE_ANIMAIS
+from .concurrency import ShardedCounter
+
+
+class RuleHealth:
+    """
+    Estado de erros de uma regra: contagens, último erro, primeiros fatos
+    que falharam e até quando a regra fica em quarentena.
+    """
+
+    __slots__ = ("erros", "consecutivos", "ultimo_erro", "primeiros_fatos",
+                 "quarentenas", "quarentena_ate")
+
+    def __init__(self):
+        self.erros = 0
+        self.consecutivos = 0
+        self.ultimo_erro = None
+        self.primeiros_fatos = None
+        self.quarentenas = 0
+        self.quarentena_ate = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {nome: getattr(self, nome) for nome in self.__slots__}
+
+
+class RuleSnapshot:
+    """
+    Base de regras imutável, compartilhada entre motores e threads: regras e
+    prioridade são tuplas (as consequências também) e a posição de cada pet
+    é um mapeamento somente leitura. Trocar de base é criar outro snapshot.
+    """
+
+    __slots__ = ("regras", "prioridade", "posicao")
+
+    def __init__(self, regras=REGRAS, prioridade=PRIORIDADE_ANIMAIS):
+        regras = tuple(r if isinstance(r[2], tuple) else (r[0], r[1], tuple(r[2])) for r in regras)
+        prioridade = tuple(prioridade)
+        object.__setattr__(self, "regras", regras)
+        object.__setattr__(self, "prioridade", prioridade)
+        # Posição de cada pet na prioridade (evita list.index a cada ordenação)
+        object.__setattr__(self, "posicao", MappingProxyType({pet: i for i, pet in enumerate(prioridade)}))
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("RuleSnapshot é imutável")
+
+    def __delattr__(self, nome):
+        raise AttributeError("RuleSnapshot é imutável")
+
+    def __len__(self) -> int:
+        return len(self.regras)
+
 
 class InferenceEngine:
     """
     Motor de Inferência: encadeamento para frente.
     Avalia todas as regras (REGRAS) contra os fatos (dict).
+
+    Uma regra cuja condição lança exceção é tratada como não disparada e o
+    erro é contabilizado (rule_health). Depois de limite_falhas falhas
+    seguidas a regra entra em quarentena e deixa de ser avaliada; passado
+    espera_reteste segundos ela volta a ser avaliada, e uma nova falha a
+    devolve à quarentena.
+
+    Um motor pode atender várias threads ao mesmo tempo: as regras vêm de um
+    RuleSnapshot imutável, o estado de cada chamada é local, as regras ativas
+    são uma tupla trocada inteira (nunca alterada no lugar) e o contador de
+    chamadas é dividido por thread. Só o caminho de falha usa uma trava.
     """
 
-    def __init__(self, regras=REGRAS):
-        self.regras = regras
+    def __init__(self, regras=REGRAS, prioridade=PRIORIDADE_ANIMAIS,
+                 limite_falhas: int = 5, espera_reteste: float = 60.0):
+        """
+        Args:
+            regras: Regras no formato de REGRAS ou um RuleSnapshot (nesse
+                    caso prioridade é ignorada)
+        """
+        if not isinstance(regras, RuleSnapshot):
+            regras = RuleSnapshot(regras, prioridade)
+        self.snapshot = regras
+        self.regras = regras.regras
+        self.prioridade = regras.prioridade
+        self._posicao = regras.posicao
+        self._consultas = None
+        self._contrafactuais = None
+        self.chamadas = ShardedCounter()
+
+        self.limite_falhas = limite_falhas
+        self.espera_reteste = espera_reteste
+        self._saude: Dict[str, RuleHealth] = {}
+        self._trava = threading.Lock()
+        # (regras avaliadas, sem as que estão em quarentena, na ordem original;
+        #  instante do próximo reteste ou None), lidos juntos numa só referência
+        self._estado = (self.regras, None)
 
     def inferir(self, fatos: Dict[str, str]) -> Tuple[List[str], List[str]]:
         recomendacoes = set()
         regras_disparadas = []
+        self.chamadas.add()
 
-        for (nome_regra, condicao, consequencia) in self.regras:
-            try:
-                if condicao(fatos):
-                    regras_disparadas.append(nome_regra)
-                    recomendacoes.update(consequencia)
-            except Exception as e:
-                print(f"[AVISO] Erro ao avaliar a Regra {nome_regra}: {e}", file=sys.stderr)
+        for nome_regra, _, consequencia in self.fired_rules(fatos):
+            regras_disparadas.append(nome_regra)
+            recomendacoes.update(consequencia)
 
+        posicao = self._posicao
         recomendacoes_ordenadas = sorted(
             recomendacoes,
-            key=lambda x: PRIORIDADE_ANIMAIS.index(x) if x in PRIORIDADE_ANIMAIS else 999
+            key=lambda x: posicao.get(x, 999)
         )
 
         return recomendacoes_ordenadas, regras_disparadas
+
+    def fired_rules(self, fatos: Dict[str, str]) -> List[Tuple]:
+        """Regras ativas que disparam para os fatos, na ordem da base."""
+        disparadas = []
+        ativas, proximo_reteste = self._estado
+        if proximo_reteste is not None and time.monotonic() >= proximo_reteste:
+            ativas = self._liberar_quarentenas()
+
+        saude = self._saude
+        for regra in ativas:
+            nome_regra = regra[0]
+            try:
+                if regra[1](fatos):
+                    disparadas.append(regra)
+            except Exception as e:
+                self._registrar_falha(nome_regra, e, fatos)
+            else:
+                # Só escreve no estado compartilhado se a regra vinha falhando
+                if saude and nome_regra in saude and saude[nome_regra].consecutivos:
+                    self._registrar_sucesso(nome_regra)
+        return disparadas
+
+    def active_rules(self) -> Tuple:
+        """Regras avaliadas hoje por inferir (sem as que estão em quarentena)."""
+        return self._estado[0]
+
+    # --- Saúde das regras ----------------------------------------------
+
+    def _registrar_falha(self, nome_regra: str, erro: Exception, fatos: Dict[str, str]):
+        with self._trava:
+            saude = self._saude.get(nome_regra)
+            if saude is None:
+                saude = RuleHealth()
+                saude.primeiros_fatos = dict(fatos)
+                # Publica o registro só depois de preenchido (leitores não travam)
+                self._saude = {**self._saude, nome_regra: saude}
+                # Só o primeiro erro de cada regra vai para o stderr
+                print(f"[AVISO] Erro ao avaliar a Regra {nome_regra}: {erro!r}", file=sys.stderr)
+            saude.erros += 1
+            saude.consecutivos += 1
+            saude.ultimo_erro = repr(erro)
+
+            if saude.consecutivos >= self.limite_falhas and saude.quarentena_ate is None:
+                saude.quarentenas += 1
+                saude.quarentena_ate = time.monotonic() + self.espera_reteste
+                print(f"[AVISO] Regra {nome_regra} em quarentena após {saude.consecutivos} falhas seguidas",
+                      file=sys.stderr)
+                self._reconstruir_ativas()
+
+    def _registrar_sucesso(self, nome_regra: str):
+        # Mesma trava de _registrar_falha: um incremento concorrente não se perde
+        with self._trava:
+            saude = self._saude.get(nome_regra)
+            if saude is not None:
+                saude.consecutivos = 0
+
+    def _reconstruir_ativas(self):
+        # Chamado com a trava; publica o novo estado numa única atribuição
+        em_quarentena = {nome for nome, s in self._saude.items() if s.quarentena_ate is not None}
+        prazos = [self._saude[nome].quarentena_ate for nome in em_quarentena]
+        self._estado = (tuple(r for r in self.regras if r[0] not in em_quarentena),
+                        min(prazos) if prazos else None)
+
+    def _liberar_quarentenas(self) -> Tuple:
+        """Devolve à avaliação as regras cujo prazo de quarentena acabou."""
+        with self._trava:
+            agora = time.monotonic()
+            for saude in self._saude.values():
+                if saude.quarentena_ate is not None and saude.quarentena_ate <= agora:
+                    saude.quarentena_ate = None
+                    # Em reteste: uma única falha já devolve a regra à quarentena
+                    saude.consecutivos = self.limite_falhas - 1
+            self._reconstruir_ativas()
+            return self._estado[0]
+
+    def rule_health(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Estado das regras que já falharam: erros, consecutivos, ultimo_erro,
+        primeiros_fatos, quarentenas e quarentena_ate (time.monotonic() até
+        o qual a regra fica fora da avaliação; None se está ativa).
+        """
+        return {nome: saude.as_dict() for nome, saude in self._saude.items()}
+
+    def quarantined_rules(self) -> List[str]:
+        """Nomes das regras atualmente em quarentena."""
+        return [nome for nome, s in self._saude.items() if s.quarentena_ate is not None]
+
+    def reset_rule_health(self, nome_regra: str = None):
+        """Esquece os erros de uma regra (ou de todas) e a tira da quarentena."""
+        with self._trava:
+            if nome_regra is None:
+                self._saude = {}
+            else:
+                self._saude = {n: s for n, s in self._saude.items() if n != nome_regra}
+            self._reconstruir_ativas()
+
+    def explain_recommendation(self, pet: str, fatos: Dict[str, str]) -> str:
+        """
+        Explica por que um pet foi (ou não) recomendado para os fatos,
+        usando o índice invertido de Core.goal_queries.
+        """
+        consultas = self._consultas
+        if consultas is None:
+            from .goal_queries import GoalQueryEngine
+            # Duas threads podem construir ao mesmo tempo; fica a última (são iguais)
+            consultas = self._consultas = GoalQueryEngine(self.regras)
+        return consultas.explain(pet, fatos)
+
+    def counterfactuals(self, pet: str, fatos: Dict[str, str], limite: int = 3,
+                        custos: Dict[str, float] = None) -> List[Dict[str, Any]]:
+        """
+        Menores mudanças nas respostas que levam este motor a recomendar o
+        pet (ver Core.counterfactual). Regras em quarentena não contam: os
+        cubos saem das regras ativas e são refeitos quando a quarentena muda.
+        """
+        ativas = self.active_rules()
+        cache = self._contrafactuais
+        if cache is None or cache[0] is not ativas:
+            from .counterfactual import CounterfactualSearch
+            # Duas threads podem reconstruir ao mesmo tempo; fica a última (são iguais)
+            cache = self._contrafactuais = (ativas, CounterfactualSearch.from_rules(ativas, referencia=self))
+        return cache[1].search(pet, fatos, limite, custos)
@@ -0,0 +1,271 @@
+# Core/kb_registry.py
+"""
+Registro de várias bases de conhecimento (variantes regionais) com
+compartilhamento estrutural.
+
+Nomes, pets, termos de condição, funções de condição e as próprias regras
+são internados num único pool: duas variantes que têm a mesma regra apontam
+para o mesmo objeto. Uma variante derivada reaproveita a tupla de regras da
+base enquanto nada muda (cópia na escrita) e as estruturas compiladas
+(motor, árvore de decisão, etc.) são compartilhadas entre variantes com a
+mesma impressão digital. O motor de uma variante derivada que muda algumas
+regras não recompila a base: ele avalia as regras do motor da base (menos
+as removidas) e só as regras novas num motor próprio. O custo de memória
+cresce com as diferenças entre as variantes, não com a quantidade delas.
+"""
+
+import hashlib
+import sys
+import threading
+from typing import Dict, List, Tuple, Any, Callable, Iterable, Union, FrozenSet
+
+from .inference_engine import InferenceEngine
+from .knowledge_base import REGRAS, PRIORIDADE_ANIMAIS
+from .knowledge_loader import load_rules_json, normalize_conditions, compile_condition
+from .rule_optimizer import rule_fingerprint
+
+
+class KnowledgeBase:
+    """
+    Uma variante registrada. regras e prioridade são tuplas compartilhadas;
+    digital identifica o conteúdo (variantes iguais têm a mesma digital).
+    Variantes derivadas guardam também a diferença para a base: nomes
+    removidos (fora) e regras acrescentadas (novas).
+    """
+
+    __slots__ = ("nome", "regras", "prioridade", "digital", "base", "fora", "novas")
+
+    def __init__(self, nome, regras, prioridade, digital, base=None,
+                 fora: FrozenSet[str] = frozenset(), novas: Tuple = ()):
+        self.nome = nome
+        self.regras = regras
+        self.prioridade = prioridade
+        self.digital = digital
+        self.base = base
+        self.fora = fora
+        self.novas = novas
+
+
+class VariantEngine:
+    """
+    Motor de uma variante derivada, com a mesma interface de inferir() do
+    InferenceEngine. As regras da base são avaliadas pelo motor compilado da
+    base (compartilhado com ela e com as outras variantes, inclusive a saúde
+    e as quarentenas das regras); só as regras novas têm um motor próprio.
+    O resultado é o mesmo de um InferenceEngine sobre kb.regras, já que
+    derive() monta as regras como (base - removidas) + novas.
+    """
+
+    def __init__(self, base, fora: FrozenSet[str], novas: InferenceEngine, prioridade: Tuple[str, ...]):
+        self.base = base
+        self.fora = fora
+        self.novas = novas
+        self.prioridade = prioridade
+        self._posicao = {pet: i for i, pet in enumerate(prioridade)}
+
+    @property
+    def regras(self) -> Tuple:
+        return tuple(r for r in self.base.regras if r[0] not in self.fora) + self.novas.regras
+
+    def active_rules(self) -> Tuple:
+        return tuple(r for r in self.base.active_rules() if r[0] not in self.fora) + self.novas.active_rules()
+
+    def fired_rules(self, fatos: Dict[str, str]) -> List[Tuple]:
+        fora = self.fora
+        disparadas = [r for r in self.base.fired_rules(fatos) if r[0] not in fora] if fora \
+            else self.base.fired_rules(fatos)
+        disparadas += self.novas.fired_rules(fatos)
+        return disparadas
+
+    def inferir(self, fatos: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        disparadas = self.fired_rules(fatos)
+        recomendacoes = set()
+        for _, _, consequencia in disparadas:
+            recomendacoes.update(consequencia)
+        posicao = self._posicao
+        return sorted(recomendacoes, key=lambda x: posicao.get(x, 999)), [r[0] for r in disparadas]
+
+
+class KnowledgeBaseRegistry:
+    """
+    Carrega e mantém várias bases de conhecimento nomeadas.
+    """
+
+    def __init__(self):
+        self._textos: Dict[str, str] = {}
+        self._valores: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._termos: Dict[Tuple, Tuple] = {}
+        self._condicoes: Dict[Tuple, Callable] = {}
+        self._consequencias: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._prioridades: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._regras: Dict[Any, Tuple] = {}
+        self._digitais: Dict[int, str] = {}
+        self._bases: Dict[str, KnowledgeBase] = {}
+        self._compilados: Dict[Tuple[str, str], Any] = {}
+        # Bases registradas com register_lazy, construídas no primeiro get()
+        self._adiadas: Dict[str, Tuple] = {}
+        self._trava = threading.Lock()
+
+    # --- Internação ----------------------------------------------------
+
+    def _texto(self, texto: str) -> str:
+        return self._textos.setdefault(texto, sys.intern(texto))
+
+    def _tupla_textos(self, pool: Dict, textos: Iterable[str]) -> Tuple[str, ...]:
+        tupla = tuple(self._texto(t) for t in textos)
+        return pool.setdefault(tupla, tupla)
+
+    def _guardar_regra(self, chave, regra) -> Tuple:
+        existente = self._regras.get(chave)
+        if existente is not None:
+            return existente
+        self._regras[chave] = regra
+        self._digitais[id(regra)] = rule_fingerprint(regra)
+        return regra
+
+    def intern_json_rule(self, regra_json: Dict[str, Any]) -> Tuple:
+        """Regra do rules.json -> regra interna (nome, condição, consequências) compartilhada."""
+        termos = []
+        for atributo, valores in normalize_conditions(regra_json.get("conditions", {})):
+            termo = (self._texto(atributo), self._tupla_textos(self._valores, valores))
+            termos.append(self._termos.setdefault(termo, termo))
+        termos = tuple(termos)
+        termos = self._termos.setdefault(termos, termos)
+        condicao = self._condicoes.get(termos)
+        if condicao is None:
+            condicao = self._condicoes[termos] = compile_condition(termos)
+
+        nome = self._texto(regra_json["name"])
+        consequencias = self._tupla_textos(self._consequencias, regra_json.get("consequences", []))
+        return self._guardar_regra(("json", nome, termos, consequencias), (nome, condicao, consequencias))
+
+    def intern_rule(self, regra: Tuple) -> Tuple:
+        """Regra em Python (ex.: de REGRAS) -> objeto compartilhado por conteúdo."""
+        nome, condicao, consequencias = regra
+        interna = (self._texto(nome), condicao,
+                   self._tupla_textos(self._consequencias, consequencias))
+        return self._guardar_regra(("py", rule_fingerprint(interna)), interna)
+
+    def _criar(self, nome: str, regras: Tuple, prioridade: Iterable[str], base: str = None,
+               fora: FrozenSet[str] = frozenset(), novas: Tuple = ()) -> KnowledgeBase:
+        prioridade = self._tupla_textos(self._prioridades, prioridade)
+        h = hashlib.sha256()
+        h.update(repr(prioridade).encode())
+        for regra in regras:
+            h.update(self._digitais[id(regra)].encode())
+        kb = KnowledgeBase(self._texto(nome), regras, prioridade, h.hexdigest(), base, fora, novas)
+        self._bases[kb.nome] = kb
+        self._adiadas.pop(kb.nome, None)
+        return kb
+
+    # --- Registro ------------------------------------------------------
+
+    def register(self, nome: str, regras=REGRAS, prioridade=PRIORIDADE_ANIMAIS) -> KnowledgeBase:
+        """Registra uma base a partir de regras no formato de REGRAS."""
+        return self._criar(nome, tuple(self.intern_rule(r) for r in regras), prioridade)
+
+    def register_lazy(self, nome: str, regras=REGRAS, prioridade=PRIORIDADE_ANIMAIS):
+        """Como register, mas a base só é construída quando for usada pela primeira vez."""
+        self._adiadas[nome] = (regras, prioridade)
+
+    def load_json(self, nome: str, fonte: Union[str, Dict[str, Any]] = None) -> KnowledgeBase:
+        """
+        Registra uma base a partir de um rules.json.
+
+        Args:
+            nome: Nome da variante (ex.: "sul")
+            fonte: Caminho do arquivo, conteúdo já carregado, ou None para DataBase/rules.json
+        """
+        dados = fonte if isinstance(fonte, dict) else load_rules_json(fonte)
+        regras = tuple(self.intern_json_rule(r) for r in dados.get("rules", []))
+        return self._criar(nome, regras, dados.get("priority", PRIORIDADE_ANIMAIS))
+
+    def derive(self, nome: str, base: str, adicionar: Iterable = (), remover: Iterable[str] = (),
+               prioridade: Iterable[str] = None) -> KnowledgeBase:
+        """
+        Cria uma variante a partir de outra, alterando só algumas regras.
+
+        Args:
+            nome: Nome da nova variante
+            base: Variante de origem
+            adicionar: Regras novas (dicionários do JSON ou tuplas de REGRAS);
+                       uma regra com o mesmo nome de outra da base a substitui
+            remover: Nomes de regras da base a remover
+            prioridade: Nova ordem de prioridade (padrão: a da base)
+        """
+        origem = self.get(base)
+        novas = [self.intern_json_rule(r) if isinstance(r, dict) else self.intern_rule(r)
+                 for r in adicionar]
+        fora = set(remover) | {r[0] for r in novas}
+
+        removidas = frozenset(r[0] for r in origem.regras if r[0] in fora)
+        if not novas and not removidas:
+            regras = origem.regras  # nada mudou: compartilha a mesma tupla
+        else:
+            regras = tuple([r for r in origem.regras if r[0] not in fora] + novas)
+        return self._criar(nome, regras, prioridade or origem.prioridade, base, removidas, tuple(novas))
+
+    # --- Consulta ------------------------------------------------------
+
+    def get(self, nome: str) -> KnowledgeBase:
+        base = self._bases.get(nome)
+        if base is None:
+            with self._trava:
+                base = self._bases.get(nome)
+                if base is None and nome in self._adiadas:
+                    base = self.register(nome, *self._adiadas[nome])
+            if base is None:
+                raise KeyError(f"Base de conhecimento não registrada: {nome}")
+        return base
+
+    def names(self) -> List[str]:
+        return list(self._bases) + [nome for nome in self._adiadas if nome not in self._bases]
+
+    def compiled(self, nome: str, tipo: str, construtor: Callable[[KnowledgeBase], Any]) -> Any:
+        """
+        Estrutura compilada de uma variante, compartilhada com todas as
+        variantes de mesmo conteúdo. O construtor só roda na primeira vez.
+
+        Args:
+            nome: Variante
+            tipo: Tipo da estrutura (ex.: "motor", "arvore")
+            construtor: Função que recebe a KnowledgeBase e devolve a estrutura
+        """
+        kb = self.get(nome)
+        chave = (tipo, kb.digital)
+        estrutura = self._compilados.get(chave)
+        if estrutura is None:
+            estrutura = self._compilados[chave] = construtor(kb)
+        return estrutura
+
+    def engine(self, nome: str) -> Union[InferenceEngine, VariantEngine]:
+        """
+        Motor de inferência da variante (construído uma vez e compartilhado).
+        Variantes derivadas com regras diferentes da base ganham um
+        VariantEngine sobre o motor da base.
+        """
+        return self.compiled(nome, "motor", self._construir_motor)
+
+    def _construir_motor(self, kb: KnowledgeBase):
+        if kb.base is None or not (kb.fora or kb.novas):
+            return InferenceEngine(kb.regras, kb.prioridade)
+        return VariantEngine(self.engine(kb.base), kb.fora, InferenceEngine(kb.novas, kb.prioridade),
+                             kb.prioridade)
+
+    def stats(self) -> Dict[str, int]:
+        """Contagens que mostram o compartilhamento entre as variantes."""
+        tuplas = {id(kb.regras): len(kb.regras) for kb in self._bases.values()}
+        return {
+            "bases": len(self._bases),
+            "referencias_regras": sum(len(kb.regras) for kb in self._bases.values()),
+            "entradas_materializadas": sum(tuplas.values()),
+            "regras_unicas": len(self._regras),
+            "condicoes_unicas": len(self._condicoes),
+            "textos_unicos": len(self._textos),
+            "estruturas_compiladas": len(self._compilados),
+        }
+
+
+# Registro padrão; a base de REGRAS ("padrao") é construída no primeiro uso
+REGISTRO = KnowledgeBaseRegistry()
+REGISTRO.register_lazy("padrao")
@@ -100,3 +100,36 @@ PRIORIDADE_ANIMAIS = [
     "Peixe",
     "Aracnídeo"
 ]
+
+# Domínio declarado dos fatos: atributo -> valores possíveis (mesma ordem do questionário)
+DOMINIO_FATOS = {
+    "moradia": ["Casa", "Apartamento"],
+    "tam_moradia": ["Grande", "Pequeno"],
+    "area_moradia": ["Sim", "Nao"],
+    "TempoPasseio": ["Sim", "Nao"],
+    "interacao": ["Sim", "Nao"],
+    "investimento": ["Alto", "Medio", "Baixo"]
+}
+
+# Fatos numéricos usados em faixas do rules.json: atributo -> (unidade, mínimo, máximo usuais)
+ATRIBUTOS_NUMERICOS = {
+    "orcamento_mensal": ("R$/mês", 0.0, 2000.0),
+    "area_m2": ("m²", 15.0, 500.0),
+    "horas_livres": ("horas/dia", 0.0, 12.0)
+}
+
+# Grafias aceitas como sinônimos dos valores canônicos (ex.: rules.json usa acentos)
+ALIASES_VALORES = {
+    "Não": "Nao",
+    "Médio": "Medio"
+}
+
+# Peso de cada termo de condição no modo de pontuação (correspondência parcial)
+PESOS_TERMOS = {
+    "moradia": 1.0,
+    "tam_moradia": 1.0,
+    "area_moradia": 1.0,
+    "TempoPasseio": 1.0,
+    "interacao": 1.0,
+    "investimento": 1.0
+}
@@ -1,7 +1,16 @@
 # Core/knowledge_loader.py
 import json
+import math
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple, Callable, Optional
+
+from .knowledge_base import ALIASES_VALORES, DOMINIO_FATOS
+
+# Termo de condição canônico: (atributo, valores aceitos em ordem alfabética)
+Termo = Tuple[str, Tuple[str, ...]]
+# Faixa numérica canônica: (atributo, mínimo, máximo), intervalo fechado
+Faixa = Tuple[str, float, float]
+
 
 def load_rules_json(path: str = None) -> Dict[str, Any]:
     if path is None:
@@ -11,3 +20,109 @@ def load_rules_json(path: str = None) -> Dict[str, Any]:
         raise FileNotFoundError(f"Arquivo de regras não encontrado: {path}")
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+def normalize_conditions(condicoes: Dict[str, Any]) -> Tuple[Termo, ...]:
+    """
+    Converte as condições de uma regra do JSON em termos canônicos.
+
+    Cada valor pode ser uma string ou uma lista de alternativas; grafias
+    acentuadas ("Não", "Médio") são trocadas pelos valores canônicos dos fatos.
+    Valores fora do domínio são mantidos (nunca casam com um perfil
+    validado); FactSchema.unmatched_terms os aponta.
+
+    Raises:
+        ValueError: se houver faixa numérica (ver split_conditions); quem só
+                    entende termos categóricos não pode ignorá-la em silêncio
+    """
+    termos = []
+    for atributo, valores in condicoes.items():
+        if isinstance(valores, dict):
+            raise ValueError(f"Condição numérica em {atributo}: use split_conditions/RangeRuleEngine")
+        if isinstance(valores, str):
+            valores = [valores]
+        canonicos = sorted({ALIASES_VALORES.get(v, v) for v in valores})
+        termos.append((atributo, tuple(canonicos)))
+    return tuple(sorted(termos))
+
+
+def normalize_ranges(condicoes: Dict[str, Any]) -> Tuple[Faixa, ...]:
+    """
+    Faixas numéricas de uma regra do JSON, escritas como
+    {"min": 200, "max": 800} (limites inclusivos; um limite omitido deixa a
+    faixa aberta daquele lado).
+
+    Raises:
+        ValueError: se a faixa for vazia, sem limites ou com limites não numéricos
+    """
+    faixas = []
+    for atributo, faixa in condicoes.items():
+        if not isinstance(faixa, dict):
+            continue
+        if not faixa or set(faixa) - {"min", "max"}:
+            raise ValueError(f"Faixa inválida em {atributo}: {faixa} (use \"min\" e/ou \"max\")")
+        minimo = to_number(faixa.get("min", -math.inf))
+        maximo = to_number(faixa.get("max", math.inf))
+        if minimo is None or maximo is None or minimo > maximo:
+            raise ValueError(f"Faixa inválida em {atributo}: {faixa}")
+        faixas.append((atributo, minimo, maximo))
+    return tuple(sorted(faixas))
+
+
+def split_conditions(condicoes: Dict[str, Any]) -> Tuple[Tuple[Termo, ...], Tuple[Faixa, ...]]:
+    """Separa as condições de uma regra em termos categóricos e faixas numéricas."""
+    categoricas = {a: v for a, v in condicoes.items() if not isinstance(v, dict)}
+    return normalize_conditions(categoricas), normalize_ranges(condicoes)
+
+
+def to_number(valor: Any) -> Optional[float]:
+    """
+    Valor numérico de um fato (int, float ou texto como "350" / "12,5");
+    None se não for número.
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return None if math.isnan(valor) else float(valor)
+    if isinstance(valor, str):
+        try:
+            numero = float(valor.strip().replace(",", "."))
+        except ValueError:
+            return None
+        return None if math.isnan(numero) else numero
+    return None
+
+
+def compile_condition(termos: Tuple[Termo, ...], faixas: Tuple[Faixa, ...] = (),
+                      dominio: Dict[str, List[str]] = DOMINIO_FATOS) -> Callable[[Dict[str, str]], bool]:
+    """
+    Gera a função de condição (mesmo contrato das lambdas de REGRAS).
+
+    Os termos de atributos do domínio (respostas) são testados antes dos
+    demais (fatos de provedores): uma regra que já falha nas respostas não
+    dispara a consulta de um provedor.
+    """
+    termos = tuple(sorted(termos, key=lambda termo: termo[0] not in dominio))
+
+    def condicao(f):
+        for atributo, valores in termos:
+            if f.get(atributo) not in valores:
+                return False
+        for atributo, minimo, maximo in faixas:
+            valor = to_number(f.get(atributo))
+            if valor is None or not minimo <= valor <= maximo:
+                return False
+        return True
+    return condicao
+
+
+def rules_from_json(data: Dict[str, Any]) -> List[Tuple[str, Callable, List[str]]]:
+    """
+    Constrói regras no formato de REGRAS (nome, condição, consequências)
+    a partir do conteúdo de um rules.json.
+    """
+    return [
+        (regra["name"], compile_condition(*split_conditions(regra.get("conditions", {}))),
+         list(regra.get("consequences", [])))
+        for regra in data.get("rules", [])
+    ]
@@ -0,0 +1,454 @@
+# Core/load_test.py
+"""
+Teste de carga com muitas sessões simultâneas.
+
+Um gerador de carga envia perfis a um alvo — Controller.run_analysis no
+próprio processo ou um serviço HTTP sem interface (POST com os fatos em
+JSON) — com concorrência e taxa de chegada configuráveis:
+- sem taxa (laço fechado): cada sessão envia a próxima consulta assim que a
+  anterior termina;
+- com taxa (laço aberto): as chegadas seguem um processo de Poisson com a
+  taxa pedida, independentemente de o alvo dar conta; a latência é medida
+  a partir do instante agendado da chegada, então a espera na fila entra na
+  conta (sem "omissão coordenada").
+
+Os perfis vêm de uma mistura: sorteados do domínio (com pesos opcionais por
+valor) ou de um log (JSONL ou o log de auditoria), na proporção em que
+aparecem nele.
+
+A latência vai para histogramas log-lineares (cada potência de 2 dividida
+em 128 faixas: erro relativo < 1%, memória fixa, mescláveis), um por
+sessão, somados no fim. O resultado de uma rodada (percentis p50, p90, p99 e
+p99,9, vazão, taxa e tipos de erro, histograma) pode ser gravado em JSON e
+comparado com outra rodada de mesma configuração (concorrência, taxa e mistura).
+
+Uso: python -m Core.load_test [--alvo controller|http://...] [--concorrencia N]
+                              [--taxa consultas/s] [--duracao s] [--requisicoes N]
+                              [--perfis log.jsonl|sessoes.sqlite] [--saida rodada.json]
+     python -m Core.load_test --comparar base.json nova.json [tolerancia_%] [--forcar]
+"""
+
+import bisect
+import itertools
+import json
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Tuple, Any, Callable, Optional
+
+from .fact_schema import FactSchema, ESQUEMA
+
+Alvo = Callable[[Dict[str, str]], Any]
+
+# Percentis reportados (nome, fração)
+PERCENTIS = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p99.9", 0.999))
+
+
+class LatencyHistogram:
+    """
+    Histograma log-linear de durações em nanossegundos.
+
+    Valores abaixo de 2 * 2^bits_faixa ficam exatos; acima, cada potência de
+    2 tem 2^bits_faixa faixas de mesma largura (erro relativo < 2^-bits_faixa).
+    """
+
+    def __init__(self, bits_faixa: int = 7):
+        self.bits_faixa = bits_faixa
+        self.contagens: Dict[int, int] = {}
+        self.total = 0
+        self.soma_ns = 0
+        self.minimo_ns = None
+        self.maximo_ns = 0
+
+    def _faixa(self, ns: int) -> int:
+        deslocamento = max(0, ns.bit_length() - self.bits_faixa - 1)
+        return (deslocamento << (self.bits_faixa + 1)) | (ns >> deslocamento)
+
+    def _limites(self, faixa: int) -> Tuple[int, int]:
+        deslocamento = faixa >> (self.bits_faixa + 1)
+        mantissa = faixa & ((1 << (self.bits_faixa + 1)) - 1)
+        return mantissa << deslocamento, ((mantissa + 1) << deslocamento) - 1
+
+    def record(self, ns: int):
+        faixa = self._faixa(ns)
+        self.contagens[faixa] = self.contagens.get(faixa, 0) + 1
+        self.total += 1
+        self.soma_ns += ns
+        if self.minimo_ns is None or ns < self.minimo_ns:
+            self.minimo_ns = ns
+        if ns > self.maximo_ns:
+            self.maximo_ns = ns
+
+    def merge(self, outro: "LatencyHistogram") -> "LatencyHistogram":
+        if outro.bits_faixa != self.bits_faixa:
+            raise ValueError("Histogramas com resoluções diferentes")
+        for faixa, n in outro.contagens.items():
+            self.contagens[faixa] = self.contagens.get(faixa, 0) + n
+        self.total += outro.total
+        self.soma_ns += outro.soma_ns
+        if outro.minimo_ns is not None and (self.minimo_ns is None or outro.minimo_ns < self.minimo_ns):
+            self.minimo_ns = outro.minimo_ns
+        self.maximo_ns = max(self.maximo_ns, outro.maximo_ns)
+        return self
+
+    def percentile(self, fracao: float) -> float:
+        """Valor (ns) abaixo do qual está a fração pedida das medidas."""
+        if not self.total:
+            return 0.0
+        alvo = max(1, int(fracao * self.total + 0.5))
+        acumulado = 0
+        for faixa in sorted(self.contagens):
+            acumulado += self.contagens[faixa]
+            if acumulado >= alvo:
+                inferior, superior = self._limites(faixa)
+                return min((inferior + superior) / 2, self.maximo_ns)
+        return float(self.maximo_ns)
+
+    def summary_ms(self) -> Dict[str, float]:
+        """Percentis, média, mínimo e máximo em ms."""
+        resumo = {nome: self.percentile(f) / 1e6 for nome, f in PERCENTIS}
+        resumo["media"] = self.soma_ns / self.total / 1e6 if self.total else 0.0
+        resumo["minimo"] = (self.minimo_ns or 0) / 1e6
+        resumo["maximo"] = self.maximo_ns / 1e6
+        return resumo
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"bits_faixa": self.bits_faixa, "total": self.total, "soma_ns": self.soma_ns,
+                "minimo_ns": self.minimo_ns, "maximo_ns": self.maximo_ns,
+                "contagens": {str(f): n for f, n in sorted(self.contagens.items())}}
+
+    @classmethod
+    def from_dict(cls, dados: Dict[str, Any]) -> "LatencyHistogram":
+        histograma = cls(dados["bits_faixa"])
+        histograma.contagens = {int(f): n for f, n in dados["contagens"].items()}
+        histograma.total = dados["total"]
+        histograma.soma_ns = dados["soma_ns"]
+        histograma.minimo_ns = dados["minimo_ns"]
+        histograma.maximo_ns = dados["maximo_ns"]
+        return histograma
+
+
+class ProfileMix:
+    """Distribuição de perfis para sortear as consultas."""
+
+    def __init__(self, perfis: List[Dict[str, str]], pesos: List[float] = None):
+        if not perfis:
+            raise ValueError("A mistura de perfis está vazia")
+        self.perfis = perfis
+        self._acumulados = list(itertools.accumulate(pesos or [1.0] * len(perfis)))
+
+    def sample(self, rnd: random.Random) -> Dict[str, str]:
+        i = bisect.bisect_right(self._acumulados, rnd.random() * self._acumulados[-1])
+        return self.perfis[min(i, len(self.perfis) - 1)]
+
+    def __len__(self) -> int:
+        return len(self.perfis)
+
+    @classmethod
+    def from_log(cls, caminho: str) -> "ProfileMix":
+        """Perfis de um .jsonl ou do log de auditoria, pesados pelas ocorrências."""
+        from .replay_diff import unique_profiles
+        perfis, pesos = [], []
+        for fatos, n in unique_profiles(caminho):
+            perfis.append(fatos)
+            pesos.append(n)
+        return cls(perfis, pesos)
+
+    @classmethod
+    def from_distribution(cls, esquema: FactSchema = ESQUEMA,
+                          pesos_valores: Dict[str, Dict[str, float]] = None) -> "ProfileMix":
+        """
+        Todos os perfis do domínio, com peso igual ao produto dos pesos dos
+        valores (padrão 1: distribuição uniforme).
+
+        Args:
+            pesos_valores: atributo -> valor -> peso (valores omitidos pesam 1)
+        """
+        pesos_valores = pesos_valores or {}
+        perfis, pesos = [], []
+        for perfil in esquema.all_profiles():
+            fatos = dict(perfil)
+            peso = 1.0
+            for atributo, valor in fatos.items():
+                peso *= pesos_valores.get(atributo, {}).get(valor, 1.0)
+            perfis.append(fatos)
+            pesos.append(peso)
+        return cls(perfis, pesos)
+
+
+def controller_target(controller=None) -> Alvo:
+    """Controller.run_analysis no próprio processo (sem log de auditoria)."""
+    if controller is None:
+        from GUI.controller import Controller
+        controller = Controller(None, auditoria=False)
+    return controller.run_analysis
+
+
+def http_target(url: str, timeout: float = 10.0) -> Alvo:
+    """POST dos fatos em JSON para a URL; respostas fora de 2xx contam como erro."""
+    def consultar(fatos: Dict[str, str]):
+        corpo = json.dumps(fatos, ensure_ascii=False).encode("utf-8")
+        pedido = urllib.request.Request(url, data=corpo, method="POST",
+                                        headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(pedido, timeout=timeout) as resposta:
+            return resposta.read()
+    return consultar
+
+
+def resolve_target(alvo: str) -> Alvo:
+    """"controller" ou uma URL http(s)://."""
+    if alvo == "controller":
+        return controller_target()
+    if alvo.startswith(("http://", "https://")):
+        return http_target(alvo)
+    raise ValueError(f"Alvo desconhecido: {alvo}")
+
+
+def _tipo_erro(erro: Exception) -> str:
+    if isinstance(erro, urllib.error.HTTPError):
+        return f"HTTP {erro.code}"
+    return type(erro).__name__
+
+
+def run_load(alvo: Alvo, mix: ProfileMix = None, concorrencia: int = 8, taxa: float = None,
+             duracao: float = 10.0, requisicoes: int = None, aquecimento: int = 100,
+             semente: int = 0) -> Dict[str, Any]:
+    """
+    Roda a carga e devolve o resultado da rodada.
+
+    Args:
+        alvo: Função chamada com os fatos de cada consulta
+        mix: Perfis sorteados (padrão: domínio inteiro, uniforme)
+        concorrencia: Sessões (threads) simultâneas
+        taxa: Chegadas por segundo (laço aberto); None para laço fechado
+        duracao: Segundos de carga
+        requisicoes: Encerra antes, ao atingir esse total de consultas
+        aquecimento: Consultas feitas antes de medir (não entram no resultado)
+
+    Returns:
+        Configuração, requisições, erros (total, taxa e por tipo), vazão,
+        latência em ms (percentis, média, mínimo, máximo), tempo de serviço
+        (só o alvo, sem a fila) e o histograma serializado
+    """
+    if taxa is not None and not taxa > 0:
+        raise ValueError(f"taxa deve ser positiva (ou None para laço fechado), recebido {taxa}")
+    mix = mix or ProfileMix.from_distribution()
+    rnd = random.Random(semente)
+    for _ in range(aquecimento):
+        try:
+            alvo(dict(mix.sample(rnd)))
+        except Exception:
+            pass
+
+    contador = itertools.count()
+    limite = requisicoes if requisicoes is not None else float("inf")
+    fim = time.perf_counter_ns() + int(duracao * 1e9)
+    chegadas: "queue.Queue" = queue.Queue()
+    histogramas = [(LatencyHistogram(), LatencyHistogram()) for _ in range(concorrencia)]
+    erros: List[Dict[str, int]] = [{} for _ in range(concorrencia)]
+
+    def consultar(sessao: int, agendado_ns: int, fatos: Dict[str, str]):
+        latencia, servico = histogramas[sessao]
+        inicio = time.perf_counter_ns()
+        try:
+            alvo(fatos)
+        except Exception as e:
+            tipo = _tipo_erro(e)
+            erros[sessao][tipo] = erros[sessao].get(tipo, 0) + 1
+        agora = time.perf_counter_ns()
+        latencia.record(agora - agendado_ns)
+        servico.record(agora - inicio)
+
+    def sessao_fechada(sessao: int):
+        rnd_sessao = random.Random(semente * 1000 + sessao)
+        while time.perf_counter_ns() < fim and next(contador) < limite:
+            consultar(sessao, time.perf_counter_ns(), dict(mix.sample(rnd_sessao)))
+
+    def sessao_aberta(sessao: int):
+        while True:
+            chegada = chegadas.get()
+            if chegada is None:
+                return
+            consultar(sessao, *chegada)
+
+    inicio = time.perf_counter_ns()
+    if taxa is None:
+        sessoes = [threading.Thread(target=sessao_fechada, args=(i,), daemon=True) for i in range(concorrencia)]
+        for t in sessoes:
+            t.start()
+    else:
+        sessoes = [threading.Thread(target=sessao_aberta, args=(i,), daemon=True) for i in range(concorrencia)]
+        for t in sessoes:
+            t.start()
+        # Agenda as chegadas (Poisson) e entrega às sessões no instante marcado
+        proxima = inicio
+        enviadas = 0
+        while enviadas < limite:
+            proxima += int(rnd.expovariate(taxa) * 1e9)
+            if proxima >= fim:
+                break
+            espera = (proxima - time.perf_counter_ns()) / 1e9
+            if espera > 0:
+                time.sleep(espera)
+            chegadas.put((proxima, dict(mix.sample(rnd))))
+            enviadas += 1
+        for _ in sessoes:
+            chegadas.put(None)
+    for t in sessoes:
+        t.join()
+    segundos = (time.perf_counter_ns() - inicio) / 1e9
+
+    latencia, servico = LatencyHistogram(), LatencyHistogram()
+    por_tipo: Dict[str, int] = {}
+    for (h_latencia, h_servico), erros_sessao in zip(histogramas, erros):
+        latencia.merge(h_latencia)
+        servico.merge(h_servico)
+        for tipo, n in erros_sessao.items():
+            por_tipo[tipo] = por_tipo.get(tipo, 0) + n
+    total = latencia.total
+    total_erros = sum(por_tipo.values())
+    return {
+        "config": {"concorrencia": concorrencia, "taxa": taxa, "duracao": duracao,
+                   "requisicoes": requisicoes, "perfis": len(mix)},
+        "requisicoes": total,
+        "erros": total_erros,
+        "taxa_erro": total_erros / total if total else 0.0,
+        "erros_por_tipo": por_tipo,
+        "segundos": segundos,
+        "vazao_s": total / segundos if segundos else 0.0,
+        "latencia_ms": latencia.summary_ms(),
+        "servico_ms": servico.summary_ms(),
+        "histograma": latencia.as_dict(),
+    }
+
+
+def save_run(resultado: Dict[str, Any], caminho: str):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+
+def load_run(caminho: str) -> Dict[str, Any]:
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Configuração que precisa coincidir para que as métricas sejam comparáveis
+CONFIG_COMPARAVEL = ("concorrencia", "taxa", "perfis")
+
+
+def config_differences(base: Dict[str, Any], nova: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    """Campos de CONFIG_COMPARAVEL que diferem entre as rodadas: {campo: (base, nova)}."""
+    return {campo: (base["config"].get(campo), nova["config"].get(campo))
+            for campo in CONFIG_COMPARAVEL
+            if base["config"].get(campo) != nova["config"].get(campo)}
+
+
+def compare_runs(base: Dict[str, Any], nova: Dict[str, Any], tolerancia: float = 0.05,
+                 forcar: bool = False) -> List[Dict[str, Any]]:
+    """
+    Compara duas rodadas métrica a métrica.
+
+    Rodadas com configurações diferentes (laço fechado contra aberto, outra
+    concorrência ou outra mistura) não medem a mesma coisa: levanta
+    ValueError, a menos que forcar=True.
+
+    Returns:
+        Por métrica: "metrica", "base", "nova", "variacao" (fração, None se a
+        base é zero) e "veredito" ("melhor", "pior" ou "igual", considerando
+        que vazão maior é melhor e o resto, menor, com a tolerância dada)
+    """
+    diferencas = config_differences(base, nova)
+    if diferencas and not forcar:
+        detalhe = ", ".join(f"{campo}: {a} → {b}" for campo, (a, b) in diferencas.items())
+        raise ValueError(f"Rodadas com configurações diferentes ({detalhe})")
+    metricas: List[Tuple[str, Optional[float], Optional[float], bool]] = [
+        ("vazao_s", base["vazao_s"], nova["vazao_s"], True),
+        ("taxa_erro", base["taxa_erro"], nova["taxa_erro"], False),
+    ]
+    for nome in [n for n, _ in PERCENTIS] + ["media", "maximo"]:
+        metricas.append((f"latencia_{nome}_ms", base["latencia_ms"][nome], nova["latencia_ms"][nome], False))
+
+    linhas = []
+    for nome, antes, depois, maior_melhor in metricas:
+        variacao = (depois - antes) / antes if antes else None
+        if variacao is None:
+            veredito = "igual" if depois == antes else ("melhor" if (depois > antes) == maior_melhor else "pior")
+        elif abs(variacao) <= tolerancia:
+            veredito = "igual"
+        else:
+            veredito = "melhor" if (variacao > 0) == maior_melhor else "pior"
+        linhas.append({"metrica": nome, "base": antes, "nova": depois, "variacao": variacao, "veredito": veredito})
+    return linhas
+
+
+def format_run(resultado: Dict[str, Any]) -> str:
+    config = resultado["config"]
+    modo = f"taxa {config['taxa']:g}/s" if config["taxa"] else "laço fechado"
+    lat, srv = resultado["latencia_ms"], resultado["servico_ms"]
+    linhas = [
+        f"{config['concorrencia']} sessões, {modo}, {config['perfis']} perfis na mistura",
+        f"  requisições: {resultado['requisicoes']}  |  {resultado['segundos']:.2f} s"
+        f"  |  vazão {resultado['vazao_s']:,.0f}/s",
+        f"  erros: {resultado['erros']} ({resultado['taxa_erro']:.2%}) {resultado['erros_por_tipo'] or ''}",
+        "  latência ms:  " + "  ".join(f"{n} {lat[n]:.3f}" for n, _ in PERCENTIS) + f"  máx {lat['maximo']:.3f}",
+        "  serviço ms:   " + "  ".join(f"{n} {srv[n]:.3f}" for n, _ in PERCENTIS) + f"  máx {srv['maximo']:.3f}",
+    ]
+    return "\n".join(linhas)
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    if argumentos and argumentos[0] == "--comparar":
+        forcar = "--forcar" in argumentos
+        argumentos = [a for a in argumentos if a != "--forcar"]
+        if len(argumentos) < 3:
+            print("Uso: python -m Core.load_test --comparar base.json nova.json [tolerancia_%] [--forcar]")
+            sys.exit(1)
+        tolerancia = float(argumentos[3]) / 100 if len(argumentos) > 3 else 0.05
+        base, nova = load_run(argumentos[1]), load_run(argumentos[2])
+        diferencas = config_differences(base, nova)
+        if diferencas:
+            detalhe = ", ".join(f"{campo}: {a} → {b}" for campo, (a, b) in diferencas.items())
+            if not forcar:
+                print(f"Rodadas com configurações diferentes ({detalhe}); use --forcar para comparar mesmo assim")
+                sys.exit(2)
+            print(f"AVISO: configurações diferentes ({detalhe}); os vereditos não são comparáveis")
+        comparacao = compare_runs(base, nova, tolerancia, forcar=True)
+        print(f"{'métrica':<24} {'base':>12} {'nova':>12} {'variação':>10}  veredito")
+        for linha in comparacao:
+            variacao = f"{linha['variacao']:+.1%}" if linha["variacao"] is not None else "-"
+            print(f"{linha['metrica']:<24} {linha['base']:>12.4f} {linha['nova']:>12.4f} {variacao:>10}"
+                  f"  {linha['veredito']}")
+        sys.exit(1 if any(l["veredito"] == "pior" for l in comparacao) else 0)
+
+    alvo, concorrencia, taxa, duracao, requisicoes, perfis, saida = "controller", 8, None, 10.0, None, None, None
+    while argumentos:
+        arg = argumentos.pop(0)
+        if arg == "--alvo":
+            alvo = argumentos.pop(0)
+        elif arg == "--concorrencia":
+            concorrencia = int(argumentos.pop(0))
+        elif arg == "--taxa":
+            taxa = float(argumentos.pop(0))
+        elif arg == "--duracao":
+            duracao = float(argumentos.pop(0))
+        elif arg == "--requisicoes":
+            requisicoes = int(argumentos.pop(0))
+        elif arg == "--perfis":
+            perfis = argumentos.pop(0)
+        elif arg == "--saida":
+            saida = argumentos.pop(0)
+        else:
+            print(f"Argumento desconhecido: {arg}")
+            sys.exit(1)
+
+    resultado = run_load(resolve_target(alvo), ProfileMix.from_log(perfis) if perfis else None,
+                         concorrencia, taxa, duracao, requisicoes)
+    print(format_run(resultado))
+    if saida:
+        save_run(resultado, saida)
+        print(f"Rodada gravada em {saida}")
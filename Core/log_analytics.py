@@ -0,0 +1,245 @@
+# Core/log_analytics.py
+"""
+Relatórios agregados sobre o log de auditoria das sessões.
+
+Os registros são lidos em fluxo e somados num LogSummary, cujo tamanho não
+depende da quantidade de registros:
+- contadores exatos por regra, por pet e por par de respostas (limitados
+  pelo tamanho da base de conhecimento e do domínio dos fatos: entradas e
+  fatos de provedores gravados no log, como "cep", ficam fora dos pares);
+- HyperLogLog para o número de perfis distintos;
+- count-min sketch para a frequência de um perfil específico.
+
+Resumos são mescláveis, então o log é dividido em partições por faixa de id
+e cada partição é resumida num processo separado.
+
+Uso: python -m Core.log_analytics [banco.sqlite] [processos]
+"""
+
+import hashlib
+import itertools
+import math
+import sys
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple, Any, Iterable
+
+from .knowledge_base import REGRAS, PRIORIDADE_ANIMAIS
+from .audit_log import MODO_PARCIAL, iter_records, id_range
+from .fact_schema import ESQUEMA
+
+
+def profile_key(fatos: Dict[str, Any]) -> bytes:
+    """Chave canônica de um perfil (independe da ordem das chaves; aceita qualquer valor)."""
+    return "\x1f".join(f"{a}={v}" for a, v in sorted(fatos.items())).encode("utf-8")
+
+
+class CountMinSketch:
+    """
+    Frequência aproximada de itens: nunca subestima; superestima em no máximo
+    e/largura * total com probabilidade 1 - e^-profundidade.
+    """
+
+    def __init__(self, largura: int = 2048, profundidade: int = 4):
+        self.largura = largura
+        self.profundidade = profundidade
+        self.tabela = array("Q", bytes(8 * largura * profundidade))
+
+    def _posicoes(self, item: bytes):
+        resumo = hashlib.blake2b(item, digest_size=4 * self.profundidade).digest()
+        for linha in range(self.profundidade):
+            h = int.from_bytes(resumo[4 * linha:4 * linha + 4], "little")
+            yield linha * self.largura + h % self.largura
+
+    def add(self, item: bytes, n: int = 1):
+        for i in self._posicoes(item):
+            self.tabela[i] += n
+
+    def estimate(self, item: bytes) -> int:
+        return min(self.tabela[i] for i in self._posicoes(item))
+
+    def merge(self, outro: "CountMinSketch"):
+        if (self.largura, self.profundidade) != (outro.largura, outro.profundidade):
+            raise ValueError("Sketches com dimensões diferentes não podem ser mesclados")
+        for i, v in enumerate(outro.tabela):
+            self.tabela[i] += v
+
+
+class HyperLogLog:
+    """
+    Contagem aproximada de itens distintos em 2^precisao bytes
+    (erro padrão ~ 1.04 / sqrt(2^precisao); 1.6% com precisão 12).
+    """
+
+    def __init__(self, precisao: int = 12):
+        self.precisao = precisao
+        self.registradores = bytearray(1 << precisao)
+
+    def add(self, item: bytes):
+        h = int.from_bytes(hashlib.blake2b(item, digest_size=8).digest(), "little")
+        indice = h & ((1 << self.precisao) - 1)
+        resto = h >> self.precisao
+        bits = 64 - self.precisao
+        # Posição do primeiro bit 1 (1 = bit menos significativo)
+        posicao = (resto & -resto).bit_length() if resto else bits + 1
+        if posicao > self.registradores[indice]:
+            self.registradores[indice] = posicao
+
+    def estimate(self) -> float:
+        m = len(self.registradores)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimativa = alfa * m * m / sum(2.0 ** -r for r in self.registradores)
+        vazios = self.registradores.count(0)
+        if estimativa <= 2.5 * m and vazios:
+            estimativa = m * math.log(m / vazios)  # contagem linear para poucos itens
+        return estimativa
+
+    def merge(self, outro: "HyperLogLog"):
+        if self.precisao != outro.precisao:
+            raise ValueError("HyperLogLogs com precisões diferentes não podem ser mesclados")
+        self.registradores = bytearray(map(max, self.registradores, outro.registradores))
+
+
+class LogSummary:
+    """
+    Agregado mesclável de registros de sessão.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.parciais = 0
+        self.vazios = 0
+        self.vizinhos = 0
+        self.regras: Counter = Counter()
+        self.pets: Counter = Counter()
+        # (atributo_a, valor_a, atributo_b, valor_b) com atributo_a < atributo_b,
+        # só com respostas do esquema
+        self.coocorrencia: Counter = Counter()
+        self.perfis_distintos = HyperLogLog()
+        self.frequencia_perfis = CountMinSketch()
+
+    def add(self, registro: Dict[str, Any]):
+        """Acrescenta um registro (no formato de audit_log.iter_records)."""
+        # Questionário adaptativo: fatos parciais distorceriam os perfis; só conta
+        if registro["modo"] == MODO_PARCIAL:
+            self.parciais += 1
+            return
+        fatos = registro["fatos"]
+        self.total += 1
+        # Recomendações mostradas a partir do perfil vizinho contam como resultado vazio
+        if registro.get("vizinho") is not None:
+            self.vizinhos += 1
+            self.vazios += 1
+        elif not registro["recomendacoes"]:
+            self.vazios += 1
+        self.regras.update(registro["regras"])
+        self.pets.update(registro["recomendacoes"])
+        respostas = sorted((a, v) for a, v in fatos.items()
+                           if isinstance(v, str) and v in ESQUEMA.codigos_estritos.get(a, ()))
+        self.coocorrencia.update(
+            (a, va, b, vb) for (a, va), (b, vb) in itertools.combinations(respostas, 2))
+        chave = profile_key(fatos)
+        self.perfis_distintos.add(chave)
+        self.frequencia_perfis.add(chave)
+
+    def update(self, registros: Iterable[Dict[str, Any]]) -> "LogSummary":
+        for registro in registros:
+            self.add(registro)
+        return self
+
+    def merge(self, outro: "LogSummary") -> "LogSummary":
+        self.total += outro.total
+        self.parciais += outro.parciais
+        self.vazios += outro.vazios
+        self.vizinhos += outro.vizinhos
+        self.regras.update(outro.regras)
+        self.pets.update(outro.pets)
+        self.coocorrencia.update(outro.coocorrencia)
+        self.perfis_distintos.merge(outro.perfis_distintos)
+        self.frequencia_perfis.merge(outro.frequencia_perfis)
+        return self
+
+    def profile_frequency(self, fatos: Dict[str, str]) -> int:
+        """Quantas vezes (aproximadamente, nunca a menos) o perfil aparece no log."""
+        return self.frequencia_perfis.estimate(profile_key(fatos))
+
+    def cooccurrence(self, atributo_a: str, atributo_b: str) -> Dict[Tuple[str, str], int]:
+        """Tabela de contingência das respostas de dois atributos."""
+        if atributo_a > atributo_b:
+            return {(vb, va): n for (va, vb), n in self.cooccurrence(atributo_b, atributo_a).items()}
+        return {(va, vb): n for (a, va, b, vb), n in self.coocorrencia.items()
+                if a == atributo_a and b == atributo_b}
+
+    def report(self, regras=REGRAS, prioridade=PRIORIDADE_ANIMAIS) -> Dict[str, Any]:
+        """
+        Relatório com as regras e pets da base de conhecimento (inclusive os
+        que nunca aparecem no log), seguidos de nomes que só existem no log
+        (ex.: de outras versões da base).
+        """
+        def ordenar(contador, nomes):
+            nomes = list(dict.fromkeys(nomes))
+            extras = sorted(set(contador) - set(nomes))
+            return [(nome, contador.get(nome, 0), contador.get(nome, 0) / self.total if self.total else 0.0)
+                    for nome in nomes + extras]
+
+        return {
+            "total": self.total,
+            "parciais": self.parciais,
+            "taxa_vazio": self.vazios / self.total if self.total else 0.0,
+            "taxa_vizinho": self.vizinhos / self.total if self.total else 0.0,
+            "perfis_distintos": round(self.perfis_distintos.estimate()),
+            "regras": ordenar(self.regras, [nome for nome, _, _ in regras]),
+            "pets": ordenar(self.pets, prioridade),
+        }
+
+
+def _resumir_particao(argumentos) -> LogSummary:
+    caminho, versao, id_inicio, id_fim = argumentos
+    return LogSummary().update(iter_records(caminho, versao, id_inicio=id_inicio, id_fim=id_fim))
+
+
+def summarize_log(caminho: str = None, versao: str = None, processos: int = 1,
+                  tamanho_particao: int = 1_000_000) -> LogSummary:
+    """
+    Resume o log de auditoria.
+
+    Args:
+        caminho: Arquivo do log (padrão: DataBase/sessoes.sqlite)
+        versao: Só registros desta versão da base
+        processos: Processos usados para resumir as partições em paralelo
+        tamanho_particao: Registros (faixa de ids) por partição
+    """
+    inicio, fim = id_range(caminho)
+    particoes = [(caminho, versao, a, min(a + tamanho_particao, fim))
+                 for a in range(inicio, fim, tamanho_particao)]
+    if processos <= 1 or len(particoes) <= 1:
+        resumos = map(_resumir_particao, particoes)
+        return _mesclar(resumos)
+    with ProcessPoolExecutor(processos) as executor:
+        return _mesclar(executor.map(_resumir_particao, particoes))
+
+
+def _mesclar(resumos: Iterable[LogSummary]) -> LogSummary:
+    total = LogSummary()
+    for resumo in resumos:
+        total.merge(resumo)
+    return total
+
+
+if __name__ == "__main__":
+    caminho = sys.argv[1] if len(sys.argv) > 1 else None
+    processos = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    resumo = summarize_log(caminho, processos=processos)
+    relatorio = resumo.report()
+
+    print(f"Sessões: {relatorio['total']}  |  sem recomendação: {relatorio['taxa_vazio']:.1%}"
+          f" (perfil vizinho mostrado: {relatorio['taxa_vizinho']:.1%})"
+          f"  |  perfis distintos (aprox.): {relatorio['perfis_distintos']}"
+          f"  |  parciais (adaptativo, ignoradas): {relatorio['parciais']}")
+    print("\nRegras disparadas:")
+    for nome, n, freq in relatorio["regras"]:
+        print(f"  {nome:<35} {n:>10} {freq:>7.1%}")
+    print("\nPets recomendados:")
+    for nome, n, freq in relatorio["pets"]:
+        print(f"  {nome:<35} {n:>10} {freq:>7.1%}")
@@ -0,0 +1,343 @@
+# Core/memory_monitor.py
+"""
+Instrumentação de memória para sessões longas (quiosques).
+
+- Python: snapshots do tracemalloc agrupados por subsistema (base de
+  conhecimento, motores e seus caches, controlador, páginas da GUI), pelo
+  arquivo onde cada bloco foi alocado.
+- Tk: o que o tracemalloc não vê (objetos do lado do Tcl) é contado pela
+  própria árvore do Tk — widgets, itens de canvas, imagens, comandos Tcl
+  registrados (cada callback Python vira um) e callbacks "after" pendentes —
+  e pelos objetos Python que embrulham os widgets.
+- Renderizações: ResultPage.set_result marca cada renderização; o monitor
+  guarda as contagens e mostra o crescimento em relação à anterior.
+- Relatório periódico (root.after) e modo soak: milhares de ciclos de
+  análise + renderização, com amostras a intervalos fixos; métricas que
+  crescem de forma sustentada são apontadas como vazamento.
+
+Desligado (o padrão), marcar uma renderização custa uma checagem de flag.
+
+Uso: python -m Core.memory_monitor --soak [ciclos] [amostra_a_cada]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Dict, List, Tuple, Any, Optional
+
+# Subsistema -> trechos do caminho dos arquivos que alocam por ele
+SUBSISTEMAS = {
+    "base_conhecimento": ("Core/knowledge_base.py", "Core/knowledge_loader.py", "Core/kb_registry.py",
+                          "Core/rule_repository.py", "Core/rule_store.py"),
+    "motores": ("Core/inference_engine.py", "Core/fact_schema.py", "Core/rule_optimizer.py",
+                "Core/decision_tree.py", "Core/scoring_engine.py", "Core/fallback_index.py",
+                "Core/goal_queries.py", "Core/counterfactual.py", "Core/bdd.py", "Core/range_index.py"),
+    "controlador": ("GUI/controller.py", "Core/audit_log.py", "Core/tracing.py"),
+    "gui": ("GUI/main_window.py", "tkinter/"),
+}
+
+# Métricas do Tk (contagens que não deveriam crescer entre renderizações)
+METRICAS_TK = ("widgets", "widgets_python", "itens_canvas", "imagens", "comandos_tcl", "after")
+
+
+def _subsistema(arquivo: str) -> str:
+    arquivo = arquivo.replace(os.sep, "/")
+    for nome, trechos in SUBSISTEMAS.items():
+        if any(t in arquivo for t in trechos):
+            return nome
+    return "outros"
+
+
+def count_tk_objects(raiz) -> Dict[str, int]:
+    """
+    Contagens da árvore do Tk a partir de um widget (normalmente a janela
+    principal), consultadas direto no Tcl para incluir widgets sem objeto
+    Python correspondente.
+    """
+    tk = raiz.tk
+    widgets = itens = 0
+    pilha = [str(raiz)]
+    while pilha:
+        caminho = pilha.pop()
+        widgets += 1
+        if tk.call("winfo", "class", caminho) == "Canvas":
+            itens += len(tk.splitlist(tk.call(caminho, "find", "all")))
+        pilha.extend(str(f) for f in tk.splitlist(tk.call("winfo", "children", caminho)))
+
+    embrulhos = 0
+    objetos = [raiz]
+    while objetos:
+        w = objetos.pop()
+        embrulhos += 1
+        objetos.extend(w.children.values())
+
+    return {
+        "widgets": widgets,
+        "widgets_python": embrulhos,
+        "itens_canvas": itens,
+        "imagens": len(tk.splitlist(tk.call("image", "names"))),
+        "comandos_tcl": len(tk.splitlist(tk.call("info", "commands"))),
+        "after": len(tk.splitlist(tk.call("after", "info"))),
+    }
+
+
+def rss_bytes() -> Optional[int]:
+    """Memória residente do processo (Linux: /proc/self/statm; None em outros sistemas)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MemoryMonitor:
+    """
+    Amostras de memória por subsistema e contagens do Tk.
+    """
+
+    def __init__(self, historico: int = 1000):
+        """
+        Args:
+            historico: Renderizações guardadas (as mais antigas saem primeiro)
+        """
+        self.ativo = False
+        self.raiz = None
+        self.renderizacoes: deque = deque(maxlen=historico)
+        self._total_renderizacoes = 0
+        self._base = None
+        self._relatorio_agendado = None
+
+    # --- API de depuração ---------------------------------------------
+
+    def start(self, quadros: int = 1, raiz=None):
+        """
+        Liga o monitor (e o tracemalloc, se ainda não estiver ligado).
+
+        Args:
+            quadros: Quadros de pilha guardados por alocação (1 basta para
+                     agrupar por subsistema; mais quadros custam mais memória)
+            raiz: Janela principal do Tk cujas contagens entram nas amostras
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(quadros)
+        if raiz is not None:
+            self.raiz = raiz
+        self.ativo = True
+        self._base = tracemalloc.take_snapshot()
+
+    def stop(self):
+        self.ativo = False
+        if self._relatorio_agendado is not None and self.raiz is not None:
+            self.raiz.after_cancel(self._relatorio_agendado)
+            self._relatorio_agendado = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._base = None
+
+    def attach(self, raiz):
+        """Passa a contar os objetos do Tk desta janela."""
+        self.raiz = raiz
+
+    def tk_counts(self) -> Dict[str, int]:
+        return count_tk_objects(self.raiz) if self.raiz is not None else {}
+
+    def snapshot(self, rotulo: str = "") -> Dict[str, Any]:
+        """
+        Amostra completa: bytes e blocos Python por subsistema, total
+        rastreado, contagens do Tk e memória residente.
+        """
+        por_subsistema = {nome: {"bytes": 0, "blocos": 0} for nome in list(SUBSISTEMAS) + ["outros"]}
+        if tracemalloc.is_tracing():
+            instantaneo = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),))
+            for estatistica in instantaneo.statistics("filename"):
+                grupo = por_subsistema[_subsistema(estatistica.traceback[0].filename)]
+                grupo["bytes"] += estatistica.size
+                grupo["blocos"] += estatistica.count
+        atual, pico = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {"rotulo": rotulo, "instante": time.time(), "renderizacoes": self._total_renderizacoes,
+                "python": por_subsistema, "rastreado_bytes": atual, "pico_bytes": pico,
+                "tk": self.tk_counts(), "rss_bytes": rss_bytes()}
+
+    def mark_render(self, pagina: str = "ResultPage") -> Optional[Dict[str, Any]]:
+        """
+        Registra uma renderização (contagens do Tk e total rastreado) e
+        devolve o crescimento em relação à anterior; None se desligado.
+        """
+        if not self.ativo:
+            return None
+        self._total_renderizacoes += 1
+        amostra = {"pagina": pagina, "n": self._total_renderizacoes, "instante": time.time(),
+                   "rastreado_bytes": tracemalloc.get_traced_memory()[0], **self.tk_counts()}
+        anterior = self.renderizacoes[-1] if self.renderizacoes else None
+        self.renderizacoes.append(amostra)
+        return growth(anterior, amostra) if anterior is not None else {}
+
+    def render_growth(self) -> Dict[str, Any]:
+        """Crescimento entre a primeira e a última renderização guardadas."""
+        if len(self.renderizacoes) < 2:
+            return {}
+        primeira, ultima = self.renderizacoes[0], self.renderizacoes[-1]
+        variacao = growth(primeira, ultima)
+        variacao["renderizacoes"] = ultima["n"] - primeira["n"]
+        return variacao
+
+    def top_allocations(self, n: int = 10) -> List[Tuple[str, int, int]]:
+        """
+        Linhas de código cuja memória mais cresceu desde start():
+        (arquivo:linha, bytes a mais, blocos a mais).
+        """
+        if self._base is None or not tracemalloc.is_tracing():
+            return []
+        filtro = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        diferencas = tracemalloc.take_snapshot().filter_traces(filtro).compare_to(
+            self._base.filter_traces(filtro), "lineno")
+        return [(f"{d.traceback[0].filename}:{d.traceback[0].lineno}", d.size_diff, d.count_diff)
+                for d in diferencas[:n] if d.size_diff > 0]
+
+    def report(self) -> str:
+        """Resumo legível: memória por subsistema, Tk e crescimento entre renderizações."""
+        amostra = self.snapshot("relatorio")
+        linhas = [f"Memória rastreada: {amostra['rastreado_bytes'] / 1024:,.0f} KiB"
+                  f"  |  pico {amostra['pico_bytes'] / 1024:,.0f} KiB"
+                  + (f"  |  RSS {amostra['rss_bytes'] / 2 ** 20:,.1f} MiB" if amostra["rss_bytes"] else "")]
+        for nome, grupo in amostra["python"].items():
+            linhas.append(f"  {nome:<20} {grupo['bytes'] / 1024:>10,.0f} KiB  {grupo['blocos']:>9,} blocos")
+        if amostra["tk"]:
+            linhas.append("Tk: " + "  ".join(f"{k} {v}" for k, v in amostra["tk"].items()))
+        crescimento = self.render_growth()
+        if crescimento:
+            linhas.append(f"Crescimento em {crescimento['renderizacoes']} renderizações: "
+                          + "  ".join(f"{k} {v:+,}" for k, v in crescimento.items() if k != "renderizacoes"))
+        for local, tamanho, blocos in self.top_allocations(5):
+            linhas.append(f"  +{tamanho / 1024:,.1f} KiB ({blocos:+} blocos)  {local}")
+        return "\n".join(linhas)
+
+    def schedule_report(self, raiz, segundos: float, saida=None):
+        """Imprime report() a cada `segundos` pelo laço de eventos do Tk."""
+        self.raiz = self.raiz or raiz
+        intervalo = max(1, int(segundos * 1000))
+
+        def emitir():
+            print(f"\n[memória {time.strftime('%H:%M:%S')}]\n{self.report()}", file=saida or sys.stderr)
+            self._relatorio_agendado = raiz.after(intervalo, emitir)
+
+        self._relatorio_agendado = raiz.after(intervalo, emitir)
+
+
+def growth(antes: Dict[str, Any], depois: Dict[str, Any]) -> Dict[str, int]:
+    """Diferença das métricas numéricas comuns a duas amostras de renderização."""
+    return {k: depois[k] - antes[k] for k in ("rastreado_bytes",) + METRICAS_TK
+            if k in antes and k in depois}
+
+
+def detect_leaks(amostras: List[Dict[str, Any]], aquecimento: int = 1,
+                 bytes_por_ciclo: float = 256.0) -> List[Dict[str, Any]]:
+    """
+    Métricas com crescimento sustentado ao longo das amostras de um soak.
+
+    Uma métrica do Tk é vazamento se terminou maior do que começou e cresceu
+    em pelo menos 3/4 dos intervalos; a memória Python de um subsistema, se
+    além disso cresceu mais de `bytes_por_ciclo` por renderização.
+
+    Args:
+        amostras: Saídas de MemoryMonitor.snapshot, em ordem
+        aquecimento: Amostras iniciais ignoradas (caches enchendo)
+    """
+    amostras = amostras[aquecimento:]
+    if len(amostras) < 3:
+        return []
+    ciclos = max(1, amostras[-1]["renderizacoes"] - amostras[0]["renderizacoes"])
+
+    series: Dict[str, List[float]] = {}
+    for amostra in amostras:
+        for k, v in amostra["tk"].items():
+            series.setdefault(f"tk.{k}", []).append(v)
+        for nome, grupo in amostra["python"].items():
+            series.setdefault(f"python.{nome}", []).append(grupo["bytes"])
+        series.setdefault("python.total", []).append(amostra["rastreado_bytes"])
+
+    vazamentos = []
+    for metrica, valores in series.items():
+        total = valores[-1] - valores[0]
+        subidas = sum(b > a for a, b in zip(valores, valores[1:]))
+        sustentado = total > 0 and subidas >= 0.75 * (len(valores) - 1)
+        if metrica.startswith("python.") and total / ciclos <= bytes_por_ciclo:
+            sustentado = False
+        if sustentado:
+            vazamentos.append({"metrica": metrica, "inicio": valores[0], "fim": valores[-1],
+                               "por_ciclo": total / ciclos})
+    return vazamentos
+
+
+def soak(app, ciclos: int = 2000, a_cada: int = 100, perfis: List[Dict[str, str]] = None,
+         monitor: MemoryMonitor = None, saida=None) -> Dict[str, Any]:
+    """
+    Roda `ciclos` análises + renderizações de resultado e aponta vazamentos.
+
+    Args:
+        app: GUI.main_window.App já construída
+        a_cada: Ciclos entre amostras
+        perfis: Perfis usados em ciclo (padrão: o domínio inteiro)
+        saida: Onde imprimir o progresso (None: sem progresso)
+
+    Returns:
+        {"ciclos", "segundos", "amostras", "vazamentos", "top_alocacoes"}
+    """
+    if perfis is None:
+        from .fact_schema import ESQUEMA
+        perfis = [dict(p) for p in ESQUEMA.all_profiles()]
+    monitor = monitor or MONITOR
+    monitor.start(raiz=app.root)
+
+    amostras = []
+    inicio = time.perf_counter()
+    for ciclo in range(ciclos + 1):
+        if ciclo % a_cada == 0:
+            # Processa eventos pendentes (layout, destruição) antes de medir
+            app.root.update()
+            amostra = monitor.snapshot(f"ciclo {ciclo}")
+            amostras.append(amostra)
+            if saida is not None:
+                print(f"ciclo {ciclo:>6}  python {amostra['rastreado_bytes'] / 1024:>9,.0f} KiB  "
+                      + "  ".join(f"{k} {v}" for k, v in amostra["tk"].items()), file=saida)
+        if ciclo == ciclos:
+            break
+        app.run_inference_and_show(perfis[ciclo % len(perfis)])
+        app.root.update_idletasks()
+
+    resultado = {"ciclos": ciclos, "segundos": time.perf_counter() - inicio, "amostras": amostras,
+                 "vazamentos": detect_leaks(amostras), "top_alocacoes": monitor.top_allocations(10)}
+    monitor.stop()
+    return resultado
+
+
+# Monitor do processo
+MONITOR = MemoryMonitor()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "--soak":
+        print("Uso: python -m Core.memory_monitor --soak [ciclos] [amostra_a_cada]")
+        sys.exit(1)
+    ciclos = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    a_cada = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+
+    import tkinter as tk
+    from GUI.main_window import App
+
+    raiz = tk.Tk()
+    app = App(raiz, pre_aquecer=False, auditoria=False)
+    resultado = soak(app, ciclos, a_cada, saida=sys.stdout)
+    raiz.destroy()
+
+    print(f"\n{resultado['ciclos']} ciclos em {resultado['segundos']:.1f} s")
+    for local, tamanho, blocos in resultado["top_alocacoes"]:
+        print(f"  +{tamanho / 1024:,.1f} KiB ({blocos:+} blocos)  {local}")
+    if not resultado["vazamentos"]:
+        print("Nenhum crescimento sustentado.")
+    for v in resultado["vazamentos"]:
+        print(f"  VAZAMENTO? {v['metrica']}: {v['inicio']:,} -> {v['fim']:,} ({v['por_ciclo']:+.1f} por ciclo)")
+    sys.exit(1 if resultado["vazamentos"] else 0)
@@ -0,0 +1,212 @@
+# Core/range_index.py
+"""
+Regras com faixas numéricas indexadas por intervalos.
+
+Além dos atributos categóricos, as regras do rules.json podem restringir
+fatos numéricos (orçamento mensal, metros quadrados, horas livres por dia):
+
+    "conditions": {"moradia": "Apartamento", "orcamento_mensal": {"min": 150, "max": 400}}
+
+Para cada atributo numérico, as extremidades de todas as faixas ficam numa
+lista ordenada e dividem a reta em segmentos elementares; cada segmento
+guarda a máscara (bitset em um int) das regras cuja faixa o contém. Consultar
+um valor é uma busca binária (bisect) e uma leitura da máscara. Os termos
+categóricos viram máscaras por (atributo, valor). As regras candidatas são o
+AND das máscaras dos atributos restringidos por alguma regra (operação sobre
+palavras de máquina, feita em C), sem percorrer as regras uma a uma.
+
+O motor é usado como biblioteca: o questionário e o FactSchema só tratam os
+atributos categóricos, então o Controller não avalia regras com faixas.
+
+Uso: python -m Core.range_index [regras] [consultas]
+"""
+
+import bisect
+import math
+import random
+import sys
+import time
+from typing import Dict, List, Tuple, Any
+
+from .knowledge_base import PRIORIDADE_ANIMAIS, DOMINIO_FATOS, ATRIBUTOS_NUMERICOS
+from .knowledge_loader import split_conditions, to_number
+
+
+class IntervalIndex:
+    """
+    Índice estático de intervalos fechados de um atributo: devolve a máscara
+    dos intervalos que contêm um valor em O(log n).
+    """
+
+    def __init__(self, intervalos: List[Tuple[int, float, float]]):
+        """
+        Args:
+            intervalos: (bit da regra, mínimo, máximo) com mínimo <= máximo
+        """
+        self.pontos = sorted({p for _, a, b in intervalos for p in (a, b) if math.isfinite(p)})
+        # Segmentos: (-inf, p0), [p0], (p0, p1), [p1], ..., (p_m-1, +inf)
+        total = 2 * len(self.pontos) + 1
+        entram = [0] * (total + 1)
+        saem = [0] * (total + 1)
+        for bit, minimo, maximo in intervalos:
+            entram[self._segmento(minimo)] |= 1 << bit
+            saem[self._segmento(maximo) + 1] |= 1 << bit
+
+        self.mascaras = []
+        ativas = 0
+        for i in range(total):
+            ativas = (ativas & ~saem[i]) | entram[i]
+            self.mascaras.append(ativas)
+
+    def _segmento(self, valor: float) -> int:
+        if valor == -math.inf:
+            return 0
+        if valor == math.inf:
+            return 2 * len(self.pontos)
+        i = bisect.bisect_left(self.pontos, valor)
+        return 2 * i + 1 if i < len(self.pontos) and self.pontos[i] == valor else 2 * i
+
+    def query(self, valor: float) -> int:
+        """Máscara dos intervalos que contêm o valor."""
+        return self.mascaras[self._segmento(valor)]
+
+    def __len__(self) -> int:
+        return len(self.pontos)
+
+
+class RangeRuleEngine:
+    """
+    Motor para regras com termos categóricos e faixas numéricas, com a mesma
+    interface (e a mesma saída) de InferenceEngine sobre rules_from_json.
+    """
+
+    def __init__(self, dados: Dict[str, Any], prioridade: List[str] = None):
+        """
+        Args:
+            dados: Conteúdo de um rules.json (com ou sem faixas numéricas)
+            prioridade: Ordem dos pets (padrão: "priority" do JSON ou PRIORIDADE_ANIMAIS)
+        """
+        prioridade = prioridade or dados.get("priority", PRIORIDADE_ANIMAIS)
+        self._posicao = {pet: i for i, pet in enumerate(prioridade)}
+        self.nomes: List[str] = []
+        self.consequencias: List[List[str]] = []
+
+        categoricas: Dict[str, Dict[str, int]] = {}
+        restritas: Dict[str, int] = {}
+        intervalos: Dict[str, List[Tuple[int, float, float]]] = {}
+        for bit, regra in enumerate(dados.get("rules", [])):
+            termos, faixas = split_conditions(regra.get("conditions", {}))
+            self.nomes.append(regra["name"])
+            self.consequencias.append(list(regra.get("consequences", [])))
+            for atributo, valores in termos:
+                restritas[atributo] = restritas.get(atributo, 0) | 1 << bit
+                por_valor = categoricas.setdefault(atributo, {})
+                for valor in valores:
+                    por_valor[valor] = por_valor.get(valor, 0) | 1 << bit
+            for atributo, minimo, maximo in faixas:
+                restritas[atributo] = restritas.get(atributo, 0) | 1 << bit
+                intervalos.setdefault(atributo, []).append((bit, minimo, maximo))
+
+        todas = (1 << len(self.nomes)) - 1
+        # Regras sem restrição no atributo passam por ele com qualquer valor
+        self._livres = {a: todas & ~m for a, m in restritas.items()}
+        self._categoricas = categoricas
+        self._indices = {a: IntervalIndex(lista) for a, lista in intervalos.items()}
+        self._todas = todas
+
+    def candidates(self, fatos: Dict[str, Any]) -> int:
+        """Máscara das regras satisfeitas pelos fatos."""
+        mascara = self._todas
+        for atributo, livres in self._livres.items():
+            valor = fatos.get(atributo)
+            aceitas = livres
+            indice = self._indices.get(atributo)
+            if indice is not None:
+                numero = to_number(valor)
+                if numero is not None:
+                    aceitas |= indice.query(numero)
+            por_valor = self._categoricas.get(atributo)
+            if por_valor is not None and isinstance(valor, str):
+                aceitas |= por_valor.get(valor, 0)
+            mascara &= aceitas
+            if not mascara:
+                break
+        return mascara
+
+    def inferir(self, fatos: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        """Mesma interface de InferenceEngine.inferir."""
+        mascara = self.candidates(fatos)
+        recomendacoes = set()
+        regras_disparadas = []
+        while mascara:
+            menor = mascara & -mascara
+            i = menor.bit_length() - 1
+            regras_disparadas.append(self.nomes[i])
+            recomendacoes.update(self.consequencias[i])
+            mascara ^= menor
+
+        posicao = self._posicao
+        return sorted(recomendacoes, key=lambda x: posicao.get(x, 999)), regras_disparadas
+
+    def stats(self) -> Dict[str, Any]:
+        return {"regras": len(self.nomes),
+                "atributos_numericos": {a: len(i) for a, i in self._indices.items()},
+                "atributos_categoricos": sorted(self._categoricas)}
+
+
+def synthetic_range_rules(n: int, pets=PRIORIDADE_ANIMAIS, seed: int = 0) -> Dict[str, Any]:
+    """n regras aleatórias no formato do rules.json, misturando termos e faixas."""
+    rnd = random.Random(seed)
+    regras = []
+    for i in range(n):
+        condicoes: Dict[str, Any] = {}
+        for atributo in rnd.sample(list(DOMINIO_FATOS), rnd.randint(0, 2)):
+            valores = DOMINIO_FATOS[atributo]
+            condicoes[atributo] = rnd.sample(valores, rnd.randint(1, len(valores) - 1))
+        for atributo in rnd.sample(list(ATRIBUTOS_NUMERICOS), rnd.randint(1, 2)):
+            inferior, superior = ATRIBUTOS_NUMERICOS[atributo][1:]
+            a, b = sorted(round(rnd.uniform(inferior, superior), 1) for _ in range(2))
+            faixa = {"min": a, "max": b}
+            if rnd.random() < 0.1:
+                del faixa[rnd.choice(("min", "max"))]
+            condicoes[atributo] = faixa
+        regras.append({"name": f"F{i}", "conditions": condicoes,
+                       "consequences": rnd.sample(pets, rnd.randint(1, 3))})
+    return {"priority": list(pets), "rules": regras}
+
+
+def random_facts(rnd: random.Random) -> Dict[str, Any]:
+    """Fatos aleatórios com atributos categóricos e numéricos (alguns faltando)."""
+    fatos: Dict[str, Any] = {a: rnd.choice(v) for a, v in DOMINIO_FATOS.items()}
+    for atributo, (_, inferior, superior) in ATRIBUTOS_NUMERICOS.items():
+        if rnd.random() < 0.9:
+            fatos[atributo] = round(rnd.uniform(inferior, superior), 1)
+    return fatos
+
+
+if __name__ == "__main__":
+    from .inference_engine import InferenceEngine
+    from .knowledge_loader import rules_from_json
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    consultas = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    dados = synthetic_range_rules(n)
+    referencia = InferenceEngine(rules_from_json(dados), dados["priority"])
+    motor = RangeRuleEngine(dados)
+    rnd = random.Random(1)
+    perfis = [random_facts(rnd) for _ in range(consultas)]
+
+    def medir(inferir) -> Tuple[float, List]:
+        inicio = time.perf_counter()
+        saidas = [inferir(f) for f in perfis]
+        return (time.perf_counter() - inicio) / len(perfis) * 1e6, saidas
+
+    us_ref, saidas_ref = medir(referencia.inferir)
+    us_idx, saidas_idx = medir(motor.inferir)
+    divergencias = sum(a != b for a, b in zip(saidas_ref, saidas_idx))
+    print(f"{n} regras, {consultas} consultas  |  {motor.stats()['atributos_numericos']}")
+    print(f"  InferenceEngine   {us_ref:>10.1f} µs/consulta")
+    print(f"  RangeRuleEngine   {us_idx:>10.1f} µs/consulta  ({us_ref / us_idx:.1f}x)")
+    print(f"  divergências: {divergencias}")
+    sys.exit(1 if divergencias else 0)
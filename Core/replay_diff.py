@@ -0,0 +1,216 @@
+# Core/replay_diff.py
+"""
+Reexecução de perfis históricos em duas versões da base de conhecimento.
+
+Antes de publicar uma mudança no rules.json, mostra quais perfis reais
+receberiam recomendações diferentes. O corpus (JSONL ou o log de auditoria)
+tem muitas linhas mas poucos perfis distintos, então:
+- cada linha JSONL é lida em fluxo e contada pela chave canônica do perfil
+  (Core.log_analytics.profile_key), então a memória acompanha o número de
+  perfis distintos, não o de linhas; no log de auditoria o próprio SQLite
+  agrupa os perfis (GROUP BY);
+- cada perfil distinto é avaliado uma vez em cada versão (em paralelo, em
+  processos, quando há muitos);
+- as diferenças saem em fluxo, uma linha JSON por perfil alterado, com o
+  número de ocorrências no corpus; o resumo conta cada tipo de mudança
+  ponderado pelas ocorrências.
+
+Versões aceitas: "padrao" (REGRAS), um arquivo .json no formato do
+rules.json, ou "repositorio.sqlite:versao" (Core.rule_repository).
+
+Uso: python -m Core.replay_diff <corpus.jsonl|sessoes.sqlite> <antes> <depois> [saida.jsonl] [processos]
+"""
+
+import json
+import sqlite3
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Any, Iterator, IO
+
+from .inference_engine import InferenceEngine
+from .knowledge_base import REGRAS, PRIORIDADE_ANIMAIS
+from .knowledge_loader import load_rules_json, rules_from_json
+from .audit_log import MODO_PARCIAL
+from .log_analytics import profile_key
+
+# Abaixo disso, avaliar no próprio processo é mais barato que iniciar outros
+_MINIMO_PARALELO = 5000
+
+
+def load_version(versao: str) -> InferenceEngine:
+    """Motor de referência para uma versão ("padrao", .json ou banco.sqlite:versao)."""
+    if versao == "padrao":
+        return InferenceEngine(REGRAS, PRIORIDADE_ANIMAIS)
+    if versao.endswith(".json"):
+        dados = load_rules_json(versao)
+        return InferenceEngine(rules_from_json(dados), dados.get("priority", PRIORIDADE_ANIMAIS))
+    caminho, _, nome = versao.rpartition(":")
+    if caminho:
+        from .rule_repository import RuleRepository
+        repositorio = RuleRepository(caminho)
+        try:
+            return InferenceEngine(list(repositorio.load_rules(nome)), repositorio.priority(nome))
+        finally:
+            repositorio.close()
+    raise ValueError(f"Versão da base não reconhecida: {versao}")
+
+
+def _fatos_da_linha(linha: str) -> Dict[str, str]:
+    dados = json.loads(linha)
+    if not isinstance(dados, dict) or dados.get("modo") == MODO_PARCIAL:
+        return {}
+    # Aceita tanto fatos soltos quanto registros exportados do log ({"fatos": ...})
+    return dados.get("fatos", dados)
+
+
+def unique_profiles(corpus: str) -> Iterator[Tuple[Dict[str, str], int]]:
+    """
+    Perfis distintos do corpus com o número de ocorrências. Registros do
+    questionário adaptativo (fatos parciais) ficam de fora.
+
+    Args:
+        corpus: Arquivo .jsonl (um perfil ou registro por linha) ou o log
+                de auditoria em SQLite
+    """
+    if corpus.endswith(".jsonl"):
+        # Registros exportados trazem id, instante e latência (toda linha é
+        # única): a contagem é pelo perfil, que o domínio limita
+        perfis: Dict[bytes, List] = {}
+        with open(corpus, "r", encoding="utf-8") as f:
+            for linha in f:
+                linha = linha.strip()
+                if not linha:
+                    continue
+                fatos = _fatos_da_linha(linha)
+                chave = profile_key(fatos)
+                if chave in perfis:
+                    perfis[chave][1] += 1
+                else:
+                    perfis[chave] = [fatos, 1]
+        for fatos, n in perfis.values():
+            if fatos:
+                yield fatos, n
+        return
+
+    conexao = sqlite3.connect(corpus)
+    try:
+        # O log grava os fatos já canônicos, então o texto identifica o perfil
+        for fatos, n in conexao.execute("SELECT fatos, COUNT(*) FROM sessoes WHERE modo != ?"
+                                        " GROUP BY fatos", (MODO_PARCIAL,)):
+            yield json.loads(fatos), n
+    finally:
+        conexao.close()
+
+
+def _comparar(antes: Tuple[List[str], List[str]], depois: Tuple[List[str], List[str]]) -> List[str]:
+    """Mudanças entre duas saídas de inferir(), como rótulos ("+Gato", "-R3", ...)."""
+    mudancas = []
+    (recs_a, regras_a), (recs_d, regras_d) = antes, depois
+    if recs_a and not recs_d:
+        mudancas.append("novo_vazio")
+    elif recs_d and not recs_a:
+        mudancas.append("deixou_de_ser_vazio")
+    if recs_a != recs_d:
+        a, d = set(recs_a), set(recs_d)
+        mudancas += [f"+pet:{p}" for p in recs_d if p not in a]
+        mudancas += [f"-pet:{p}" for p in recs_a if p not in d]
+        if a == d:
+            mudancas.append("ordem_recomendacoes")
+    if regras_a != regras_d:
+        a, d = set(regras_a), set(regras_d)
+        mudancas += [f"+regra:{r}" for r in regras_d if r not in a]
+        mudancas += [f"-regra:{r}" for r in regras_a if r not in d]
+    return mudancas
+
+
+# Motores carregados em cada processo de avaliação
+_MOTORES = None
+
+
+def _carregar_versoes(antes: str, depois: str):
+    global _MOTORES
+    _MOTORES = (load_version(antes), load_version(depois))
+
+
+def _avaliar_lote(lote: List[Tuple[Dict[str, str], int]]) -> List[Dict[str, Any]]:
+    motor_antes, motor_depois = _MOTORES
+    diferencas = []
+    for fatos, n in lote:
+        saida_antes = motor_antes.inferir(fatos)
+        saida_depois = motor_depois.inferir(fatos)
+        if saida_antes != saida_depois:
+            diferencas.append({
+                "fatos": fatos,
+                "ocorrencias": n,
+                "antes": {"recomendacoes": saida_antes[0], "regras": saida_antes[1]},
+                "depois": {"recomendacoes": saida_depois[0], "regras": saida_depois[1]},
+                "mudancas": _comparar(saida_antes, saida_depois),
+            })
+    return diferencas
+
+
+def replay(corpus: str, antes: str, depois: str, saida: IO[str] = None,
+           processos: int = 1, tamanho_lote: int = 1000) -> Dict[str, Any]:
+    """
+    Compara duas versões da base sobre os perfis do corpus.
+
+    Args:
+        corpus: Arquivo .jsonl ou log de auditoria (.sqlite)
+        antes, depois: Versões a comparar (ver load_version)
+        saida: Arquivo onde cada perfil alterado é escrito como uma linha JSON
+        processos: Processos usados na avaliação (só quando há muitos perfis)
+        tamanho_lote: Perfis distintos por tarefa
+
+    Returns:
+        Resumo com linhas, perfis distintos, perfis e linhas alterados e a
+        contagem de cada mudança (ponderada pelas ocorrências)
+    """
+    perfis = list(unique_profiles(corpus))
+    lotes = [perfis[i:i + tamanho_lote] for i in range(0, len(perfis), tamanho_lote)]
+
+    resumo = {"linhas": sum(n for _, n in perfis), "perfis_distintos": len(perfis),
+              "perfis_alterados": 0, "linhas_alteradas": 0, "mudancas": Counter()}
+
+    if processos > 1 and len(perfis) >= _MINIMO_PARALELO:
+        executor = ProcessPoolExecutor(processos, initializer=_carregar_versoes, initargs=(antes, depois))
+        resultados = executor.map(_avaliar_lote, lotes)
+    else:
+        executor = None
+        _carregar_versoes(antes, depois)
+        resultados = map(_avaliar_lote, lotes)
+
+    try:
+        for diferencas in resultados:
+            for diferenca in diferencas:
+                resumo["perfis_alterados"] += 1
+                resumo["linhas_alteradas"] += diferenca["ocorrencias"]
+                for mudanca in diferenca["mudancas"]:
+                    resumo["mudancas"][mudanca] += diferenca["ocorrencias"]
+                if saida is not None:
+                    saida.write(json.dumps(diferenca, ensure_ascii=False) + "\n")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return resumo
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Uso: python -m Core.replay_diff <corpus.jsonl|sessoes.sqlite> <antes> <depois>"
+              " [saida.jsonl] [processos]")
+        sys.exit(1)
+
+    corpus, antes, depois = sys.argv[1:4]
+    processos = int(sys.argv[5]) if len(sys.argv) > 5 else 1
+    if len(sys.argv) > 4 and sys.argv[4] != "-":
+        with open(sys.argv[4], "w", encoding="utf-8") as arquivo:
+            resumo = replay(corpus, antes, depois, arquivo, processos)
+    else:
+        resumo = replay(corpus, antes, depois, sys.stdout, processos)
+
+    print(f"\nLinhas: {resumo['linhas']}  |  perfis distintos: {resumo['perfis_distintos']}", file=sys.stderr)
+    print(f"Perfis alterados: {resumo['perfis_alterados']}  |  linhas alteradas: {resumo['linhas_alteradas']}",
+          file=sys.stderr)
+    for mudanca, n in resumo["mudancas"].most_common():
+        print(f"  {mudanca:<45} {n:>10}", file=sys.stderr)
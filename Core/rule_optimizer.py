@@ -0,0 +1,407 @@
+# Core/rule_optimizer.py
+"""
+Otimizador da base de regras (tempo de compilação).
+
+Avalia cada regra sobre todo o domínio declarado dos fatos (ESQUEMA) e,
+a partir das tabelas-verdade, identifica:
+- regras mortas (nunca disparam dentro do domínio);
+- regras subsumidas (sempre disparam junto com outra que já entrega as
+  mesmas consequências);
+- consequências redundantes (pets sempre entregues por outra regra);
+- grupos de regras mescláveis (mesmas consequências).
+
+Também produz um conjunto minimizado de regras: o espaço de perfis é
+particionado pelo conjunto de regras disparadas e cada partição é coberta por
+cubos obtidos com uma fusão no estilo Quine–McCluskey (multivalorada). Cada
+cubo guarda a saída já pronta (recomendações e nomes originais das regras
+disparadas), então a inferência se reduz a achar o único cubo que casa.
+"""
+
+import hashlib
+import itertools
+from typing import Dict, List, Tuple, Any
+
+from .inference_engine import InferenceEngine
+from .knowledge_base import REGRAS, PRIORIDADE_ANIMAIS
+from .fact_schema import FactSchema, ESQUEMA
+
+
+def _hash_codigo(h, codigo):
+    """Acrescenta ao hash o conteúdo (não o endereço) de um code object."""
+    h.update(codigo.co_code)
+    h.update(repr(codigo.co_names).encode())
+    for const in codigo.co_consts:
+        if hasattr(const, "co_code"):
+            _hash_codigo(h, const)
+        else:
+            h.update(repr(const).encode())
+
+
+def rules_fingerprint(regras=REGRAS, esquema: FactSchema = ESQUEMA,
+                      prioridade=PRIORIDADE_ANIMAIS) -> str:
+    """
+    Impressão digital da base de regras: muda quando nomes, condições
+    (bytecode e valores capturados), consequências, prioridades ou o domínio
+    mudam. Usada para invalidar estruturas compiladas em cache.
+    """
+    h = hashlib.sha256()
+    h.update(repr(sorted(esquema.valores.items())).encode())
+    h.update(repr(list(prioridade)).encode())
+    for regra in regras:
+        _hash_regra(h, regra)
+    return h.hexdigest()
+
+
+def rule_fingerprint(regra) -> str:
+    """Impressão digital de uma única regra (nome, condição e consequências)."""
+    h = hashlib.sha256()
+    _hash_regra(h, regra)
+    return h.hexdigest()
+
+
+def _hash_regra(h, regra):
+    nome, condicao, consequencias = regra
+    h.update(nome.encode())
+    h.update(repr(list(consequencias)).encode())
+    codigo = getattr(condicao, "__code__", None)
+    if codigo is None:
+        h.update(repr(condicao).encode())
+        return
+    _hash_codigo(h, codigo)
+    h.update(repr(getattr(condicao, "__defaults__", None)).encode())
+    for celula in getattr(condicao, "__closure__", None) or ():
+        h.update(repr(celula.cell_contents).encode())
+
+
+def _tabela_verdade(regras, perfis: List[Dict[str, str]]) -> Dict[str, int]:
+    """
+    Avalia cada regra em todos os perfis.
+
+    Returns:
+        Dicionário nome_regra -> bitset (int) com o bit i ligado quando a
+        regra dispara no perfil i. Erros na condição contam como "não dispara",
+        como no motor de inferência.
+    """
+    tabela = {}
+    for nome, condicao, _ in regras:
+        bits = 0
+        for i, fatos in enumerate(perfis):
+            try:
+                if condicao(fatos):
+                    bits |= 1 << i
+            except Exception:
+                pass
+        tabela[nome] = bits
+    return tabela
+
+
+def _implicantes_primos(mintermos: List[Tuple[int, ...]],
+                        tamanhos: List[int]) -> List[Tuple[int, ...]]:
+    """
+    Gera os implicantes primos de uma função multivalorada (Quine–McCluskey).
+
+    Cada cubo é uma tupla com, por atributo, uma máscara dos índices de valor
+    aceitos. Dois cubos que diferem em um único atributo são fundidos pela
+    união das máscaras nesse atributo, até não haver novas fusões.
+    """
+    cubos = {tuple(1 << v for v in m) for m in mintermos}
+    nivel = set(cubos)
+    n = len(tamanhos)
+
+    while nivel:
+        novos = set()
+        for i in range(n):
+            grupos: Dict[Tuple[int, ...], set] = {}
+            for c in cubos:
+                grupos.setdefault(c[:i] + c[i + 1:], set()).add(c[i])
+            for c in nivel:
+                chave = c[:i] + c[i + 1:]
+                for outra in grupos[chave]:
+                    uniao = c[i] | outra
+                    if uniao != c[i] and uniao != outra:
+                        cubo = c[:i] + (uniao,) + c[i + 1:]
+                        if cubo not in cubos:
+                            novos.add(cubo)
+        cubos |= novos
+        nivel = novos
+
+    # Primo: nenhum valor pode ser acrescentado a nenhum atributo
+    primos = []
+    for c in cubos:
+        expansivel = False
+        for i, tam in enumerate(tamanhos):
+            for v in range(tam):
+                if not c[i] >> v & 1 and c[:i] + (c[i] | 1 << v,) + c[i + 1:] in cubos:
+                    expansivel = True
+                    break
+            if expansivel:
+                break
+        if not expansivel:
+            primos.append(c)
+    return primos
+
+
+def _cobertura(primos: List[Tuple[int, ...]], alvo: int,
+               indice_cubo) -> List[Tuple[int, ...]]:
+    """
+    Escolhe primos que cobrem o bitset alvo: primeiro os essenciais, depois
+    gulosamente o que cobre mais perfis ainda descobertos.
+    """
+    cobre = {p: indice_cubo(p) for p in primos}
+    escolhidos = []
+    restante = alvo
+
+    # Primos essenciais: únicos a cobrir algum perfil
+    bit = 1
+    while bit <= restante:
+        if restante & bit:
+            candidatos = [p for p in primos if cobre[p] & bit]
+            if len(candidatos) == 1 and candidatos[0] not in escolhidos:
+                escolhidos.append(candidatos[0])
+                restante &= ~cobre[candidatos[0]]
+        bit <<= 1
+
+    while restante:
+        melhor = max(primos, key=lambda p: bin(cobre[p] & restante).count("1"))
+        escolhidos.append(melhor)
+        restante &= ~cobre[melhor]
+    return escolhidos
+
+
+class RuleBaseOptimizer:
+    """
+    Analisa e minimiza uma base de regras no formato de REGRAS
+    (nome, condição, consequências) dentro de um domínio finito de fatos.
+    """
+
+    def __init__(self, regras=REGRAS, esquema: FactSchema = ESQUEMA):
+        self.regras = list(regras)
+        self.esquema = esquema
+        self.atributos = esquema.atributos
+        self.tamanhos = esquema.tamanhos
+        self.passos = esquema.passos
+        self.perfis = esquema.all_profiles()
+        self.verdade = _tabela_verdade(self.regras, self.perfis)
+        self.consequencias = {nome: list(cons) for nome, _, cons in self.regras}
+        self._coberturas: Dict[int, List[Tuple[int, ...]]] = {}
+
+    # --- Análise -------------------------------------------------------
+
+    def dead_rules(self) -> List[str]:
+        """Regras que não disparam para nenhum perfil do domínio."""
+        return [nome for nome, _, _ in self.regras if not self.verdade[nome]]
+
+    def subsumed_rules(self) -> List[Tuple[str, str]]:
+        """
+        Pares (A, B) em que A só dispara quando B dispara e as consequências
+        de A já estão contidas nas de B — A é redundante para as recomendações.
+        """
+        pares = []
+        for a, _, cons_a in self.regras:
+            va = self.verdade[a]
+            if not va:
+                continue
+            for b, _, cons_b in self.regras:
+                if a != b and va & ~self.verdade[b] == 0 and set(cons_a) <= set(cons_b):
+                    pares.append((a, b))
+        return pares
+
+    def implications(self) -> List[Tuple[str, str]]:
+        """Pares (A, B) em que o disparo de A implica o disparo de B."""
+        return [(a, b) for a, _, _ in self.regras for b, _, _ in self.regras
+                if a != b and self.verdade[a] and self.verdade[a] & ~self.verdade[b] == 0]
+
+    def redundant_consequences(self) -> Dict[str, List[str]]:
+        """
+        Para cada regra, os pets que ela recomenda mas que sempre são
+        recomendados por outra regra quando ela dispara.
+        """
+        redundantes = {}
+        for a, _, cons_a in self.regras:
+            va = self.verdade[a]
+            if not va:
+                continue
+            for pet in cons_a:
+                outras = 0
+                for b, _, cons_b in self.regras:
+                    if b != a and pet in cons_b:
+                        outras |= self.verdade[b]
+                if va & ~outras == 0:
+                    redundantes.setdefault(a, []).append(pet)
+        return redundantes
+
+    def mergeable_groups(self) -> List[Dict[str, Any]]:
+        """
+        Grupos de regras vivas com o mesmo conjunto de consequências, com a
+        quantidade de cubos antes e depois da fusão das condições.
+        """
+        grupos: Dict[frozenset, List[str]] = {}
+        for nome, _, cons in self.regras:
+            if self.verdade[nome]:
+                grupos.setdefault(frozenset(cons), []).append(nome)
+
+        resultado = []
+        for cons, nomes in grupos.items():
+            if len(nomes) < 2:
+                continue
+            uniao = 0
+            cubos_separados = 0
+            for nome in nomes:
+                uniao |= self.verdade[nome]
+                cubos_separados += len(self._cobrir(self.verdade[nome]))
+            resultado.append({
+                "regras": nomes,
+                "consequencias": sorted(cons),
+                "cubos_separados": cubos_separados,
+                "cubos_mesclados": len(self._cobrir(uniao)),
+            })
+        return resultado
+
+    def report(self) -> Dict[str, Any]:
+        """Relatório completo da análise da base de regras."""
+        return {
+            "total_regras": len(self.regras),
+            "total_perfis": len(self.perfis),
+            "regras_mortas": self.dead_rules(),
+            "regras_subsumidas": self.subsumed_rules(),
+            "implicacoes": self.implications(),
+            "consequencias_redundantes": self.redundant_consequences(),
+            "grupos_mesclaveis": self.mergeable_groups(),
+        }
+
+    # --- Minimização ---------------------------------------------------
+
+    def _mintermo(self, indice: int) -> Tuple[int, ...]:
+        return tuple((indice // passo) % tam for passo, tam in zip(self.passos, self.tamanhos))
+
+    def _perfis_do_cubo(self, cubo: Tuple[int, ...]) -> int:
+        """Bitset dos índices de perfis cobertos por um cubo."""
+        valores = [[v for v in range(tam) if mascara >> v & 1]
+                   for mascara, tam in zip(cubo, self.tamanhos)]
+        bits = 0
+        for combinacao in itertools.product(*valores):
+            bits |= 1 << sum(v * p for v, p in zip(combinacao, self.passos))
+        return bits
+
+    def _cobrir(self, alvo: int) -> List[Tuple[int, ...]]:
+        """Cobertura mínima (aproximada) de um bitset de perfis por cubos primos."""
+        if not alvo:
+            return []
+        # Regras diferentes costumam ter a mesma tabela-verdade
+        if alvo not in self._coberturas:
+            mintermos = [self._mintermo(i) for i in range(len(self.perfis)) if alvo >> i & 1]
+            primos = _implicantes_primos(mintermos, self.tamanhos)
+            self._coberturas[alvo] = _cobertura(primos, alvo, self._perfis_do_cubo)
+        return self._coberturas[alvo]
+
+    def rule_cubes(self) -> List[Tuple[str, List[Tuple[int, ...]], List[str]]]:
+        """
+        Forma declarativa das regras: (nome, cubos, consequências), em que os
+        cubos cobrem exatamente os perfis em que a regra dispara. Regras
+        mortas aparecem com a lista de cubos vazia.
+        """
+        return [(nome, self._cobrir(self.verdade[nome]), list(cons))
+                for nome, _, cons in self.regras]
+
+    def _mascara_one_hot(self, cubo: Tuple[int, ...]) -> int:
+        mascara = 0
+        for valores, desloc in zip(cubo, self.esquema.deslocamentos):
+            mascara |= valores << desloc
+        return mascara
+
+    def describe_cube(self, cubo: Tuple[int, ...]) -> Dict[str, List[str]]:
+        """Condições legíveis de um cubo (atributos irrestritos são omitidos)."""
+        descricao = {}
+        for atributo, mascara, tam in zip(self.atributos, cubo, self.tamanhos):
+            if mascara != (1 << tam) - 1:
+                descricao[atributo] = [v for i, v in enumerate(self.esquema.valores[atributo])
+                                       if mascara >> i & 1]
+        return descricao
+
+    def minimize(self) -> List[Tuple[Tuple[int, ...], List[str], List[str]]]:
+        """
+        Produz a base minimizada: lista de (cubo, recomendações, regras_disparadas).
+
+        Os perfis são agrupados pela assinatura (conjunto de regras disparadas);
+        perfis sem nenhuma regra disparada não geram cubos. Os cubos de
+        assinaturas diferentes são disjuntos, portanto no máximo um casa com
+        um perfil. As saídas vêm do próprio InferenceEngine, o que garante a
+        mesma ordem de recomendações e de regras disparadas.
+        """
+        referencia = InferenceEngine(self.regras)
+        nomes = [nome for nome, _, _ in self.regras if self.verdade[nome]]
+
+        classes: Dict[Tuple[str, ...], int] = {}
+        for i in range(len(self.perfis)):
+            assinatura = tuple(n for n in nomes if self.verdade[n] >> i & 1)
+            if assinatura:
+                classes[assinatura] = classes.get(assinatura, 0) | 1 << i
+
+        minimizadas = []
+        for assinatura, bits in classes.items():
+            representante = self.perfis[(bits & -bits).bit_length() - 1]
+            recs, disparadas = referencia.inferir(representante)
+            for cubo in self._cobrir(bits):
+                minimizadas.append((cubo, recs, disparadas))
+        return minimizadas
+
+
+class MinimizedEngine:
+    """
+    Motor de inferência sobre a base minimizada.
+
+    Mesma interface de InferenceEngine.inferir. Recebe preferencialmente um
+    EncodedFacts (já validado pelo esquema); fatos fora do domínio declarado
+    (atributos ausentes ou valores desconhecidos) são avaliados pelas regras
+    originais, preservando o comportamento do motor de referência.
+    """
+
+    def __init__(self, regras=REGRAS, esquema: FactSchema = ESQUEMA):
+        otimizador = RuleBaseOptimizer(regras, esquema)
+        self.esquema = esquema
+        self.regras_minimizadas = otimizador.minimize()
+        self.referencia = InferenceEngine(regras)
+
+        universo = (1 << esquema.total_bits) - 1
+        # Para casar basta que o perfil não tenha nenhum bit fora do cubo
+        self._tabela = [(universo & ~otimizador._mascara_one_hot(cubo), recs, disparadas)
+                        for cubo, recs, disparadas in self.regras_minimizadas]
+
+    def inferir(self, fatos: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        perfil, _ = self.esquema.try_encode(fatos, estrito=True)
+        if perfil is None:
+            return self.referencia.inferir(fatos)
+
+        bits = perfil.bits
+        for proibidos, recs, disparadas in self._tabela:
+            if not bits & proibidos:
+                return list(recs), list(disparadas)
+        return [], []
+
+
+if __name__ == "__main__":
+    otimizador = RuleBaseOptimizer()
+    relatorio = otimizador.report()
+
+    print(f"Regras: {relatorio['total_regras']} | Perfis no domínio: {relatorio['total_perfis']}")
+    print(f"\nRegras mortas: {', '.join(relatorio['regras_mortas']) or 'nenhuma'}")
+
+    print("\nRegras subsumidas (A é redundante dada B):")
+    for a, b in relatorio["regras_subsumidas"]:
+        print(f"  {a}  ⊆  {b}")
+    if not relatorio["regras_subsumidas"]:
+        print("  nenhuma")
+
+    print("\nConsequências redundantes:")
+    for regra, pets in relatorio["consequencias_redundantes"].items():
+        print(f"  {regra}: {', '.join(pets)}")
+
+    print("\nGrupos mescláveis (mesmas consequências):")
+    for grupo in relatorio["grupos_mesclaveis"]:
+        print(f"  {', '.join(grupo['regras'])} -> {', '.join(grupo['consequencias'])} "
+              f"({grupo['cubos_separados']} cubos -> {grupo['cubos_mesclados']})")
+
+    minimizadas = otimizador.minimize()
+    print(f"\nBase minimizada: {len(minimizadas)} cubos")
+    for cubo, recs, disparadas in minimizadas:
+        print(f"  {otimizador.describe_cube(cubo)} -> {recs} [{', '.join(disparadas)}]")
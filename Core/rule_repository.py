@@ -0,0 +1,277 @@
+# Core/rule_repository.py
+"""
+Repositório de regras em SQLite (opcional).
+
+Alternativa ao rules.json para catálogos grandes mantidos por várias
+equipes. Cada versão do catálogo guarda suas regras e sua prioridade; além
+da tabela de regras há tabelas de índice por termo (atributo, valor) e por
+consequência, de modo que só as regras que podem casar com os fatos de uma
+consulta saem do banco — sem carregar o catálogo inteiro.
+
+Uma regra casa quando todos os atributos que ela restringe aceitam o valor
+informado. Como cada (regra, atributo, valor) é uma linha de termos, isso
+equivale a "número de termos que casam com os fatos = número de atributos
+da regra", uma agregação que o SQLite resolve pelo índice (atributo, valor).
+
+RepositoryEngine tem a mesma interface de InferenceEngine.inferir e guarda em
+cache (LRU) a fatia de regras carregada para cada combinação de respostas.
+"""
+
+import json
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Any, Iterator, Callable
+
+from .knowledge_base import PRIORIDADE_ANIMAIS
+from .knowledge_loader import load_rules_json, normalize_conditions, compile_condition
+
+_ESQUEMA_SQL = """
+CREATE TABLE IF NOT EXISTS versoes (
+    versao      TEXT PRIMARY KEY,
+    prioridade  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS regras (
+    id            INTEGER PRIMARY KEY,
+    versao        TEXT NOT NULL REFERENCES versoes(versao) ON DELETE CASCADE,
+    ordem         INTEGER NOT NULL,
+    nome          TEXT NOT NULL,
+    condicoes     TEXT NOT NULL,
+    consequencias TEXT NOT NULL,
+    explicacao    TEXT,
+    n_atributos   INTEGER NOT NULL,
+    UNIQUE (versao, nome)
+);
+CREATE TABLE IF NOT EXISTS termos (
+    regra_id  INTEGER NOT NULL REFERENCES regras(id) ON DELETE CASCADE,
+    atributo  TEXT NOT NULL,
+    valor     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS consequencias (
+    regra_id  INTEGER NOT NULL REFERENCES regras(id) ON DELETE CASCADE,
+    pet       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_regras_versao ON regras (versao, ordem);
+CREATE INDEX IF NOT EXISTS idx_termos_atributo_valor ON termos (atributo, valor, regra_id);
+CREATE INDEX IF NOT EXISTS idx_termos_regra ON termos (regra_id);
+CREATE INDEX IF NOT EXISTS idx_consequencias_pet ON consequencias (pet, regra_id);
+CREATE INDEX IF NOT EXISTS idx_consequencias_regra ON consequencias (regra_id);
+"""
+
+
+class RuleRepository:
+    """
+    Catálogo de regras versionado num banco SQLite.
+    """
+
+    def __init__(self, caminho: str = ":memory:"):
+        """
+        Args:
+            caminho: Arquivo do banco (":memory:" para um banco temporário)
+        """
+        self.caminho = caminho
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA foreign_keys = ON")
+        self.conexao.executescript(_ESQUEMA_SQL)
+
+    def close(self):
+        self.conexao.close()
+
+    # --- Importação / exportação ---------------------------------------
+
+    def import_json(self, data: Dict[str, Any] = None, versao: str = "padrao") -> int:
+        """
+        Importa regras no formato do rules.json, substituindo a versão se ela
+        já existir.
+
+        Args:
+            data: Conteúdo do rules.json (None = DataBase/rules.json)
+            versao: Nome da versão do catálogo
+
+        Returns:
+            Número de regras importadas
+        """
+        if data is None:
+            data = load_rules_json()
+        with self.conexao:
+            self.conexao.execute("DELETE FROM versoes WHERE versao = ?", (versao,))
+            self.conexao.execute(
+                "INSERT INTO versoes (versao, prioridade) VALUES (?, ?)",
+                (versao, json.dumps(data.get("priority", PRIORIDADE_ANIMAIS), ensure_ascii=False)))
+
+            total = 0
+            for ordem, regra in enumerate(data.get("rules", [])):
+                condicoes = regra.get("conditions", {})
+                termos = normalize_conditions(condicoes)
+                consequencias = list(regra.get("consequences", []))
+                cursor = self.conexao.execute(
+                    "INSERT INTO regras (versao, ordem, nome, condicoes, consequencias, explicacao, n_atributos)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (versao, ordem, regra["name"], json.dumps(condicoes, ensure_ascii=False),
+                     json.dumps(consequencias, ensure_ascii=False), regra.get("explanation"), len(termos)))
+                regra_id = cursor.lastrowid
+                self.conexao.executemany(
+                    "INSERT INTO termos (regra_id, atributo, valor) VALUES (?, ?, ?)",
+                    [(regra_id, atributo, valor) for atributo, valores in termos for valor in valores])
+                self.conexao.executemany(
+                    "INSERT INTO consequencias (regra_id, pet) VALUES (?, ?)",
+                    [(regra_id, pet) for pet in dict.fromkeys(consequencias)])
+                total += 1
+        return total
+
+    def export_json(self, versao: str = "padrao") -> Dict[str, Any]:
+        """Exporta uma versão no formato do rules.json."""
+        regras = []
+        for nome, condicoes, consequencias, explicacao in self.conexao.execute(
+                "SELECT nome, condicoes, consequencias, explicacao FROM regras"
+                " WHERE versao = ? ORDER BY ordem", (versao,)):
+            regra = {"name": nome, "conditions": json.loads(condicoes),
+                     "consequences": json.loads(consequencias)}
+            if explicacao is not None:
+                regra["explanation"] = explicacao
+            regras.append(regra)
+        return {"priority": self.priority(versao), "rules": regras}
+
+    # --- Consultas -----------------------------------------------------
+
+    def versions(self) -> List[str]:
+        return [v for (v,) in self.conexao.execute("SELECT versao FROM versoes ORDER BY versao")]
+
+    def priority(self, versao: str = "padrao") -> List[str]:
+        linha = self.conexao.execute("SELECT prioridade FROM versoes WHERE versao = ?", (versao,)).fetchone()
+        if linha is None:
+            raise KeyError(f"Versão não encontrada no repositório: {versao}")
+        return json.loads(linha[0])
+
+    def attributes(self, versao: str = "padrao") -> List[str]:
+        """Atributos restringidos por alguma regra da versão."""
+        return [a for (a,) in self.conexao.execute(
+            "SELECT DISTINCT t.atributo FROM termos t JOIN regras r ON r.id = t.regra_id"
+            " WHERE r.versao = ? ORDER BY t.atributo", (versao,))]
+
+    def _linhas_para_regras(self, cursor) -> Iterator[Tuple[str, Callable, List[str]]]:
+        for nome, condicoes, consequencias in cursor:
+            yield (nome, compile_condition(normalize_conditions(json.loads(condicoes))),
+                   json.loads(consequencias))
+
+    def load_rules(self, versao: str = "padrao") -> Iterator[Tuple[str, Callable, List[str]]]:
+        """Todas as regras da versão no formato de REGRAS, lidas do cursor sob demanda."""
+        return self._linhas_para_regras(self.conexao.execute(
+            "SELECT nome, condicoes, consequencias FROM regras WHERE versao = ? ORDER BY ordem",
+            (versao,)))
+
+    def candidate_rules(self, fatos: Dict[str, str],
+                        versao: str = "padrao") -> Iterator[Tuple[str, Callable, List[str]]]:
+        """
+        Regras da versão que podem casar com os fatos, na ordem do catálogo,
+        no formato de REGRAS e lidas do cursor sob demanda.
+        """
+        pares = [(a, v) for a, v in fatos.items() if isinstance(v, str)]
+        filtro = " OR ".join(["(t.atributo = ? AND t.valor = ?)"] * len(pares)) or "0"
+        parametros = [x for par in pares for x in par]
+        # Os termos casados são contados só entre as regras da própria versão
+        return self._linhas_para_regras(self.conexao.execute(
+            f"""
+            SELECT r.nome, r.condicoes, r.consequencias FROM regras r
+            LEFT JOIN (
+                SELECT t.regra_id, COUNT(*) AS casados
+                FROM termos t JOIN regras rv ON rv.id = t.regra_id
+                WHERE rv.versao = ? AND ({filtro}) GROUP BY t.regra_id
+            ) c ON c.regra_id = r.id
+            WHERE r.versao = ? AND (r.n_atributos = 0 OR c.casados = r.n_atributos)
+            ORDER BY r.ordem
+            """, (versao, *parametros, versao)))
+
+    def rules_for_pet(self, pet: str, versao: str = "padrao") -> List[str]:
+        """Nomes das regras da versão que recomendam o pet (índice de consequências)."""
+        return [n for (n,) in self.conexao.execute(
+            "SELECT r.nome FROM consequencias c JOIN regras r ON r.id = c.regra_id"
+            " WHERE c.pet = ? AND r.versao = ? ORDER BY r.ordem", (pet, versao))]
+
+    def stats(self) -> Dict[str, int]:
+        """Quantidade de versões, regras e linhas de índice no banco."""
+        def contar(tabela: str) -> int:
+            return self.conexao.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+
+        return {"versoes": contar("versoes"), "regras": contar("regras"),
+                "termos": contar("termos"), "consequencias": contar("consequencias")}
+
+
+class RepositoryEngine:
+    """
+    Motor que carrega do repositório só as regras candidatas de cada consulta.
+    """
+
+    def __init__(self, repositorio: RuleRepository, versao: str = "padrao",
+                 tamanho_cache: int = 1024):
+        """
+        Args:
+            repositorio: Repositório de onde as regras são lidas
+            versao: Versão do catálogo usada pelo motor
+            tamanho_cache: Máximo de fatias de regras mantidas em memória
+        """
+        self.repositorio = repositorio
+        self.versao = versao
+        self.tamanho_cache = tamanho_cache
+        self._posicao = {pet: i for i, pet in enumerate(repositorio.priority(versao))}
+        # Só os atributos que alguma regra restringe influenciam a fatia
+        self._atributos = tuple(repositorio.attributes(versao))
+        self._cache: "OrderedDict[Tuple, List]" = OrderedDict()
+        self.acertos = 0
+        self.faltas = 0
+
+    def _fatia(self, fatos: Dict[str, str]) -> List[Tuple[str, Callable, List[str]]]:
+        # Valores que não são texto nunca casam um termo (candidate_rules os ignora)
+        chave = tuple(v if isinstance(v, str) else None for v in map(fatos.get, self._atributos))
+        fatia = self._cache.get(chave)
+        if fatia is not None:
+            self._cache.move_to_end(chave)
+            self.acertos += 1
+            return fatia
+
+        self.faltas += 1
+        fatia = list(self.repositorio.candidate_rules(
+            {a: v for a, v in zip(self._atributos, chave) if v is not None}, self.versao))
+        self._cache[chave] = fatia
+        if len(self._cache) > self.tamanho_cache:
+            self._cache.popitem(last=False)
+        return fatia
+
+    def inferir(self, fatos: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """Mesma interface de InferenceEngine.inferir."""
+        recomendacoes = set()
+        regras_disparadas = []
+        for nome_regra, condicao, consequencia in self._fatia(fatos):
+            if condicao(fatos):
+                regras_disparadas.append(nome_regra)
+                recomendacoes.update(consequencia)
+
+        posicao = self._posicao
+        return sorted(recomendacoes, key=lambda x: posicao.get(x, 999)), regras_disparadas
+
+    def clear_cache(self):
+        """Descarta as fatias em cache (ex.: depois de reimportar a versão)."""
+        self._cache.clear()
+
+
+if __name__ == "__main__":
+    # Uso: python -m Core.rule_repository <banco.sqlite> import|export [versao] [rules.json]
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[2] not in ("import", "export"):
+        print("Uso: python -m Core.rule_repository <banco.sqlite> import|export [versao] [rules.json]")
+        sys.exit(1)
+
+    repositorio = RuleRepository(sys.argv[1])
+    versao = sys.argv[3] if len(sys.argv) > 3 else "padrao"
+    arquivo = sys.argv[4] if len(sys.argv) > 4 else None
+    if sys.argv[2] == "import":
+        total = repositorio.import_json(load_rules_json(arquivo), versao)
+        print(f"{total} regras importadas na versão {versao}")
+    else:
+        dados = json.dumps(repositorio.export_json(versao), ensure_ascii=False, indent=2)
+        if arquivo:
+            with open(arquivo, "w", encoding="utf-8") as f:
+                f.write(dados)
+        else:
+            print(dados)
+    repositorio.close()
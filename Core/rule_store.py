@@ -0,0 +1,452 @@
+# Core/rule_store.py
+"""
+Armazenamento compacto de regras em colunas.
+
+Na representação de REGRAS cada regra é uma tupla com uma string, uma função
+(com suas células e tuplas capturadas) e uma lista de strings: algumas
+centenas de bytes por regra, quase tudo custo fixo de objetos Python. Aqui a
+base inteira vive em poucos buffers contíguos:
+
+- nomes: um único bytearray UTF-8 e os deslocamentos de cada nome;
+- condições: cada regra é um ou mais cubos, guardados como a máscara one-hot
+  dos valores proibidos (um perfil satisfaz o cubo se bits & proibidos == 0);
+- consequências: um bitset por regra sobre a tabela de pets.
+
+O custo por regra cai para poucas dezenas de bytes. A memória para 10^4 a
+10^6 regras sintéticas é medida com: python -m Core.rule_store
+
+As mesmas colunas podem ser gravadas numa imagem binária versionada
+(save_image) e abertas com mmap (open_image): as colunas viram memoryviews
+sobre o arquivo, sem desserialização. Processos que abrem a mesma imagem
+compartilham uma única cópia física pelo cache de páginas do sistema.
+
+Formato da imagem (little-endian, seções alinhadas em 8 bytes):
+    cabeçalho: "SEPETRUL", versão do formato (H), reservado (H),
+               número de regras (I) e (deslocamento, tamanho) em Q de cada
+               seção, na ordem de _SECOES
+    meta: JSON com versão das regras, pets, prioridade e domínio
+    inicio_nome, inicio_cubos: array de I (n + 1 posições)
+    proibidos, consequencias: array de Q
+    nomes: bytes UTF-8 concatenados
+"""
+
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+import tracemalloc
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Iterable, Iterator, Callable, Any
+
+from .knowledge_base import REGRAS, PRIORIDADE_ANIMAIS
+from .knowledge_loader import Termo, normalize_conditions, compile_condition
+from .fact_schema import FactSchema, ESQUEMA
+
+
+_MAGICO = b"SEPETRUL"
+_VERSAO_FORMATO = 1
+_SECOES = ("meta", "inicio_nome", "inicio_cubos", "proibidos", "consequencias", "nomes")
+_CABECALHO = struct.Struct("<8sHHI" + "QQ" * len(_SECOES))
+
+
+def _acrescentar(coluna, valor: int):
+    """Acrescenta a uma coluna array('Q'); vira lista se o valor não couber."""
+    try:
+        coluna.append(valor)
+        return coluna
+    except OverflowError:
+        coluna = list(coluna)
+        coluna.append(valor)
+        return coluna
+
+
+class CompactRuleStore:
+    """
+    Base de regras em colunas paralelas, indexadas pela posição da regra.
+    """
+
+    def __init__(self, esquema: FactSchema = ESQUEMA, prioridade=PRIORIDADE_ANIMAIS):
+        self.esquema = esquema
+        self.prioridade = tuple(prioridade)
+        self._posicao = {pet: i for i, pet in enumerate(self.prioridade)}
+
+        # Tabela de pets: bit i do bitset de consequências = pets[i]
+        self.pets: List[str] = []
+        self._bit_pet: Dict[str, int] = {}
+
+        # Identificação da versão das regras (gravada na imagem binária)
+        self.versao = ""
+        # Mapeamento da imagem binária, quando aberta com open_image()
+        self._mapa = None
+
+        self._nomes = bytearray()
+        self._inicio_nome = array("I", [0])
+        self._proibidos = array("Q")
+        self._inicio_cubos = array("I", [0])
+        self._consequencias = array("Q")
+
+        # Deslocamento e máscara one-hot completa de cada atributo
+        self._deslocamentos = dict(zip(esquema.atributos, esquema.deslocamentos))
+        self._segmentos = {
+            atributo: ((1 << tam) - 1) << desloc
+            for atributo, tam, desloc in zip(esquema.atributos, esquema.tamanhos, esquema.deslocamentos)
+        }
+
+    # --- Construção ----------------------------------------------------
+
+    def append(self, nome: str, proibidos: Iterable[int], consequencias: Iterable[str]):
+        """
+        Acrescenta uma regra.
+
+        Args:
+            nome: Nome da regra
+            proibidos: Máscara de valores proibidos de cada cubo (vazio = regra morta)
+            consequencias: Pets recomendados
+        """
+        if self._mapa is not None:
+            raise TypeError("Base aberta de uma imagem binária é somente leitura")
+        self._nomes += nome.encode("utf-8")
+        self._inicio_nome.append(len(self._nomes))
+
+        for mascara in proibidos:
+            self._proibidos = _acrescentar(self._proibidos, mascara)
+        self._inicio_cubos.append(len(self._proibidos))
+
+        bits = 0
+        for pet in consequencias:
+            bit = self._bit_pet.get(pet)
+            if bit is None:
+                bit = self._bit_pet[pet] = len(self.pets)
+                self.pets.append(pet)
+            bits |= 1 << bit
+        self._consequencias = _acrescentar(self._consequencias, bits)
+
+    def terms_mask(self, termos: Iterable[Termo]) -> int:
+        """
+        Máscara de valores proibidos de uma conjunção de termos
+        (atributo, valores aceitos). Valores fora do domínio são ignorados.
+
+        Raises:
+            ValueError: se algum atributo não pertence ao esquema
+        """
+        proibidos = 0
+        for atributo, valores in termos:
+            segmento = self._segmentos.get(atributo)
+            if segmento is None:
+                raise ValueError(f"Atributo desconhecido: {atributo}")
+            codigos = self.esquema.codigos_estritos[atributo]
+            desloc = self._deslocamentos[atributo]
+            aceitos = 0
+            for valor in valores:
+                codigo = codigos.get(valor)
+                if codigo is not None:
+                    aceitos |= 1 << (desloc + codigo)
+            proibidos |= segmento & ~aceitos
+        return proibidos
+
+    @classmethod
+    def from_terms(cls, regras: Iterable[Tuple[str, Iterable[Termo], Iterable[str]]],
+                   esquema: FactSchema = ESQUEMA, prioridade=PRIORIDADE_ANIMAIS) -> "CompactRuleStore":
+        """Constrói a partir de (nome, termos, consequências), sem criar funções."""
+        store = cls(esquema, prioridade)
+        for nome, termos, consequencias in regras:
+            store.append(nome, [store.terms_mask(termos)], consequencias)
+        return store
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], esquema: FactSchema = ESQUEMA) -> "CompactRuleStore":
+        """Constrói a partir do conteúdo de um rules.json."""
+        return cls.from_terms(
+            ((r["name"], normalize_conditions(r.get("conditions", {})), r.get("consequences", []))
+             for r in data.get("rules", [])),
+            esquema, data.get("priority", PRIORIDADE_ANIMAIS))
+
+    @classmethod
+    def from_rules(cls, regras=REGRAS, esquema: FactSchema = ESQUEMA,
+                   prioridade=PRIORIDADE_ANIMAIS) -> "CompactRuleStore":
+        """
+        Constrói a partir de regras em lambda, usando os cubos calculados por
+        RuleBaseOptimizer (exato para fatos dentro do domínio).
+        """
+        from .rule_optimizer import RuleBaseOptimizer
+        otimizador = RuleBaseOptimizer(regras, esquema)
+        completo = (1 << esquema.total_bits) - 1
+        store = cls(esquema, prioridade)
+        for nome, cubos, consequencias in otimizador.rule_cubes():
+            store.append(nome, [completo & ~otimizador._mascara_one_hot(c) for c in cubos],
+                         consequencias)
+        return store
+
+    # --- Acesso --------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._inicio_nome) - 1
+
+    def name(self, i: int) -> str:
+        return str(self._nomes[self._inicio_nome[i]:self._inicio_nome[i + 1]], "utf-8")
+
+    def cubes(self, i: int) -> List[int]:
+        return list(self._proibidos[self._inicio_cubos[i]:self._inicio_cubos[i + 1]])
+
+    def consequences(self, i: int) -> List[str]:
+        bits = self._consequencias[i]
+        return [pet for b, pet in enumerate(self.pets) if bits >> b & 1]
+
+    def rules(self) -> Iterator[Tuple[str, Callable, List[str]]]:
+        """Regras no formato de REGRAS, materializadas sob demanda."""
+        for i in range(len(self)):
+            cubos = self.cubes(i)
+            yield (self.name(i),
+                   lambda f, cubos=cubos: any(self._bits(f) & c == 0 for c in cubos),
+                   self.consequences(i))
+
+    def _bits(self, fatos: Dict[str, str]) -> int:
+        """
+        Máscara one-hot dos fatos. Um atributo ausente ou fora do domínio liga
+        o segmento inteiro, o que reprova qualquer termo sobre ele.
+        """
+        perfil, _ = self.esquema.try_encode(fatos, estrito=True)
+        if perfil is not None:
+            return perfil.bits
+        bits = 0
+        for atributo, desloc in zip(self.esquema.atributos, self.esquema.deslocamentos):
+            valor = fatos.get(atributo)
+            codigo = self.esquema.codigos_estritos[atributo].get(valor) if isinstance(valor, str) else None
+            bits |= self._segmentos[atributo] if codigo is None else 1 << (desloc + codigo)
+        return bits
+
+    def inferir(self, fatos: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """Mesma interface de InferenceEngine.inferir, varrendo as colunas."""
+        bits = self._bits(fatos)
+        proibidos = self._proibidos
+        inicio = self._inicio_cubos
+        disparadas = []
+        saida = 0
+        for i in range(len(self)):
+            for j in range(inicio[i], inicio[i + 1]):
+                if not bits & proibidos[j]:
+                    disparadas.append(i)
+                    saida |= self._consequencias[i]
+                    break
+
+        posicao = self._posicao
+        recomendacoes = sorted((pet for b, pet in enumerate(self.pets) if saida >> b & 1),
+                               key=lambda x: posicao.get(x, 999))
+        return recomendacoes, [self.name(i) for i in disparadas]
+
+    def nbytes(self) -> int:
+        """Bytes ocupados pelas colunas e pela tabela de pets."""
+        total = 0
+        for coluna in (self._nomes, self._inicio_nome, self._proibidos,
+                       self._inicio_cubos, self._consequencias):
+            total += sys.getsizeof(coluna)
+            if isinstance(coluna, list):
+                total += sum(sys.getsizeof(v) for v in coluna)
+        return total + sum(sys.getsizeof(p) for p in self.pets)
+
+    # --- Imagem binária ------------------------------------------------
+
+    def _dominio(self) -> List[Tuple[str, List[str]]]:
+        return [(a, list(self.esquema.valores[a])) for a in self.esquema.atributos]
+
+    def save_image(self, caminho: str):
+        """
+        Grava a base numa imagem binária. A gravação é atômica: processos que
+        abrem o arquivo durante a escrita continuam vendo a imagem anterior.
+
+        Raises:
+            ValueError: se alguma máscara ou bitset não couber em 64 bits
+        """
+        colunas = {"inicio_nome": self._inicio_nome, "inicio_cubos": self._inicio_cubos,
+                   "proibidos": self._proibidos, "consequencias": self._consequencias}
+        secoes = {}
+        for nome, coluna in colunas.items():
+            if isinstance(coluna, list):
+                raise ValueError(f"Coluna {nome} não cabe em 64 bits; a imagem não suporta esta base")
+            coluna = array(coluna.typecode, coluna)
+            if sys.byteorder == "big":
+                coluna.byteswap()
+            secoes[nome] = coluna.tobytes()
+        secoes["nomes"] = bytes(self._nomes)
+        secoes["meta"] = json.dumps({
+            "versao": self.versao,
+            "pets": self.pets,
+            "prioridade": list(self.prioridade),
+            "dominio": self._dominio(),
+        }, ensure_ascii=False).encode("utf-8")
+
+        posicoes = []
+        deslocamento = _CABECALHO.size
+        for nome in _SECOES:
+            deslocamento += -deslocamento % 8
+            posicoes += [deslocamento, len(secoes[nome])]
+            deslocamento += len(secoes[nome])
+
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(_CABECALHO.pack(_MAGICO, _VERSAO_FORMATO, 0, len(self), *posicoes))
+            for nome in _SECOES:
+                f.write(b"\0" * (-f.tell() % 8))
+                f.write(secoes[nome])
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def open_image(cls, caminho: str, esquema: FactSchema = ESQUEMA) -> "CompactRuleStore":
+        """
+        Abre uma imagem binária com mmap. Só o cabeçalho e a seção meta são
+        lidos; as colunas são memoryviews sobre o arquivo mapeado.
+
+        Raises:
+            ValueError: se o arquivo não for uma imagem válida, for de outra
+                        versão do formato ou tiver sido gerado para outro domínio
+        """
+        if sys.byteorder != "little":
+            raise ValueError("Imagens binárias só podem ser mapeadas em máquinas little-endian")
+        with open(caminho, "rb") as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        visao = memoryview(mapa)
+        try:
+            if len(mapa) < _CABECALHO.size:
+                raise ValueError(f"Imagem de regras truncada: {caminho}")
+            magico, versao, _, total, *posicoes = _CABECALHO.unpack_from(mapa)
+            if magico != _MAGICO:
+                raise ValueError(f"Arquivo não é uma imagem de regras: {caminho}")
+            if versao != _VERSAO_FORMATO:
+                raise ValueError(f"Versão do formato não suportada: {versao}")
+            secoes = {}
+            for nome, inicio, tamanho in zip(_SECOES, posicoes[::2], posicoes[1::2]):
+                if inicio + tamanho > len(mapa):
+                    raise ValueError(f"Imagem de regras truncada: {caminho}")
+                secoes[nome] = visao[inicio:inicio + tamanho]
+
+            meta = json.loads(str(secoes["meta"], "utf-8"))
+            store = cls(esquema, meta["prioridade"])
+            if [tuple(d) for d in meta["dominio"]] != [tuple(d) for d in store._dominio()]:
+                raise ValueError("Imagem de regras gerada para outro domínio de fatos")
+        except Exception:
+            visao.release()
+            mapa.close()
+            raise
+
+        store.versao = meta["versao"]
+        store.pets = meta["pets"]
+        store._bit_pet = {pet: i for i, pet in enumerate(store.pets)}
+        store._nomes = secoes["nomes"]
+        store._inicio_nome = secoes["inicio_nome"].cast("I")
+        store._inicio_cubos = secoes["inicio_cubos"].cast("I")
+        store._proibidos = secoes["proibidos"].cast("Q")
+        store._consequencias = secoes["consequencias"].cast("Q")
+        store._mapa = (mapa, visao, list(secoes.values()))
+        if len(store) != total:
+            store.close()
+            raise ValueError(f"Imagem de regras inconsistente: {caminho}")
+        return store
+
+    def close(self):
+        """Libera o mapeamento de uma base aberta com open_image()."""
+        if self._mapa is None:
+            return
+        mapa, visao, secoes = self._mapa
+        colunas = (self._inicio_nome, self._inicio_cubos, self._proibidos, self._consequencias)
+        self._nomes = bytearray()
+        self._inicio_nome = array("I", [0])
+        self._inicio_cubos = array("I", [0])
+        self._proibidos = array("Q")
+        self._consequencias = array("Q")
+        for v in (*colunas, *secoes, visao):
+            v.release()
+        mapa.close()
+        self._mapa = None
+
+
+# Base aberta em cada processo de infer_parallel()
+_BASE_DO_PROCESSO = None
+
+
+def _abrir_no_processo(caminho: str):
+    global _BASE_DO_PROCESSO
+    _BASE_DO_PROCESSO = CompactRuleStore.open_image(caminho)
+
+
+def _inferir_lote(lote: List[Dict[str, str]]) -> List[Tuple[List[str], List[str]]]:
+    return [_BASE_DO_PROCESSO.inferir(fatos) for fatos in lote]
+
+
+def infer_parallel(caminho: str, perfis: List[Dict[str, str]], processos: int = None,
+                   tamanho_lote: int = 256) -> List[Tuple[List[str], List[str]]]:
+    """
+    Avalia os perfis em vários processos que mapeiam a mesma imagem binária.
+
+    Args:
+        caminho: Imagem gravada com save_image()
+        perfis: Fatos a avaliar
+        processos: Número de processos (padrão: número de CPUs)
+        tamanho_lote: Perfis enviados a cada processo por vez
+
+    Returns:
+        Uma saída de inferir() por perfil, na ordem recebida
+    """
+    lotes = [[dict(f) for f in perfis[i:i + tamanho_lote]]
+             for i in range(0, len(perfis), tamanho_lote)]
+    with ProcessPoolExecutor(processos, initializer=_abrir_no_processo,
+                             initargs=(caminho,)) as executor:
+        return [saida for parcial in executor.map(_inferir_lote, lotes) for saida in parcial]
+
+
+def synthetic_rules(n: int, esquema: FactSchema = ESQUEMA, pets=PRIORIDADE_ANIMAIS,
+                    seed: int = 0) -> Iterator[Tuple[str, Tuple[Termo, ...], List[str]]]:
+    """Gera n regras aleatórias (nome, termos, consequências) sobre o domínio."""
+    rnd = random.Random(seed)
+    for i in range(n):
+        termos = []
+        for atributo in rnd.sample(esquema.atributos, rnd.randint(1, 4)):
+            valores = esquema.valores[atributo]
+            termos.append((atributo, tuple(sorted(rnd.sample(valores, rnd.randint(1, len(valores) - 1))))))
+        yield f"S{i}", tuple(sorted(termos)), rnd.sample(pets, rnd.randint(1, 3))
+
+
+def memory_report(tamanhos: Iterable[int] = (10 ** 4, 10 ** 5, 10 ** 6)) -> List[Dict[str, float]]:
+    """
+    Compara a memória das regras sintéticas no formato de REGRAS
+    (tuplas com funções compiladas) com a do CompactRuleStore.
+    """
+    def medir(construir):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        objeto = construir()
+        segundos = time.perf_counter() - inicio
+        atual, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return objeto, atual, segundos
+
+    linhas = []
+    for n in tamanhos:
+        tuplas, bytes_tuplas, s_tuplas = medir(lambda: [
+            (nome, compile_condition(termos), list(cons)) for nome, termos, cons in synthetic_rules(n)])
+        del tuplas
+        store, bytes_store, s_store = medir(lambda: CompactRuleStore.from_terms(synthetic_rules(n)))
+        del store
+        linhas.append({
+            "regras": n,
+            "bytes_tuplas": bytes_tuplas,
+            "bytes_compacto": bytes_store,
+            "reducao": bytes_tuplas / bytes_store,
+            "segundos_tuplas": s_tuplas,
+            "segundos_compacto": s_store,
+        })
+    return linhas
+
+
+if __name__ == "__main__":
+    # Uso: python -m Core.rule_store [n ...]
+    tamanhos = [int(a) for a in sys.argv[1:]] or [10 ** 4, 10 ** 5, 10 ** 6]
+    print(f"{'regras':>9} {'tuplas (MB)':>12} {'compacto (MB)':>14} {'B/regra':>14} {'redução':>8}")
+    for linha in memory_report(tamanhos):
+        n = linha["regras"]
+        print(f"{n:>9} {linha['bytes_tuplas'] / 2**20:>12.1f} {linha['bytes_compacto'] / 2**20:>14.2f} "
+              f"{linha['bytes_tuplas'] / n:>6.0f} -> {linha['bytes_compacto'] / n:<4.0f} "
+              f"{linha['reducao']:>7.1f}x")
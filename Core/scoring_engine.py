@@ -0,0 +1,130 @@
+# Core/scoring_engine.py
+"""
+Motor de pontuação (correspondência parcial).
+
+No modo booleano uma regra só contribui quando todas as condições são
+satisfeitas. Aqui cada termo de condição tem um peso (PESOS_TERMOS) e cada
+regra contribui com a fração ponderada dos termos que o perfil satisfaz; a
+pontuação de um pet é a soma das contribuições das regras que o recomendam.
+
+As regras são compiladas em cubos (ver RuleBaseOptimizer.rule_cubes) e os
+pesos em colunas por (atributo, valor): pontuar um perfil é somar seis
+colunas, uma operação vetorizada sobre todas as regras. Os k melhores pets
+saem de um heap limitado, sem ordenar todos os candidatos.
+"""
+
+import heapq
+from array import array
+from typing import Dict, List, Tuple
+
+from .inference_engine import InferenceEngine
+from .knowledge_base import REGRAS, PRIORIDADE_ANIMAIS, PESOS_TERMOS
+from .fact_schema import FactSchema, ESQUEMA
+from .rule_optimizer import RuleBaseOptimizer
+
+
+class ScoringEngine:
+    """
+    Motor de inferência por pontuação ponderada com ranking top-k.
+    """
+
+    def __init__(self, regras=REGRAS, esquema: FactSchema = ESQUEMA,
+                 pesos: Dict[str, float] = PESOS_TERMOS, k: int = 3, limiar: float = 0.0,
+                 prioridade=PRIORIDADE_ANIMAIS):
+        """
+        Args:
+            regras: Regras no formato de REGRAS
+            esquema: Esquema compilado dos fatos
+            pesos: Peso de cada atributo quando ele aparece como termo de uma regra
+            k: Quantidade de pets devolvidos
+            limiar: Pontuação mínima (exclusiva) para um pet entrar no ranking
+            prioridade: Ordem dos pets usada nos empates (a mesma da base de regras)
+        """
+        self.esquema = esquema
+        self.k = k
+        self.limiar = limiar
+        self.referencia = InferenceEngine(regras, prioridade)
+
+        regras_cubos = RuleBaseOptimizer(regras, esquema).rule_cubes()
+        self.nomes_regras = [nome for nome, _, _ in regras_cubos]
+
+        base = array("d")
+        colunas = [[array("d") for _ in range(tam)] for tam in esquema.tamanhos]
+        self._fatias = []
+
+        for nome, cubos, _ in regras_cubos:
+            inicio = len(base)
+            for cubo in cubos:
+                termos = [i for i, (mascara, tam) in enumerate(zip(cubo, esquema.tamanhos))
+                          if mascara != (1 << tam) - 1]
+                total = sum(pesos.get(esquema.atributos[i], 1.0) for i in termos)
+                # Cubo sem termos (ou com peso total zero) sempre pontua 1
+                base.append(0.0 if total else 1.0)
+                for i, tam in enumerate(esquema.tamanhos):
+                    peso = pesos.get(esquema.atributos[i], 1.0) / total if i in termos and total else 0.0
+                    for v in range(tam):
+                        colunas[i][v].append(peso if cubo[i] >> v & 1 else 0.0)
+            self._fatias.append((inicio, len(base)))
+
+        self._base = base
+        self._colunas = colunas
+
+        # Pet -> índices das regras que o recomendam
+        self._regras_por_pet: Dict[str, List[int]] = {}
+        for r, (_, _, consequencias) in enumerate(regras_cubos):
+            for pet in consequencias:
+                self._regras_por_pet.setdefault(pet, []).append(r)
+
+        self._prioridade = {pet: i for i, pet in enumerate(prioridade)}
+
+    def score_rules(self, codigos: Tuple[int, ...]) -> List[float]:
+        """
+        Pontuação de cada regra (0 a 1) para um perfil codificado.
+        Uma regra com vários cubos vale o melhor deles.
+        """
+        vetores = [coluna[c] for coluna, c in zip(self._colunas, codigos)]
+        cubos = list(map(sum, zip(self._base, *vetores)))
+        return [max(cubos[i:j]) if j > i else 0.0 for i, j in self._fatias]
+
+    def rank(self, fatos: Dict[str, str], k: int = None) -> Tuple[List[Tuple[str, float]], List[str]]:
+        """
+        Ranking dos pets por pontuação.
+
+        Args:
+            fatos: Fatos do usuário (de preferência já codificados pelo esquema)
+            k: Quantidade de pets (padrão: self.k)
+
+        Returns:
+            Tupla (ranking, regras_completas):
+            - ranking: lista de (pet, pontuação), da maior para a menor pontuação;
+              empates seguem a prioridade do motor
+            - regras_completas: regras com todas as condições satisfeitas
+
+        Raises:
+            ValueError: se os fatos não forem válidos para o esquema
+        """
+        perfil = self.esquema.encode(fatos)
+        pontuacao_regras = self.score_rules(perfil.codigos)
+
+        candidatos = []
+        for pet, indices in self._regras_por_pet.items():
+            pontos = sum(pontuacao_regras[r] for r in indices)
+            if pontos > self.limiar:
+                candidatos.append((pontos, -self._prioridade.get(pet, 999), pet))
+
+        melhores = heapq.nlargest(k or self.k, candidatos)
+        ranking = [(pet, pontos) for pontos, _, pet in melhores]
+        completas = [nome for nome, p in zip(self.nomes_regras, pontuacao_regras) if p >= 1.0 - 1e-9]
+        return ranking, completas
+
+    def inferir(self, fatos: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """
+        Mesma interface de InferenceEngine.inferir: devolve os k melhores pets
+        (por pontuação) e as regras completamente satisfeitas. Fatos fora do
+        domínio são avaliados pelo motor booleano de referência.
+        """
+        perfil, _ = self.esquema.try_encode(fatos, estrito=True)
+        if perfil is None:
+            return self.referencia.inferir(fatos)
+        ranking, completas = self.rank(perfil)
+        return [pet for pet, _ in ranking], completas
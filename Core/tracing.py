@@ -0,0 +1,224 @@
+# Core/tracing.py
+"""
+Spans de rastreamento entre as camadas (GUI -> Controller -> motores).
+
+Cada span tem nome, início, duração, atributos e o span pai; o span corrente
+é guardado numa ContextVar, então a relação pai/filho acompanha a chamada
+(também no uso sem interface gráfica). Cada thread começa com um contexto
+vazio: trabalho enviado a um pool (ThreadPoolExecutor) só fica sob o span de
+quem o enviou se rodar numa cópia do contexto, com
+executor.submit(contextvars.copy_context().run, funcao, ...), como faz
+Core.fact_providers; sem isso os spans da thread viram raízes de outro trace. Os spans
+terminados vão para um buffer circular em memória e podem ser exportados
+para JSON Lines ou para o formato de eventos do Chrome (chrome://tracing,
+Perfetto).
+
+Desligado (o padrão), span() devolve sempre o mesmo objeto nulo e
+@traced chama a função direto: o custo é uma checagem de flag.
+
+Uso: python -m Core.tracing <trace.jsonl>   (resumo por nome de span)
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any
+
+# Span corrente do contexto (None fora de qualquer span)
+_ATUAL: contextvars.ContextVar = contextvars.ContextVar("span_atual", default=None)
+
+
+class Span:
+    """Um intervalo medido; use como gerenciador de contexto."""
+
+    __slots__ = ("nome", "atributos", "trace_id", "span_id", "pai_id", "thread",
+                 "inicio_ns", "duracao_ns", "erro", "_rastreador", "_token")
+
+    def __init__(self, rastreador: "Tracer", nome: str, atributos: Dict[str, Any]):
+        self._rastreador = rastreador
+        self.nome = nome
+        self.atributos = atributos
+        self.erro = None
+        self.duracao_ns = None
+
+    def set(self, **atributos):
+        """Acrescenta atributos (ex.: tamanho do resultado) antes de o span terminar."""
+        self.atributos.update(atributos)
+
+    def __enter__(self) -> "Span":
+        pai = _ATUAL.get()
+        self.span_id = next(self._rastreador._ids)
+        if pai is None:
+            self.trace_id, self.pai_id = self.span_id, None
+        else:
+            self.trace_id, self.pai_id = pai.trace_id, pai.span_id
+        self.thread = threading.get_ident()
+        self._token = _ATUAL.set(self)
+        self.inicio_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, tipo, erro, tb):
+        self.duracao_ns = time.perf_counter_ns() - self.inicio_ns
+        if erro is not None:
+            self.erro = repr(erro)
+        _ATUAL.reset(self._token)
+        self._rastreador._buffer.append(self)
+        return False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"nome": self.nome, "trace_id": self.trace_id, "span_id": self.span_id,
+                "pai_id": self.pai_id, "thread": self.thread,
+                "inicio_us": self._rastreador._epoca_us(self.inicio_ns),
+                "duracao_us": self.duracao_ns / 1000.0, "atributos": self.atributos, "erro": self.erro}
+
+
+class _SpanNulo:
+    """Span de quando o rastreamento está desligado: não mede nada."""
+
+    __slots__ = ()
+
+    def set(self, **atributos):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, erro, tb):
+        return False
+
+
+_NULO = _SpanNulo()
+
+
+class Tracer:
+    """
+    Coletor de spans com buffer circular em memória.
+    """
+
+    def __init__(self, capacidade: int = 100_000):
+        """
+        Args:
+            capacidade: Máximo de spans guardados (os mais antigos saem primeiro)
+        """
+        self.ativo = False
+        self._buffer: deque = deque(maxlen=capacidade)
+        self._ids = itertools.count(1)
+        # Relógio de parede correspondente ao zero de perf_counter_ns
+        self._origem_ns = time.time_ns() - time.perf_counter_ns()
+
+    def _epoca_us(self, perf_ns: int) -> float:
+        return (self._origem_ns + perf_ns) / 1000.0
+
+    def enable(self):
+        self.ativo = True
+
+    def disable(self):
+        self.ativo = False
+
+    def span(self, nome: str, **atributos):
+        """Novo span filho do span corrente (ou raiz de um novo trace)."""
+        if not self.ativo:
+            return _NULO
+        return Span(self, nome, atributos)
+
+    def spans(self) -> List[Dict[str, Any]]:
+        """Spans terminados, na ordem em que terminaram."""
+        return [s.as_dict() for s in list(self._buffer)]
+
+    def clear(self):
+        self._buffer.clear()
+
+    def export_jsonl(self, caminho: str) -> int:
+        """Grava um span por linha; devolve a quantidade gravada."""
+        spans = self.spans()
+        with open(caminho, "w", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s, ensure_ascii=False) + "\n")
+        return len(spans)
+
+    def export_chrome(self, caminho: str) -> int:
+        """Grava no formato de eventos do Chrome (eventos completos, "ph": "X")."""
+        spans = self.spans()
+        pid = os.getpid()
+        eventos = [{"name": s["nome"], "cat": "sepet", "ph": "X", "ts": s["inicio_us"],
+                    "dur": s["duracao_us"], "pid": pid, "tid": s["thread"],
+                    "args": {**s["atributos"], "trace_id": s["trace_id"], "span_id": s["span_id"],
+                             "pai_id": s["pai_id"], **({"erro": s["erro"]} if s["erro"] else {})}}
+                   for s in spans]
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, f, ensure_ascii=False, default=str)
+        return len(spans)
+
+    def export(self, caminho: str) -> int:
+        """Exporta em JSON Lines (.jsonl) ou, para qualquer outra extensão, no formato do Chrome."""
+        if caminho.endswith(".jsonl"):
+            return self.export_jsonl(caminho)
+        return self.export_chrome(caminho)
+
+
+# Rastreador do processo
+TRACER = Tracer()
+
+
+def span(nome: str, **atributos):
+    """Span no rastreador do processo (nulo se o rastreamento estiver desligado)."""
+    if not TRACER.ativo:
+        return _NULO
+    return Span(TRACER, nome, atributos)
+
+
+def traced(nome: str):
+    """Decorador: cada chamada da função vira um span com esse nome."""
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not TRACER.ativo:
+                return funcao(*args, **kwargs)
+            with Span(TRACER, nome, {}):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorar
+
+
+def summarize(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Por nome de span: chamadas, tempo total, médio e máximo e tempo próprio
+    (descontados os filhos), em ms, do maior tempo total para o menor.
+    """
+    filhos: Dict[Any, float] = {}
+    for s in spans:
+        if s["pai_id"] is not None:
+            filhos[s["pai_id"]] = filhos.get(s["pai_id"], 0.0) + s["duracao_us"]
+    por_nome: Dict[str, Dict[str, Any]] = {}
+    for s in spans:
+        r = por_nome.setdefault(s["nome"], {"nome": s["nome"], "chamadas": 0, "total_ms": 0.0,
+                                            "maximo_ms": 0.0, "proprio_ms": 0.0})
+        ms = s["duracao_us"] / 1000.0
+        r["chamadas"] += 1
+        r["total_ms"] += ms
+        r["maximo_ms"] = max(r["maximo_ms"], ms)
+        r["proprio_ms"] += ms - filhos.get(s["span_id"], 0.0) / 1000.0
+    for r in por_nome.values():
+        r["medio_ms"] = r["total_ms"] / r["chamadas"]
+    return sorted(por_nome.values(), key=lambda r: -r["total_ms"])
+
+
+def load_jsonl(caminho: str) -> List[Dict[str, Any]]:
+    with open(caminho, "r", encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python -m Core.tracing <trace.jsonl>")
+        sys.exit(1)
+    print(f"{'span':<40} {'chamadas':>9} {'total ms':>10} {'médio ms':>10} {'máx ms':>9} {'próprio ms':>11}")
+    for r in summarize(load_jsonl(sys.argv[1])):
+        print(f"{r['nome']:<40} {r['chamadas']:>9} {r['total_ms']:>10.2f} {r['medio_ms']:>10.3f}"
+              f" {r['maximo_ms']:>9.2f} {r['proprio_ms']:>11.2f}")
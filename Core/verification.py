@@ -0,0 +1,323 @@
+# Core/verification.py
+"""
+Verificação diferencial dos motores de inferência.
+
+Todo motor alternativo (minimizado, árvore de decisão, pontuação, colunas,
+imagem binária, repositório SQLite, diagramas de decisão, faixas numéricas)
+precisa devolver exatamente o mesmo que InferenceEngine.inferir com as regras
+originais: mesmas recomendações, na mesma ordem, e a mesma lista de regras
+disparadas. Este módulo roda todos os motores contra a referência sobre:
+- o domínio declarado inteiro;
+- fatos aleatórios completos, inclusive com grafias alternativas ("Não");
+- fatos parciais (atributos faltando);
+- fatos inválidos (valores desconhecidos, None, números, chaves extras);
+e repete o processo com bases de regras geradas (Core.rule_store.synthetic_rules).
+O motor de faixas numéricas (RangeRuleEngine) também é verificado com bases
+geradas que misturam termos e faixas (Core.range_index.synthetic_range_rules),
+sobre fatos numéricos, textos numéricos ("12,5") e valores não numéricos.
+Bases com fatos de provedores (ex.: DataBase/rules_regiao.json) são
+verificadas quanto às consultas: infer_lazy só pode consultar o provedor de
+um atributo se alguma regra que o lê já casa com as respostas do perfil.
+
+Cada motor é comparado segundo o que ele promete:
+- "completo": a saída inteira, em todos os casos;
+- "regras": só as regras disparadas (o motor de pontuação ordena os pets
+  por correspondência parcial, então as recomendações diferem de propósito);
+- "dominio": a saída inteira, mas só para fatos dentro do domínio (armazéns
+  construídos de regras em lambda com from_rules: os cubos reproduzem as
+  lambdas no domínio, não fora dele, ex.: "Médio" em f.get(...) != "Baixo").
+
+Uso: python -m Core.verification [amostras] [regras_sinteticas ...]
+Sai com código 1 se algum motor divergir.
+"""
+
+import os
+import random
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Any, Callable, Iterator
+
+from .inference_engine import InferenceEngine
+from .knowledge_base import REGRAS, PRIORIDADE_ANIMAIS, ALIASES_VALORES
+from .knowledge_loader import compile_condition, rules_from_json, split_conditions, load_rules_json
+from .fact_schema import FactSchema, ESQUEMA
+from .rule_optimizer import MinimizedEngine
+from .scoring_engine import ScoringEngine
+from .decision_tree import DecisionTree
+from .rule_store import CompactRuleStore, synthetic_rules
+from .rule_repository import RuleRepository, RepositoryEngine
+from .bdd import RuleBDDs
+from .range_index import RangeRuleEngine, synthetic_range_rules, random_facts
+from .fact_providers import infer_lazy
+
+Inferir = Callable[[Dict[str, str]], Tuple[List[str], List[str]]]
+# (função inferir, critério de comparação: "completo", "regras" ou "dominio")
+Motor = Tuple[Inferir, str]
+
+# Valores que nenhum domínio aceita
+_VALORES_INVALIDOS = ("", "talvez", "SIM", "casa ", None, 0, 1.5, ["Sim"])
+
+
+def fact_cases(esquema: FactSchema = ESQUEMA, amostras: int = 1000,
+               semente: int = 0) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Casos de teste (categoria, fatos): o domínio inteiro e `amostras` casos
+    de cada categoria aleatória.
+    """
+    rnd = random.Random(semente)
+    sinonimos = {}
+    for alias, canonico in ALIASES_VALORES.items():
+        sinonimos.setdefault(canonico, []).append(alias)
+
+    for perfil in esquema.all_profiles():
+        yield "dominio", dict(perfil)
+
+    def aleatorio():
+        return {a: rnd.choice(esquema.valores[a]) for a in esquema.atributos}
+
+    for _ in range(amostras):
+        fatos = aleatorio()
+        for a, v in fatos.items():
+            if v in sinonimos and rnd.random() < 0.5:
+                fatos[a] = rnd.choice(sinonimos[v])
+        yield "sinonimos", fatos
+
+    for _ in range(amostras):
+        fatos = aleatorio()
+        for a in rnd.sample(esquema.atributos, rnd.randint(1, len(esquema.atributos))):
+            del fatos[a]
+        yield "parcial", fatos
+
+    for _ in range(amostras):
+        fatos = aleatorio()
+        for a in rnd.sample(esquema.atributos, rnd.randint(1, 3)):
+            fatos[a] = rnd.choice(_VALORES_INVALIDOS)
+        if rnd.random() < 0.3:
+            fatos["extra"] = "Sim"
+        yield "invalido", fatos
+
+
+# Valores de fatos numéricos fora do caminho comum (texto, vírgula, não números)
+_VALORES_NUMERICOS_ESTRANHOS = ("350", "12,5", " 80 ", "abc", "", None, True, float("nan"), ["1"])
+
+
+def range_fact_cases(amostras: int = 1000, semente: int = 0) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Casos (categoria, fatos) para bases com faixas numéricas."""
+    rnd = random.Random(semente)
+    for _ in range(amostras):
+        yield "faixas", random_facts(rnd)
+    for _ in range(amostras):
+        fatos = random_facts(rnd)
+        for a in [a for a, v in fatos.items() if not isinstance(v, str)]:
+            if rnd.random() < 0.5:
+                fatos[a] = rnd.choice(_VALORES_NUMERICOS_ESTRANHOS)
+        yield "faixas_invalidas", fatos
+
+
+def _classificar(esperado, obtido) -> str:
+    (recs_e, regras_e), (recs_o, regras_o) = esperado, obtido
+    if recs_e != recs_o:
+        return "ordem_recomendacoes" if sorted(recs_e) == sorted(recs_o) else "recomendacoes"
+    return "regras_disparadas"
+
+
+def compare_engines(referencia: Inferir, motores: Dict[str, Motor],
+                    casos: List[Tuple[str, Dict[str, Any]]], esquema: FactSchema = ESQUEMA,
+                    exemplos: int = 5) -> Dict[str, Dict[str, Any]]:
+    """
+    Roda cada motor sobre os casos e compara com a referência.
+
+    Returns:
+        Por motor: "criterio", "casos" (comparados), "ignorados" (fora do
+        critério), "divergencias" (total), "por_tipo" (recomendacoes,
+        ordem_recomendacoes, regras_disparadas, excecao) e "exemplos"
+        (até `exemplos` casos divergentes com categoria, fatos, esperado e obtido)
+    """
+    esperados = [referencia(dict(fatos)) for _, fatos in casos]
+    no_dominio = [esquema.try_encode(fatos, estrito=True)[0] is not None for _, fatos in casos]
+    resultado = {}
+    for nome, (inferir, criterio) in motores.items():
+        relatorio = {"criterio": criterio, "casos": 0, "ignorados": 0, "divergencias": 0,
+                     "por_tipo": {}, "exemplos": []}
+        for (categoria, fatos), esperado, dominio in zip(casos, esperados, no_dominio):
+            if criterio == "dominio" and not dominio:
+                relatorio["ignorados"] += 1
+                continue
+            relatorio["casos"] += 1
+            try:
+                obtido = inferir(dict(fatos))
+                obtido = (list(obtido[0]), list(obtido[1]))
+                if criterio == "regras":
+                    tipo = None if obtido[1] == esperado[1] else "regras_disparadas"
+                else:
+                    tipo = None if obtido == esperado else _classificar(esperado, obtido)
+            except Exception as e:
+                obtido, tipo = repr(e), "excecao"
+            if tipo is None:
+                continue
+            relatorio["divergencias"] += 1
+            relatorio["por_tipo"][tipo] = relatorio["por_tipo"].get(tipo, 0) + 1
+            if len(relatorio["exemplos"]) < exemplos:
+                relatorio["exemplos"].append({"categoria": categoria, "fatos": fatos,
+                                              "esperado": esperado, "obtido": obtido})
+        resultado[nome] = relatorio
+    return resultado
+
+
+@contextmanager
+def build_engines(regras, esquema: FactSchema = ESQUEMA, prioridade=PRIORIDADE_ANIMAIS,
+                  dados_json: Dict[str, Any] = None) -> Iterator[Dict[str, Motor]]:
+    """
+    Todos os motores alternativos para as regras dadas, com o critério de
+    comparação de cada um. A imagem binária fica num diretório temporário;
+    na saída do bloco with ela é fechada (mmap) e apagada, e o repositório
+    SQLite é fechado.
+
+    Args:
+        regras: Regras no formato de REGRAS
+        dados_json: Mesmas regras no formato do rules.json (habilita o
+                    armazenamento por termos e o repositório SQLite)
+    """
+    with tempfile.TemporaryDirectory(prefix="sepet_verificacao_") as pasta:
+        abertos = []
+        try:
+            yield _motores(regras, esquema, prioridade, dados_json, pasta, abertos)
+        finally:
+            for recurso in abertos:
+                recurso.close()
+
+
+def _motores(regras, esquema: FactSchema, prioridade, dados_json: Dict[str, Any],
+             pasta: str, abertos: List) -> Dict[str, Motor]:
+    motores = {
+        "minimizado": (MinimizedEngine(regras, esquema).inferir, "completo"),
+        "arvore_decisao": (DecisionTree(regras, esquema).inferir, "completo"),
+        "pontuacao": (ScoringEngine(regras, esquema, prioridade=prioridade).inferir, "regras"),
+        "colunas": (CompactRuleStore.from_rules(regras, esquema, prioridade).inferir, "dominio"),
+        "bdd": (RuleBDDs.from_rules(regras, esquema, prioridade).inferir, "completo"),
+    }
+    if dados_json is not None:
+        motores["colunas_termos"] = (CompactRuleStore.from_json(dados_json, esquema).inferir, "completo")
+        motores["bdd_termos"] = (RuleBDDs.from_json(dados_json, esquema).inferir, "completo")
+        motores["faixas"] = (RangeRuleEngine(dados_json).inferir, "completo")
+        repositorio = RuleRepository()
+        abertos.append(repositorio)
+        repositorio.import_json(dados_json, "verificacao")
+        motores["repositorio_sqlite"] = (RepositoryEngine(repositorio, "verificacao").inferir, "completo")
+
+    imagem = os.path.join(pasta, "regras.img")
+    if dados_json is not None:
+        CompactRuleStore.from_json(dados_json, esquema).save_image(imagem)
+        criterio = "completo"
+    else:
+        CompactRuleStore.from_rules(regras, esquema, prioridade).save_image(imagem)
+        criterio = "dominio"
+    aberta = CompactRuleStore.open_image(imagem, esquema)
+    abertos.append(aberta)
+    motores["imagem_binaria"] = (aberta.inferir, criterio)
+    return motores
+
+
+def synthetic_rule_base(n: int, semente: int = 0):
+    """(regras no formato de REGRAS, mesmas regras no formato do rules.json)."""
+    regras, dados = [], {"priority": list(PRIORIDADE_ANIMAIS), "rules": []}
+    for nome, termos, consequencias in synthetic_rules(n, seed=semente):
+        regras.append((nome, compile_condition(termos), consequencias))
+        dados["rules"].append({"name": nome, "conditions": {a: list(v) for a, v in termos},
+                               "consequences": consequencias})
+    return regras, dados
+
+
+def provider_reads(dados_json: Dict[str, Any], esquema: FactSchema = ESQUEMA,
+                   exemplos: int = 5) -> Dict[str, Dict[str, Any]]:
+    """
+    Conta as consultas a provedores de infer_lazy (sem pool) em cada perfil
+    do domínio. Os provedores são substituídos por contadores que devolvem o
+    primeiro valor aceito pelas regras.
+
+    Returns:
+        {"consultas_lazy": relatório no formato de compare_engines}: cada
+        consulta a um atributo que nenhuma regra casada pelas respostas lê
+        conta como divergência ("consulta_desnecessaria")
+    """
+    regras = []
+    for regra in dados_json.get("rules", []):
+        termos, _ = split_conditions(regra.get("conditions", {}))
+        respostas = [(a, v) for a, v in termos if a in esquema.valores]
+        regras.append((respostas, {a: v for a, v in termos if a not in esquema.valores}))
+    atributos = {}
+    for _, externos in regras:
+        for atributo, valores in externos.items():
+            atributos.setdefault(atributo, valores[0])
+
+    motor = InferenceEngine(rules_from_json(dados_json), dados_json.get("priority", PRIORIDADE_ANIMAIS))
+    relatorio = {"criterio": "consultas", "casos": 0, "ignorados": 0, "divergencias": 0,
+                 "por_tipo": {}, "exemplos": []}
+    for indice in range(esquema.total_perfis):
+        fatos = dict(esquema.from_index(indice))
+        chamadas = []
+        provedores = {a: (lambda sessao, a=a, v=v: chamadas.append(a) or v) for a, v in atributos.items()}
+        infer_lazy(motor, fatos, provedores)
+        permitidos = {a for respostas, externos in regras
+                      if all(fatos.get(a) in v for a, v in respostas) for a in externos}
+        relatorio["casos"] += 1
+        extras = [a for a in chamadas if a not in permitidos]
+        if extras:
+            relatorio["divergencias"] += 1
+            por_tipo = relatorio["por_tipo"]
+            por_tipo["consulta_desnecessaria"] = por_tipo.get("consulta_desnecessaria", 0) + 1
+            if len(relatorio["exemplos"]) < exemplos:
+                relatorio["exemplos"].append({"categoria": "dominio", "fatos": fatos,
+                                              "esperado": sorted(permitidos), "obtido": chamadas})
+    return {"consultas_lazy": relatorio}
+
+
+def verify(amostras: int = 1000, tamanhos_sinteticos=(200, 2000), semente: int = 0) -> Dict[str, Any]:
+    """
+    Verifica todos os motores com REGRAS e com bases sintéticas.
+
+    Returns:
+        Base ("REGRAS", "sinteticas_N", "faixas_N" ou "provedores") ->
+        relatório de compare_engines (ou de provider_reads)
+    """
+    casos = list(fact_cases(ESQUEMA, amostras, semente))
+    relatorios = {}
+    with build_engines(REGRAS) as motores:
+        relatorios["REGRAS"] = compare_engines(InferenceEngine(REGRAS).inferir, motores, casos)
+    for n in tamanhos_sinteticos:
+        regras, dados = synthetic_rule_base(n, semente)
+        with build_engines(regras, dados_json=dados) as motores:
+            relatorios[f"sinteticas_{n}"] = compare_engines(InferenceEngine(regras).inferir, motores, casos)
+
+    # Faixas numéricas: só o RangeRuleEngine entende essas regras
+    casos_faixas = list(range_fact_cases(amostras, semente))
+    for n in tamanhos_sinteticos:
+        dados = synthetic_range_rules(n, seed=semente)
+        referencia = InferenceEngine(rules_from_json(dados), dados["priority"])
+        relatorios[f"faixas_{n}"] = compare_engines(
+            referencia.inferir, {"faixas": (RangeRuleEngine(dados).inferir, "completo")}, casos_faixas)
+
+    # Fatos de provedores: regras que falham nas respostas não consultam
+    regiao = os.path.join(os.path.dirname(os.path.dirname(__file__)), "DataBase", "rules_regiao.json")
+    if os.path.exists(regiao):
+        relatorios["provedores"] = provider_reads(load_rules_json(regiao))
+    return relatorios
+
+
+if __name__ == "__main__":
+    amostras = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    tamanhos = [int(a) for a in sys.argv[2:]] or [200, 2000]
+
+    falhou = False
+    for base, relatorio in verify(amostras, tamanhos).items():
+        print(f"\n== {base}")
+        for motor, r in relatorio.items():
+            estado = "OK" if not r["divergencias"] else f"{r['divergencias']} divergências {r['por_tipo']}"
+            print(f"  {motor:<20} {r['criterio']:<9} {r['casos']:>6} casos  {estado}")
+            for exemplo in r["exemplos"]:
+                print(f"      [{exemplo['categoria']}] {exemplo['fatos']}")
+                print(f"          esperado: {exemplo['esperado']}")
+                print(f"          obtido:   {exemplo['obtido']}")
+            falhou = falhou or bool(r["divergencias"])
+    sys.exit(1 if falhou else 0)
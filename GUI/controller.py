@@ -4,11 +4,22 @@ Controlador da Interface Gráfica
 Faz a ponte entre a GUI e o motor de inferência do sistema especialista.
 """
 
+import threading
+import time
 import tkinter as tk
 from tkinter import messagebox
-from typing import Dict, List, Tuple
-from Core.inference_engine import InferenceEngine
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Union
+from Core.inference_engine import InferenceEngine, RuleSnapshot
 from Core.knowledge_base import PRIORIDADE_ANIMAIS
+from Core.fact_schema import ESQUEMA
+from Core.scoring_engine import ScoringEngine
+from Core.fallback_index import NearestProfileIndex
+from Core.decision_tree import DecisionTree
+from Core.rule_optimizer import rules_fingerprint
+from Core.audit_log import AuditLog, MODO_PARCIAL, default_audit_log
+from Core.tracing import span, traced
+from Core.fact_providers import Provedor, infer_lazy
 
 
 class Controller:
@@ -17,27 +28,89 @@ class Controller:
     Gerencia a comunicação entre a interface gráfica e o motor de inferência,
     processando as entradas do usuário e formatando os resultados para exibição.
     """
+
+    # Mapeia os códigos para descrições amigáveis
+    LABELS_AMIGAVEIS = {
+        'moradia': 'Tipo de moradia',
+        'tam_moradia': 'Tamanho da moradia',
+        'area_moradia': 'Possui área externa',
+        'TempoPasseio': 'Disponibilidade para passeio',
+        'interacao': 'Deseja interação',
+        'investimento': 'Nível de investimento'
+    }
+
+    # Mapeia valores para texto mais legível
+    VALOR_AMIGAVEL = {
+        'Sim': '✓ Sim',
+        'Nao': '✗ Não',
+        'Casa': '🏠 Casa',
+        'Apartamento': '🏢 Apartamento',
+        'Grande': '⬆️ Grande',
+        'Pequeno': '⬇️ Pequeno',
+        'Alto': '💰💰💰 Alto',
+        'Medio': '💰💰 Médio',
+        'Baixo': '💰 Baixo'
+    }
     
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, modo: str = "booleano", auditoria: Union[AuditLog, bool] = None,
+                 snapshot: RuleSnapshot = None, provedores: Dict[str, Provedor] = None):
         """
         Inicializa o controlador.
         
         Args:
             root: Janela raiz do Tkinter
+            modo: "booleano" (padrão, regras tudo-ou-nada) ou "pontuacao"
+                  (correspondência parcial ponderada com ranking top-k)
+            auditoria: Log onde cada análise é registrada; True usa o log
+                       compartilhado em DataBase/sessoes.sqlite. Padrão:
+                       desligado (a GUI liga em start_app)
+            snapshot: Base de regras imutável compartilhada com outros
+                      controladores (padrão: REGRAS). As análises não alteram
+                      estado compartilhado, então várias sessões podem rodar
+                      em threads diferentes sobre o mesmo controlador.
+            provedores: Fatos derivados de fontes locais (atributo -> provedor,
+                        ver Core.fact_providers), buscados só quando uma regra
+                        os lê. As entradas deles (ex.: "cep") vêm junto das
+                        respostas em run_analysis. Só valem no modo booleano;
+                        o questionário adaptativo não os consulta.
         """
+        if modo not in ("booleano", "pontuacao"):
+            raise ValueError(f"Modo de inferência desconhecido: {modo}")
+        if provedores and modo == "pontuacao":
+            raise ValueError("Provedores de fatos não são suportados no modo pontuacao")
         self.root = root
+        self.modo = modo
         # Inicializa o motor de inferência com as regras da base de conhecimento
-        self.motor = InferenceEngine()
+        self.snapshot = snapshot or RuleSnapshot()
+        self.motor = InferenceEngine(self.snapshot)
+        # Motor de pontuação só é compilado quando o modo é usado
+        self.motor_pontuacao = ScoringEngine(self.snapshot.regras, prioridade=self.snapshot.prioridade) if modo == "pontuacao" else None
+        # Índice de perfis cobertos, construído na primeira consulta sem resultado
+        self._indice_vizinhos = None
+        self._trava_indice = threading.Lock()
+        # Esquema compilado dos fatos (validação + codificação)
+        self.esquema = ESQUEMA
+        # Árvore de decisão do questionário adaptativo (em cache enquanto as regras não mudam)
+        self.arvore = DecisionTree.compile(self.motor.regras, self.esquema)
+        # Versão da base de conhecimento gravada em cada registro de auditoria
+        self.versao_base = rules_fingerprint(self.motor.regras, self.esquema, self.motor.prioridade)
+        self.auditoria = default_audit_log() if auditoria is True else auditoria or None
+        # Consultas dos provedores rodam em paralelo num pool criado no primeiro uso
+        self.provedores = provedores or {}
+        self._executor = None
+        self._trava_executor = threading.Lock()
 
+    @traced("Controller.run_analysis")
     def run_analysis(self, facts: Dict[str, str]) -> Tuple[List[str], List[str], str]:
         """
         Executa a análise completa do perfil do usuário.
         
         Este método:
         1. Recebe os fatos coletados do usuário
-        2. Executa a inferência através do motor
-        3. Formata os resultados em texto explicativo
-        4. Retorna recomendações, regras e explicação
+        2. Valida e codifica os fatos com o esquema compilado
+        3. Executa a inferência através do motor
+        4. Formata os resultados em texto explicativo
+        5. Retorna recomendações, regras e explicação
         
         Args:
             facts: Dicionário com os fatos fornecidos pelo usuário
@@ -48,18 +121,181 @@ class Controller:
             - recomendacoes_ordenadas (list): Lista de pets recomendados ordenados por prioridade
             - regras_disparadas (list): Lista de nomes das regras que foram ativadas
             - texto_explicacao (str): Texto formatado com explicação completa
+
+        Raises:
+            ValueError: se os fatos não forem válidos para o esquema
         """
-        # Executa inferência usando o motor
-        recs, regras = self.motor.inferir(facts)
+        inicio = time.perf_counter()
+
+        # Entradas dos provedores (ex.: "cep") não fazem parte do esquema
+        extras = {a: v for a, v in facts.items() if a not in self.esquema.valores} if self.provedores else {}
+
+        # O motor só recebe fatos já validados e codificados
+        with span("FactSchema.encode"):
+            facts = self.esquema.encode(facts)
+
+        # Executa inferência usando o motor do modo configurado
+        pontuacoes = None
+        registrados = facts
+        if self.modo == "pontuacao":
+            with span("ScoringEngine.rank"):
+                ranking, regras = self.motor_pontuacao.rank(facts)
+            recs = [pet for pet, _ in ranking]
+            pontuacoes = dict(ranking)
+        elif self.provedores:
+            with span("InferenceEngine.inferir"):
+                recs, regras, sessao = infer_lazy(self.motor, {**extras, **facts}, self.provedores,
+                                                  self._pool_provedores())
+            # A auditoria guarda as entradas e os fatos resolvidos: a reexecução
+            # do registro não tem os provedores
+            registrados = dict(sessao)
+        else:
+            with span("InferenceEngine.inferir"):
+                recs, regras = self.motor.inferir(facts)
+
+        # Nenhuma regra disparou: mostra as recomendações do perfil coberto mais
+        # próximo, mas o log de auditoria guarda o resultado real (vazio)
+        vizinho = None
+        exibidas = recs
+        if not recs:
+            vizinho = self.nearest_profile(facts)
+            if vizinho is not None:
+                exibidas = vizinho["recomendacoes"]
 
         # Constrói explicação textual formatada
-        texto = self._build_explanation(recs, regras, facts)
+        texto = self._build_explanation(exibidas, regras, facts, pontuacoes, vizinho)
+
+        self._registrar(self.modo, registrados, recs, regras, inicio,
+                        vizinho["perfil"] if vizinho is not None else None)
+        return exibidas, regras, texto
+
+    def _pool_provedores(self) -> ThreadPoolExecutor:
+        """Pool compartilhado pelas sessões para antecipar consultas dos provedores."""
+        if self._executor is None:
+            with self._trava_executor:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=min(8, len(self.provedores)),
+                                                        thread_name_prefix="provedores")
+        return self._executor
+
+    def next_question(self, respostas: Dict[str, str]):
+        """
+        Próxima pergunta mais discriminante dado o que já foi respondido.
+
+        Returns:
+            Nome do atributo a perguntar, ou None se o resultado já está decidido
+        """
+        return self.arvore.next_question(respostas)
+
+    def questions_path(self, respostas: Dict[str, str]) -> List[str]:
+        """Perguntas relevantes para as respostas atuais, na ordem do questionário."""
+        return self.arvore.questions_path(respostas)
+
+    @traced("Controller.run_adaptive_analysis")
+    def run_adaptive_analysis(self, respostas: Dict[str, str]) -> Tuple[List[str], List[str], str]:
+        """
+        Executa a análise a partir de respostas parciais do questionário adaptativo.
+
+        Args:
+            respostas: Respostas dadas até agora (apenas as perguntas feitas)
 
+        Returns:
+            Mesma tupla de run_analysis
+
+        Raises:
+            ValueError: se algum valor for inválido, se ainda faltar uma
+                        pergunta para decidir o resultado ou se o controlador
+                        tem provedores (a árvore só conhece o esquema)
+        """
+        if self.provedores:
+            raise ValueError("O questionário adaptativo não consulta provedores de fatos; use run_analysis")
+        inicio = time.perf_counter()
+        facts = {}
+        for atributo in self.questions_path(respostas):
+            valor = respostas.get(atributo)
+            codigo = self.esquema.codigos[atributo].get(valor)
+            if codigo is None:
+                if not valor:
+                    raise ValueError(f"Campos obrigatórios não preenchidos: {atributo}")
+                raise ValueError(f"Valor inválido para {atributo}: {valor}")
+            facts[atributo] = self.esquema.valores[atributo][codigo]
+
+        with span("DecisionTree.result"):
+            recs, regras = self.arvore.result(facts)
+        texto = self._build_explanation(recs, regras, facts)
+        self._registrar(MODO_PARCIAL, facts, recs, regras, inicio)
         return recs, regras, texto
 
+    def _registrar(self, modo: str, facts: Dict[str, str], recs: List[str],
+                   regras: List[str], inicio: float, vizinho: Dict[str, str] = None):
+        """Envia o registro da análise ao log de auditoria (sem bloquear)."""
+        if self.auditoria is not None:
+            with span("AuditLog.record"):
+                self.auditoria.record(modo, self.versao_base, facts, recs, regras,
+                                      (time.perf_counter() - inicio) * 1000.0, vizinho)
+
+    @traced("Controller.counterfactuals")
+    def counterfactuals(self, facts: Dict[str, str], recomendacoes: List[str],
+                        limite: int = 1) -> List[Tuple[str, List[Dict]]]:
+        """
+        O que mudar nas respostas para receber cada pet não recomendado.
+
+        Args:
+            facts: Fatos da análise (podem ser parciais)
+            recomendacoes: Pets já recomendados (ficam de fora)
+            limite: Alternativas por pet
+
+        Returns:
+            Lista de (pet, alternativas de InferenceEngine.counterfactuals),
+            na ordem de prioridade, só com os pets alcançáveis
+        """
+        saida = []
+        for pet in self.motor.prioridade:
+            if pet in recomendacoes:
+                continue
+            alternativas = self.motor.counterfactuals(pet, facts, limite)
+            if alternativas:
+                saida.append((pet, alternativas))
+        return saida
+
+    def describe_changes(self, mudancas: Dict[str, Tuple]) -> List[str]:
+        """Mudanças de uma alternativa em texto amigável, uma por atributo."""
+        linhas = []
+        for atributo, (atual, valores) in mudancas.items():
+            label = self.LABELS_AMIGAVEIS.get(atributo, atributo)
+            novos = " ou ".join(self.VALOR_AMIGAVEL.get(v, v) for v in valores)
+            if atual is None:
+                linhas.append(f"{label}: responder {novos}")
+            else:
+                linhas.append(f"{label}: {self.VALOR_AMIGAVEL.get(atual, atual)} → {novos}")
+        return linhas
+
+    @traced("Controller.nearest_profile")
+    def nearest_profile(self, facts: Dict[str, str]):
+        """
+        Busca o perfil mais próximo que recebe recomendações.
+
+        Args:
+            facts: Dicionário com os fatos fornecidos pelo usuário
+
+        Returns:
+            Dicionário de NearestProfileIndex.nearest, ou None se nenhum
+            perfil do domínio recebe recomendações
+        """
+        indice = self._indice_vizinhos
+        if indice is None:
+            with self._trava_indice:
+                indice = self._indice_vizinhos
+                if indice is None:
+                    indice = self._indice_vizinhos = NearestProfileIndex(self.motor, self.esquema)
+        return indice.nearest(facts)
+
+    @traced("Controller._build_explanation")
     def _build_explanation(self, recomendacoes: List[str], 
                           regras: List[str], 
-                          facts: Dict[str, str]) -> str:
+                          facts: Dict[str, str],
+                          pontuacoes: Dict[str, float] = None,
+                          vizinho: Dict = None) -> str:
         """
         Constrói texto explicativo detalhado dos resultados.
         
@@ -67,6 +303,8 @@ class Controller:
             recomendacoes: Lista de pets recomendados
             regras: Lista de regras que foram disparadas
             facts: Dicionário com os fatos fornecidos
+            pontuacoes: Pontuação de cada pet (apenas no modo "pontuacao")
+            vizinho: Perfil coberto mais próximo, quando nenhuma regra disparou
         
         Returns:
             String com explicação formatada em seções
@@ -97,6 +335,27 @@ class Controller:
                     texto += f"{i}. {animal}\n"
                 texto += "\n"
 
+            # Seção extra no modo de pontuação: compatibilidade de cada pet
+            if pontuacoes:
+                texto += "📈 PONTUAÇÃO DE COMPATIBILIDADE\n"
+                texto += "━" * 50 + "\n"
+                for animal in recomendacoes:
+                    texto += f"• {animal}: {pontuacoes[animal]:.2f}\n"
+                texto += "\n"
+
+        # Seção extra: recomendações emprestadas do perfil mais próximo
+        if vizinho:
+            texto += "🔎 PERFIL MAIS PRÓXIMO\n"
+            texto += "━" * 50 + "\n"
+            texto += "Nenhuma regra disparou para as suas respostas exatas.\n"
+            texto += "As recomendações acima valem para um perfil parecido,\n"
+            texto += "que difere do seu em:\n"
+            for atributo, seu_valor, valor_vizinho in vizinho["diferencas"]:
+                label = self.LABELS_AMIGAVEIS.get(atributo, atributo)
+                texto += f"• {label}: {seu_valor} → {valor_vizinho}\n"
+            texto += "Regras desse perfil: "
+            texto += ", ".join(r.replace("_", " ").title() for r in vizinho["regras"]) + "\n\n"
+
         # Seção 3: Regras do Sistema Especialista que foram ativadas
         texto += "📋 REGRAS DISPARADAS\n"
         texto += "━" * 50 + "\n"
@@ -112,32 +371,9 @@ class Controller:
         # Seção 4: Resumo do Perfil do Usuário
         texto += "👤 SEU PERFIL\n"
         texto += "━" * 50 + "\n"
-        # Mapeia os códigos para descrições amigáveis
-        labels_amigaveis = {
-            'moradia': 'Tipo de moradia',
-            'tam_moradia': 'Tamanho da moradia',
-            'area_moradia': 'Possui área externa',
-            'TempoPasseio': 'Disponibilidade para passeio',
-            'interacao': 'Deseja interação',
-            'investimento': 'Nível de investimento'
-        }
-        
-        # Mapeia valores para texto mais legível
-        valor_amigavel = {
-            'Sim': '✓ Sim',
-            'Nao': '✗ Não',
-            'Casa': '🏠 Casa',
-            'Apartamento': '🏢 Apartamento',
-            'Grande': '⬆️ Grande',
-            'Pequeno': '⬇️ Pequeno',
-            'Alto': '💰💰💰 Alto',
-            'Medio': '💰💰 Médio',
-            'Baixo': '💰 Baixo'
-        }
-        
         for k, v in facts.items():
-            label = labels_amigaveis.get(k, k)
-            valor = valor_amigavel.get(v, v)
+            label = self.LABELS_AMIGAVEIS.get(k, k)
+            valor = self.VALOR_AMIGAVEL.get(v, v)
             texto += f"• {label}: {valor}\n"
 
         return texto
@@ -261,35 +497,5 @@ class Controller:
             - válido: True se todos os fatos são válidos
             - mensagem_erro: Mensagem explicando o erro (vazia se válido)
         """
-        # Lista de campos obrigatórios
-        campos_obrigatorios = [
-            'moradia', 
-            'tam_moradia', 
-            'area_moradia', 
-            'TempoPasseio', 
-            'interacao', 
-            'investimento'
-        ]
-        
-        # Verifica campos vazios
-        campos_vazios = [campo for campo in campos_obrigatorios 
-                        if not facts.get(campo)]
-        
-        if campos_vazios:
-            return False, f"Campos obrigatórios não preenchidos: {', '.join(campos_vazios)}"
-        
-        # Valida valores permitidos para cada campo
-        valores_validos = {
-            'moradia': ['Casa', 'Apartamento'],
-            'tam_moradia': ['Grande', 'Pequeno'],
-            'area_moradia': ['Sim', 'Nao'],
-            'TempoPasseio': ['Sim', 'Nao'],
-            'interacao': ['Sim', 'Nao'],
-            'investimento': ['Alto', 'Medio', 'Baixo']
-        }
-        
-        for campo, valor in facts.items():
-            if campo in valores_validos and valor not in valores_validos[campo]:
-                return False, f"Valor inválido para {campo}: {valor}"
-        
-        return True, ""
\ No newline at end of file
+        # Campos obrigatórios e valores permitidos vêm do esquema compilado
+        return self.esquema.validate(facts)
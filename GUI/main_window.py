@@ -4,9 +4,44 @@ Sistema Especialista para Recomendação de Pets
 Interface Gráfica Principal - Versão Completa e Funcional
 """
 
+import sys
+import time
+
+# Início da importação da GUI (inclui o Core), para as métricas de inicialização
+_INICIO_IMPORTACAO = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
 from GUI.controller import Controller
+from Core.knowledge_base import DOMINIO_FATOS
+from Core.tracing import TRACER, traced
+from Core.memory_monitor import MONITOR
+
+
+class StartupMetrics:
+    """
+    Tempos da inicialização da aplicação, em milissegundos: importação,
+    construção do controlador e de cada página, e tempo até a primeira
+    pintura da janela (medido desde o início da importação).
+    """
+
+    def __init__(self, inicio: float = None):
+        self.inicio = _INICIO_IMPORTACAO if inicio is None else inicio
+        self.tempos = {"importacao": (_FIM_IMPORTACAO - self.inicio) * 1000.0}
+
+    def record(self, nome: str, desde: float):
+        """Registra a duração de uma etapa iniciada em `desde` (perf_counter)."""
+        self.tempos[nome] = (time.perf_counter() - desde) * 1000.0
+
+    def mark(self, nome: str):
+        """Registra o tempo decorrido desde o início da inicialização."""
+        self.record(nome, self.inicio)
+
+    def report(self) -> dict:
+        return dict(self.tempos)
+
+    def format(self) -> str:
+        return "\n".join(f"{nome:<28} {ms:>9.1f} ms" for nome, ms in self.tempos.items())
 
 
 class App:
@@ -15,14 +50,31 @@ class App:
     Implementa um sistema de navegação entre diferentes telas (frames).
     """
     
-    def __init__(self, root):
+    # Páginas da aplicação; cada uma é construída no primeiro show_frame()
+    PAGINAS = ("HomePage", "QuestionsPage", "ResultPage")
+
+    def __init__(self, root, questionario_adaptativo=False, pre_aquecer=True,
+                 metricas: StartupMetrics = None, ao_inicializar=None, auditoria=None):
         """
         Inicializa a aplicação principal.
         
         Args:
             root: Janela principal do Tkinter
+            questionario_adaptativo: Se True, só exibe as perguntas que ainda
+                                     podem mudar o resultado (árvore de decisão).
+                                     A análise parcial não passa pelo modo de
+                                     pontuação, pelo perfil vizinho nem pelos
+                                     provedores de fatos, então é opcional
+            pre_aquecer: Se True, constrói as outras páginas em segundo plano
+                         (tempo ocioso) depois que a página inicial aparece
+            metricas: Onde registrar os tempos de inicialização
+            ao_inicializar: Função chamada com as métricas quando a página
+                            inicial foi pintada e o pré-aquecimento terminou
+            auditoria: Repassado ao Controller (True liga o log de auditoria padrão)
         """
+        self.metricas = metricas or StartupMetrics()
         self.root = root
+        self.questionario_adaptativo = questionario_adaptativo
         self.root.title("🐾 SE_Pet — Sistema Especialista de Recomendação de Pets")
         
         # Inicia em tela cheia (fullscreen)
@@ -49,28 +101,45 @@ class App:
         self.root.configure(bg=self.colors['background'])
         
         # Inicializa o controlador de lógica
-        self.controller = Controller(root)
+        inicio = time.perf_counter()
+        self.controller = Controller(root, auditoria=auditoria)
+        self.metricas.record("controlador", inicio)
 
         # Container principal que irá conter todas as páginas empilhadas
         self.container = tk.Frame(root, bg=self.colors['background'])
         self.container.pack(fill="both", expand=True)
 
-        # Dicionário para armazenar todas as páginas
+        # Páginas já construídas (as demais são criadas sob demanda)
         self.frames = {}
-        
-        # Cria todas as páginas e as empilha no mesmo espaço
-        for F in (HomePage, QuestionsPage, ResultPage):
-            page_name = F.__name__
-            frame = F(parent=self.container, controller=self, colors=self.colors)
-            self.frames[page_name] = frame
-            frame.place(relx=0, rely=0, relwidth=1, relheight=1)
 
-        # Mostra a página inicial
+        # Mostra a página inicial e mede quando ela é pintada pela primeira vez
         self.show_frame("HomePage")
+        self.frames["HomePage"].bind("<Expose>", self._on_first_paint, add="+")
+        self._pintada = False
+        self._pre_aquecer = pre_aquecer
+        self._ao_inicializar = ao_inicializar
         
         # Variável para armazenar dados de resultado
         self.result_data = None
 
+    def get_frame(self, page_name):
+        """
+        Devolve a página, construindo-a na primeira vez em que é pedida.
+
+        Args:
+            page_name: Nome da classe da página
+        """
+        frame = self.frames.get(page_name)
+        if frame is None:
+            inicio = time.perf_counter()
+            F = _CLASSES_PAGINAS[page_name]
+            frame = F(parent=self.container, controller=self, colors=self.colors)
+            self.frames[page_name] = frame
+            frame.place(relx=0, rely=0, relwidth=1, relheight=1)
+            self.metricas.record(f"pagina:{page_name}", inicio)
+        return frame
+
+    @traced("App.show_frame")
     def show_frame(self, page_name):
         """
         Exibe uma página específica trazendo-a para frente.
@@ -78,9 +147,49 @@ class App:
         Args:
             page_name: Nome da classe da página a ser exibida
         """
-        frame = self.frames[page_name]
+        frame = self.get_frame(page_name)
         frame.tkraise()
+        self._pagina_atual = page_name
+
+    def _on_first_paint(self, event=None):
+        if self._pintada:
+            return
+        self._pintada = True
+        self.metricas.mark("primeira_pintura")
+        if self._pre_aquecer:
+            self.root.after_idle(self._prewarm_next)
+        else:
+            self._startup_done()
+
+    def _prewarm_next(self):
+        """Constrói a próxima página pendente e cede o laço de eventos entre páginas."""
+        pendentes = [p for p in self.PAGINAS if p not in self.frames]
+        if pendentes:
+            self.get_frame(pendentes[0])
+            # Mantém a página atual à frente da recém-construída
+            self.frames[self._pagina_atual].tkraise()
+        if len(pendentes) > 1:
+            self.root.after(1, lambda: self.root.after_idle(self._prewarm_next))
+        else:
+            self.metricas.mark("pre_aquecimento")
+            self._startup_done()
 
+    def _startup_done(self):
+        if self._ao_inicializar is not None:
+            self._ao_inicializar(self.metricas)
+
+    def debug_memory(self) -> dict:
+        """
+        Estado de memória para depuração: amostra completa (Python por
+        subsistema e contagens do Tk) e crescimento entre as renderizações
+        de resultado registradas. Liga o monitor se ainda estiver desligado.
+        """
+        if not MONITOR.ativo:
+            MONITOR.start(raiz=self.root)
+        return {"amostra": MONITOR.snapshot("debug"), "crescimento": MONITOR.render_growth(),
+                "top_alocacoes": MONITOR.top_allocations(10)}
+
+    @traced("App.run_inference_and_show")
     def run_inference_and_show(self, facts):
         """
         Executa a inferência do sistema especialista e exibe os resultados.
@@ -89,16 +198,104 @@ class App:
             facts: Dicionário com os fatos coletados do usuário
         """
         # Executa análise através do controlador
-        recs, regras, explicacao = self.controller.run_analysis(facts)
+        if self.questionario_adaptativo:
+            recs, regras, explicacao = self.controller.run_adaptive_analysis(facts)
+        else:
+            recs, regras, explicacao = self.controller.run_analysis(facts)
         
         # Passa os resultados para a página de resultados
-        result_page = self.frames["ResultPage"]
+        result_page = self.get_frame("ResultPage")
         result_page.set_result(recs, regras, explicacao, facts)
         
         # Exibe a página de resultados
         self.show_frame("ResultPage")
 
 
+class ScrollableArea:
+    """
+    Canvas com barra de rolagem e um frame interno centralizado, usado pelas
+    páginas com conteúdo rolável.
+
+    Cada <Configure> do canvas ou do frame interno só agenda um passe de
+    layout (after_idle); vários eventos seguidos, como os gerados ao criar
+    muitos cards ou ao redimensionar a janela, resultam num único cálculo
+    de bbox e reposicionamento.
+    """
+
+    def __init__(self, parent, colors):
+        # Canvas para scroll
+        self.canvas = tk.Canvas(
+            parent,
+            bg=colors['background'],
+            highlightthickness=0
+        )
+
+        # Scrollbar vertical
+        scrollbar = tk.Scrollbar(parent, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+
+        self.canvas.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        # Frame scrollável CENTRALIZADO
+        self.frame = tk.Frame(self.canvas, bg=colors['background'])
+
+        # Cria a janela no canvas - CENTRALIZADA
+        self.window = self.canvas.create_window(
+            0, 0,  # Será reposicionado no layout
+            window=self.frame,
+            anchor="n"
+        )
+
+        # Contadores para medir a coalescência (eventos recebidos x passes feitos)
+        self.configure_events = 0
+        self.layout_passes = 0
+        self._layout_pendente = None
+
+        self.frame.bind("<Configure>", self.schedule_layout)
+        self.canvas.bind("<Configure>", self.schedule_layout)
+
+        # Scroll funcionando em toda a área, inclusive sobre os elementos internos
+        self.bind_mousewheel(self.canvas)
+        self.bind_mousewheel(self.frame)
+
+    def schedule_layout(self, event=None):
+        """Agenda um passe de layout para quando o Tk estiver ocioso."""
+        self.configure_events += 1
+        if self._layout_pendente is None:
+            self._layout_pendente = self.canvas.after_idle(self._layout)
+
+    def _layout(self):
+        self._layout_pendente = None
+        self.layout_passes += 1
+
+        # Atualiza região de scroll
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+        # Centraliza horizontalmente
+        canvas_width = self.canvas.winfo_width()
+        frame_width = self.frame.winfo_reqwidth()
+        x_position = max(0, (canvas_width - frame_width) // 2)
+
+        self.canvas.coords(self.window, x_position, 0)
+
+    def layout_stats(self):
+        """Eventos <Configure> recebidos e passes de layout feitos desde o último reset."""
+        return {"configure_events": self.configure_events, "layout_passes": self.layout_passes}
+
+    def reset_layout_stats(self):
+        self.configure_events = 0
+        self.layout_passes = 0
+
+    def _on_mousewheel(self, event):
+        self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+
+    def bind_mousewheel(self, widget):
+        """Faz a roda do mouse rolar a área quando o cursor está sobre o widget."""
+        widget.bind("<Enter>", lambda e: self.canvas.bind_all("<MouseWheel>", self._on_mousewheel))
+        widget.bind("<Leave>", lambda e: self.canvas.unbind_all("<MouseWheel>"))
+
+
 class HomePage(tk.Frame):
     """
     Página inicial da aplicação.
@@ -145,7 +342,7 @@ class HomePage(tk.Frame):
         # Subtítulo explicativo
         subtitle = tk.Label(
             content_frame,
-            text="Responda a 6 perguntas simples e descubra qual animal\n"
+            text="Responda a até 6 perguntas simples e descubra qual animal\n"
                  "de estimação combina perfeitamente com seu estilo de vida!",
             font=('Segoe UI', 13),
             fg=self.colors['text_light'],
@@ -242,62 +439,10 @@ class QuestionsPage(tk.Frame):
         main_frame = tk.Frame(self, bg=self.colors['background'])
         main_frame.pack(fill='both', expand=True)
 
-        # Canvas para scroll
-        self.canvas = tk.Canvas(
-            main_frame,
-            bg=self.colors['background'],
-            highlightthickness=0
-        )
-        
-        # Scrollbar vertical
-        scrollbar = tk.Scrollbar(main_frame, orient="vertical", command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-        
-        self.canvas.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
-
-        # Frame scrollável CENTRALIZADO
-        self.scrollable_frame = tk.Frame(self.canvas, bg=self.colors['background'])
-
-        # Cria a janela no canvas - CENTRALIZADA
-        self.canvas_window = self.canvas.create_window(
-            0, 0,  # Será reposicionado no configure
-            window=self.scrollable_frame,
-            anchor="n"
-        )
-
-        # Função para centralizar e configurar scroll
-        def configure_scroll(event=None):
-            # Atualiza região de scroll
-            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-            
-            # Centraliza horizontalmente
-            canvas_width = self.canvas.winfo_width()
-            frame_width = self.scrollable_frame.winfo_reqwidth()
-            x_position = max(0, (canvas_width - frame_width) // 2)
-            
-            self.canvas.coords(self.canvas_window, x_position, 0)
-
-        self.scrollable_frame.bind("<Configure>", configure_scroll)
-        self.canvas.bind("<Configure>", configure_scroll)
-
-        # Scroll SUAVE com mouse wheel
-        def _on_mousewheel(event):
-            self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        
-        def _bind_mousewheel(event):
-            self.canvas.bind_all("<MouseWheel>", _on_mousewheel)
-        
-        def _unbind_mousewheel(event):
-            self.canvas.unbind_all("<MouseWheel>")
-        
-        # Bind do scroll funcionando em toda a página
-        self.canvas.bind("<Enter>", _bind_mousewheel)
-        self.canvas.bind("<Leave>", _unbind_mousewheel)
-        
-        # Também funciona quando o mouse está sobre os elementos internos
-        self.scrollable_frame.bind("<Enter>", _bind_mousewheel)
-        self.scrollable_frame.bind("<Leave>", _unbind_mousewheel)
+        # Área rolável (canvas + frame interno centralizado)
+        self.scroll = ScrollableArea(main_frame, self.colors)
+        self.canvas = self.scroll.canvas
+        self.scrollable_frame = self.scroll.frame
 
         # Container para perguntas (largura fixa)
         questions_container = tk.Frame(
@@ -310,30 +455,35 @@ class QuestionsPage(tk.Frame):
         # Dicionário para armazenar respostas
         self.vars = {}
 
+        # Cards, rótulos e textos de cada pergunta (usados no modo adaptativo)
+        self.cards = {}
+        self.question_labels = {}
+        self.question_texts = {}
+
         # Define todas as perguntas do sistema
         perguntas = [
             ("moradia", "🏠 Qual o tipo de imóvel onde você mora?", 
-             ["Casa", "Apartamento"],
+             DOMINIO_FATOS["moradia"],
              "Importante para determinar o espaço disponível"),
             
             ("tam_moradia", "📏 Qual o tamanho do seu imóvel?", 
-             ["Grande", "Pequeno"],
+             DOMINIO_FATOS["tam_moradia"],
              "Ajuda a identificar pets que se adaptam ao espaço"),
             
             ("area_moradia", "🌳 Seu imóvel possui área externa (quintal)?", 
-             ["Sim", "Nao"],
+             DOMINIO_FATOS["area_moradia"],
              "Alguns pets precisam de espaço ao ar livre"),
             
             ("TempoPasseio", "⏰ Você tem tempo para passear com seu pet?", 
-             ["Sim", "Nao"],
+             DOMINIO_FATOS["TempoPasseio"],
              "Essencial para cães que precisam de exercícios"),
             
             ("interacao", "💝 Você busca interação e carinho com seu pet?", 
-             ["Sim", "Nao"],
+             DOMINIO_FATOS["interacao"],
              "Define o nível de sociabilidade do animal"),
             
             ("investimento", "💰 Qual seu orçamento para cuidados com o pet?", 
-             ["Alto", "Medio", "Baixo"],
+             DOMINIO_FATOS["investimento"],
              "Considera custos de alimentação, saúde e manutenção")
         ]
 
@@ -366,6 +516,10 @@ class QuestionsPage(tk.Frame):
                 wraplength=700
             )
             lbl.pack(anchor='w', pady=(0, 5))
+
+            self.cards[key] = card
+            self.question_labels[key] = lbl
+            self.question_texts[key] = text
             
             # Dica/explicação da pergunta
             hint_lbl = tk.Label(
@@ -408,8 +562,7 @@ class QuestionsPage(tk.Frame):
                 rb.pack(side="left", padx=(0, 15))
                 
                 # Scroll também funciona sobre os radiobuttons
-                rb.bind("<Enter>", _bind_mousewheel)
-                rb.bind("<Leave>", _unbind_mousewheel)
+                self.scroll.bind_mousewheel(rb)
 
         # Frame para botões de ação
         action_frame = tk.Frame(questions_container, bg=self.colors['background'])
@@ -453,11 +606,39 @@ class QuestionsPage(tk.Frame):
         concluir_btn.bind('<Enter>', lambda e: concluir_btn.config(bg=self.colors['primary']))
         concluir_btn.bind('<Leave>', lambda e: concluir_btn.config(bg=self.colors['success']))
 
+        self.action_frame = action_frame
+
+        # Modo adaptativo: reorganiza as perguntas a cada resposta alterada
+        if controller.questionario_adaptativo:
+            for var in self.vars.values():
+                var.trace_add("write", lambda *args: self._update_visible_questions())
+            self._update_visible_questions()
+
+    def _update_visible_questions(self):
+        """
+        Exibe apenas as perguntas do caminho da árvore de decisão para as
+        respostas atuais, na ordem em que a árvore as faz.
+        """
+        respostas = {k: v.get() for k, v in self.vars.items()}
+        caminho = self.app_controller.controller.questions_path(respostas)
+
+        for card in self.cards.values():
+            card.pack_forget()
+        for pos, key in enumerate(caminho, 1):
+            self.question_labels[key].config(text=f"Pergunta {pos}: {self.question_texts[key]}")
+            self.cards[key].pack(fill='x', pady=12, before=self.action_frame)
+
+    @traced("QuestionsPage.on_conclude")
     def on_conclude(self):
         """
         Valida as respostas e executa a inferência.
         """
         facts = {k: v.get() for k, v in self.vars.items()}
+
+        if self.app_controller.questionario_adaptativo:
+            # Só as perguntas do caminho da árvore decidem o resultado
+            caminho = self.app_controller.controller.questions_path(facts)
+            facts = {k: facts[k] for k in caminho}
         
         missing = [k for k, v in facts.items() if v is None or v == ""]
         
@@ -467,6 +648,12 @@ class QuestionsPage(tk.Frame):
                 "Por favor, responda todas as perguntas antes de continuar."
             )
             return
+
+        if not self.app_controller.questionario_adaptativo:
+            valido, erro = self.app_controller.controller.validate_facts(facts)
+            if not valido:
+                messagebox.showerror("Atenção", erro)
+                return
         
         self.app_controller.run_inference_and_show(facts)
 
@@ -507,62 +694,10 @@ class ResultPage(tk.Frame):
         main_frame = tk.Frame(self, bg=self.colors['background'])
         main_frame.pack(fill='both', expand=True)
 
-        # Canvas para scroll
-        self.scroll_canvas = tk.Canvas(
-            main_frame,
-            bg=self.colors['background'],
-            highlightthickness=0
-        )
-        
-        # Scrollbar vertical
-        scrollbar = tk.Scrollbar(main_frame, orient="vertical", command=self.scroll_canvas.yview)
-        self.scroll_canvas.configure(yscrollcommand=scrollbar.set)
-        
-        self.scroll_canvas.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
-
-        # Frame scrollável CENTRALIZADO
-        self.scrollable_frame = tk.Frame(self.scroll_canvas, bg=self.colors['background'])
-
-        # Cria a janela no canvas - CENTRALIZADA
-        self.canvas_window = self.scroll_canvas.create_window(
-            0, 0,  # Será reposicionado no configure
-            window=self.scrollable_frame,
-            anchor="n"
-        )
-
-        # Função para centralizar e configurar scroll
-        def configure_scroll(event=None):
-            # Atualiza região de scroll
-            self.scroll_canvas.configure(scrollregion=self.scroll_canvas.bbox("all"))
-            
-            # Centraliza horizontalmente
-            canvas_width = self.scroll_canvas.winfo_width()
-            frame_width = self.scrollable_frame.winfo_reqwidth()
-            x_position = max(0, (canvas_width - frame_width) // 2)
-            
-            self.scroll_canvas.coords(self.canvas_window, x_position, 0)
-
-        self.scrollable_frame.bind("<Configure>", configure_scroll)
-        self.scroll_canvas.bind("<Configure>", configure_scroll)
-
-        # Scroll SUAVE com mouse wheel
-        def _on_mousewheel(event):
-            self.scroll_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        
-        def _bind_mousewheel(event):
-            self.scroll_canvas.bind_all("<MouseWheel>", _on_mousewheel)
-        
-        def _unbind_mousewheel(event):
-            self.scroll_canvas.unbind_all("<MouseWheel>")
-        
-        # Bind do scroll funcionando em toda a página
-        self.scroll_canvas.bind("<Enter>", _bind_mousewheel)
-        self.scroll_canvas.bind("<Leave>", _unbind_mousewheel)
-        
-        # Também funciona quando o mouse está sobre os elementos internos
-        self.scrollable_frame.bind("<Enter>", _bind_mousewheel)
-        self.scrollable_frame.bind("<Leave>", _unbind_mousewheel)
+        # Área rolável (canvas + frame interno centralizado)
+        self.scroll = ScrollableArea(main_frame, self.colors)
+        self.scroll_canvas = self.scroll.canvas
+        self.scrollable_frame = self.scroll.frame
 
         # Container de conteúdo (largura fixa)
         content = tk.Frame(self.scrollable_frame, bg=self.colors['background'], width=850)
@@ -600,6 +735,10 @@ class ResultPage(tk.Frame):
         self.alternatives_frame = tk.Frame(content, bg=self.colors['background'])
         self.alternatives_frame.pack(fill='x', pady=(0, 20))
 
+        # Seção "o que mudar para receber outros pets" (contrafactuais)
+        self.counterfactuals_frame = tk.Frame(content, bg=self.colors['background'])
+        self.counterfactuals_frame.pack(fill='x', pady=(0, 20))
+
         # Separator
         sep2 = tk.Frame(content, bg='#E0E0E0', height=2)
         sep2.pack(fill='x', pady=20)
@@ -679,11 +818,17 @@ class ResultPage(tk.Frame):
         home_btn.bind('<Enter>', lambda e: home_btn.config(bg=self.colors['secondary']))
         home_btn.bind('<Leave>', lambda e: home_btn.config(bg=self.colors['primary']))
 
+    @traced("ResultPage.set_result")
     def set_result(self, recomendacoes, regras_disparadas, explicacao, facts=None):
         """Define e exibe os resultados."""
+        # Os contadores de layout passam a medir esta renderização
+        self.scroll.reset_layout_stats()
+
         # Limpa alternativas
         for widget in self.alternatives_frame.winfo_children():
             widget.destroy()
+        for widget in self.counterfactuals_frame.winfo_children():
+            widget.destroy()
 
         if recomendacoes:
             main = recomendacoes[0]
@@ -743,12 +888,62 @@ class ResultPage(tk.Frame):
             self.main_lbl.config(text="❌ Nenhuma recomendação encontrada")
             self.pet_canvas.delete("all")
 
+        if facts is not None:
+            self._show_counterfactuals(recomendacoes, facts)
+
         # Insere explicação
         self.text.configure(state="normal")
         self.text.delete("1.0", tk.END)
         self.text.insert(tk.END, explicacao)
         self.text.configure(state="disabled")
 
+        # Crescimento de widgets/itens/memória desde a renderização anterior
+        MONITOR.mark_render("ResultPage")
+
+    def _show_counterfactuals(self, recomendacoes, facts):
+        """Mostra, para cada pet não recomendado, a menor mudança de respostas que leva a ele."""
+        controlador = self.app_controller.controller
+        opcoes = controlador.counterfactuals(facts, recomendacoes)
+        if not opcoes:
+            return
+
+        titulo = tk.Label(
+            self.counterfactuals_frame,
+            text="🔁 E Se Você Mudasse Algo?",
+            font=('Segoe UI', 14, 'bold'),
+            fg=self.colors['text_dark'],
+            bg=self.colors['background'],
+            anchor='w'
+        )
+        titulo.pack(anchor='w', pady=(0, 15))
+
+        for pet, alternativas in opcoes:
+            card = tk.Frame(self.counterfactuals_frame, bg=self.colors['card'], relief='flat', bd=0,
+                            highlightthickness=0)
+            card.pack(fill='x', pady=6)
+
+            card_content = tk.Frame(card, bg=self.colors['card'])
+            card_content.pack(fill='x', padx=20, pady=12)
+
+            mudancas = alternativas[0]["mudancas"]
+            tk.Label(
+                card_content,
+                text=f"{self._get_pet_emoji(pet)}  {pet}  ·  {len(mudancas)} mudança(s)",
+                font=('Segoe UI', 11, 'bold'),
+                fg=self.colors['text_dark'],
+                bg=self.colors['card'],
+                anchor='w'
+            ).pack(anchor='w')
+            tk.Label(
+                card_content,
+                text="\n".join(controlador.describe_changes(mudancas)),
+                font=('Segoe UI', 9),
+                fg=self.colors['text_light'],
+                bg=self.colors['card'],
+                justify='left',
+                anchor='w'
+            ).pack(anchor='w', pady=(5, 0))
+
     def _draw_pet_illustration(self, pet):
         """Desenha ilustração do pet."""
         self.pet_canvas.delete("all")
@@ -810,12 +1005,53 @@ class ResultPage(tk.Frame):
         return "🐾"
 
 
-def start_app():
-    """Função principal para iniciar a aplicação."""
+# Classes das páginas, por nome (usado por App.get_frame)
+_CLASSES_PAGINAS = {
+    "HomePage": HomePage,
+    "QuestionsPage": QuestionsPage,
+    "ResultPage": ResultPage,
+}
+
+
+def start_app(relatorio_inicializacao=False, inicio=None, rastreamento=None, memoria=None,
+              adaptativo=False):
+    """
+    Função principal para iniciar a aplicação.
+
+    Args:
+        relatorio_inicializacao: Se True, imprime no stderr os tempos de
+                                 inicialização assim que a janela é pintada
+        inicio: perf_counter() do início do processo (padrão: início da
+                importação da GUI)
+        rastreamento: Arquivo onde os spans são gravados ao fechar a janela
+                      (.jsonl ou, para outras extensões, formato do Chrome);
+                      None deixa o rastreamento desligado
+        memoria: Intervalo em segundos do relatório de memória no stderr
+                 (liga o tracemalloc); None deixa o monitor desligado
+        adaptativo: Se True, usa o questionário adaptativo (só as perguntas
+                    que ainda podem mudar o resultado)
+    """
+    if rastreamento:
+        TRACER.enable()
     root = tk.Tk()
-    app = App(root)
+    if memoria:
+        MONITOR.start(raiz=root)
+    app = App(root, questionario_adaptativo=adaptativo, metricas=StartupMetrics(inicio), auditoria=True,
+              ao_inicializar=(lambda m: print(m.format(), file=sys.stderr)) if relatorio_inicializacao else None)
+    if memoria:
+        MONITOR.schedule_report(root, memoria)
     root.mainloop()
+    # Grava os registros de auditoria ainda na fila antes de sair
+    if app.controller.auditoria is not None:
+        app.controller.auditoria.close()
+    if rastreamento:
+        total = TRACER.export(rastreamento)
+        print(f"{total} spans gravados em {rastreamento}", file=sys.stderr)
+
+
+# Fim da importação do módulo (ver StartupMetrics)
+_FIM_IMPORTACAO = time.perf_counter()
 
 
 if __name__ == "__main__":
-    start_app()
\ No newline at end of file
+    start_app()
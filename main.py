@@ -1,5 +1,17 @@
 # main.py
+import sys
+import time
+
+# Início do processo, para o relatório de inicialização (--startup-report)
+_INICIO = time.perf_counter()
+
 from GUI.main_window import start_app
 
 if __name__ == "__main__":
-    start_app()
+    # --trace arquivo.json (Chrome) ou arquivo.jsonl: grava os spans ao sair
+    rastreamento = sys.argv[sys.argv.index("--trace") + 1] if "--trace" in sys.argv[:-1] else None
+    # --memory-report segundos: relatório periódico de memória no stderr
+    memoria = float(sys.argv[sys.argv.index("--memory-report") + 1]) if "--memory-report" in sys.argv[:-1] else None
+    # --adaptive: questionário adaptativo (só as perguntas que ainda mudam o resultado)
+    start_app(relatorio_inicializacao="--startup-report" in sys.argv, inicio=_INICIO,
+              rastreamento=rastreamento, memoria=memoria, adaptativo="--adaptive" in sys.argv)